@@ -0,0 +1,115 @@
+import math
+
+import numpy
+
+
+def adaptive_extrema(evaluate, start_frame, end_frame, tolerance=0.01, step=4.0, subframe_step=1.0, safety=2.0,
+                     key_times=None, slope=None):
+    """
+    Finds the min and max of an animated value with as few evaluations as possible.
+    The range is sampled coarsely first (and on every key), then only the intervals that could still hide a
+    value more than tolerance past the extremes found so far are split in half, down to the subframe step.
+    Whether an interval could hide such a value is decided with a Lipschitz bound: the value can't change
+    faster than the given slope. Without one, the slope is estimated as safety times the steepest slope seen
+    between any two neighbouring samples, then the error is an estimate and can miss a peak between samples
+    Args:
+        evaluate (callable): Takes a numpy array of frames and returns the values on those frames
+        start_frame (float): The first frame
+        end_frame (float): The last frame
+        tolerance (float): How far (in value units) the extremes are allowed to be off
+        step (float): The frames between the coarse samples, rounded up to a power of two subframe steps
+        subframe_step (float): The smallest distance between two samples, eg: 1.0 for whole frames or 0.25
+            for motion blur samples
+        safety (float): How much steeper than the steepest sampled slope the value is assumed to get
+        key_times (list): The frames of the keys, they are always sampled so no key between the coarse
+            samples is missed
+        slope (float): The steepest the value can change (per frame), or a numpy array with the steepest
+            slope between every two neighbouring key_times (eg: CurveBounds.segment_slopes)
+
+    Returns:
+        A dict with the 'min' and 'max' values, the 'min_frame' and 'max_frame' they were found on, the
+        'error' (how much further the true extremes between the samples can be, given the Lipschitz
+        bound), whether that error is a 'bounded' one (a slope was given) or an estimate, and the number
+        of 'evaluations'
+    """
+    start_frame = float(start_frame)
+    end_frame = float(end_frame)
+
+    # Halving a power of two multiple of the subframe step always lands on the subframe grid
+    levels = int(math.ceil(math.log(max(step / subframe_step, 1.0), 2)))
+    coarse_step = subframe_step * 2 ** levels
+
+    times = numpy.arange(start_frame, end_frame, coarse_step)
+    times = numpy.append(times, end_frame) if len(times) == 0 or times[-1] < end_frame else times
+    if key_times is not None:
+        key_times = numpy.asarray(key_times, dtype=numpy.float64)
+        times = numpy.union1d(times, key_times[(key_times >= start_frame) & (key_times <= end_frame)])
+    values = numpy.asarray(evaluate(times), dtype=numpy.float64)
+    evaluations = len(times)
+
+    best = {
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'min_frame': float(times[numpy.argmin(values)]),
+        'max_frame': float(times[numpy.argmax(values)]),
+    }
+    if len(times) == 1:
+        best.update(error=0.0, bounded=slope is not None, evaluations=evaluations)
+        return best
+
+    # Every interval between two neighbouring samples
+    left, right = times[:-1], times[1:]
+    left_values, right_values = values[:-1], values[1:]
+    bounded = slope is not None
+    segment_slopes = None
+    if not bounded:
+        slope = 0.0
+    elif numpy.ndim(slope):
+        # Every key is a sample, so every interval lies in one segment. Outside of the keys use the steepest
+        segment_slopes = numpy.append(numpy.asarray(slope, dtype=numpy.float64), numpy.max(slope, initial=0.0))
+
+    while True:
+        widths = right - left
+        if not bounded:
+            slope = max(slope, float(numpy.max(numpy.abs(right_values - left_values) / widths)) * safety)
+        elif segment_slopes is not None:
+            segments = numpy.searchsorted(key_times, left, side='right') - 1
+            segments[(segments < 0) | (segments >= len(segment_slopes) - 1)] = len(segment_slopes) - 1
+            slope = segment_slopes[segments]
+
+        # The highest and lowest the value can get inside every interval
+        middles = (left_values + right_values) / 2.0
+        with numpy.errstate(invalid='ignore'):
+            reach = numpy.where(widths > 0.0, slope * widths / 2.0, 0.0)
+        upper = middles + reach
+        lower = middles - reach
+
+        # Only split where it can change the answer and the halves are still on the subframe grid
+        splits = numpy.round(((left + right) / 2.0 - start_frame) / subframe_step) * subframe_step + start_frame
+        refine = ((upper > best['max'] + tolerance) | (lower < best['min'] - tolerance)) & \
+            (splits > left) & (splits < right)
+        if not numpy.any(refine):
+            break
+
+        split_times = splits[refine]
+        split_values = numpy.asarray(evaluate(split_times), dtype=numpy.float64)
+        evaluations += len(split_times)
+
+        if split_values.max() > best['max']:
+            best['max'] = float(split_values.max())
+            best['max_frame'] = float(split_times[numpy.argmax(split_values)])
+        if split_values.min() < best['min']:
+            best['min'] = float(split_values.min())
+            best['min_frame'] = float(split_times[numpy.argmin(split_values)])
+
+        # Replace every refined interval with its two halves
+        keep = ~refine
+        left = numpy.concatenate([left[keep], left[refine], split_times])
+        right = numpy.concatenate([right[keep], split_times, right[refine]])
+        left_values = numpy.concatenate([left_values[keep], left_values[refine], split_values])
+        right_values = numpy.concatenate([right_values[keep], split_values, right_values[refine]])
+
+    best['error'] = max(float(upper.max()) - best['max'], best['min'] - float(lower.min()), 0.0)
+    best['bounded'] = bounded
+    best['evaluations'] = evaluations
+    return best
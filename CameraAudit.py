@@ -0,0 +1,274 @@
+"""
+Audits every camera in the scene for the overscan CompMoveCamera would give it, without changing anything
+
+Usage:
+    import CameraAudit
+    rows = CameraAudit.audit_scene()
+    print(CameraAudit.format_table(rows))
+
+Everything is read with bulk queries: one ls for the camera shapes, one listConnections for the inputs of all
+their focal lengths and rotations, and a few keyframe and keyTangent queries per curve type for all the keys.
+The bounds of every curve are solved from its keys (see CurveBounds) and all the cameras are solved
+together by OverscanMath, so thousands of cameras take seconds. Keys that reach an attribute through another
+node (eg: a pairBlend or an animation layer) are sampled instead.
+"""
+import numpy
+from maya import cmds  # pylint: disable=import-error
+import CameraSampling
+import CurveBounds
+import OverscanMath
+
+# The attributes CompMoveCamera locks
+SHAPE_ATTRS = ['focalLength']
+TRANSFORM_ATTRS = ['rotateX', 'rotateY']
+# The names of Maya's default cameras, these are left out of the audit
+STARTUP_CAMERAS = ['persp', 'top', 'front', 'side']
+# The curve types whose bounds can be solved from the keys, driven keys (animCurveU*) are read as static
+CURVE_TYPES = ['animCurveTA', 'animCurveTL', 'animCurveTU']
+
+
+def get_cameras(include_startup=False):
+    """
+    Gets all the cameras in the scene with one query
+    Args:
+        include_startup (bool): Also include the default persp, top, front and side cameras
+
+    Returns:
+        A list of (transform, shape) tuples of long names
+    """
+    cameras = []
+    for shape in cmds.ls(type='camera', long=True) or []:
+        transform = shape.rsplit('|', 1)[0]
+
+        # Only cameras named like the default ones need to be asked if they are one
+        if not include_startup and transform.rsplit('|', 1)[-1] in STARTUP_CAMERAS and \
+                cmds.camera(shape, query=True, startupCamera=True):
+            continue
+
+        cameras.append((transform, shape))
+    return cameras
+
+
+def get_inputs(attr_names):
+    """
+    Gets the nodes that drive attributes with one listConnections query
+    Args:
+        attr_names (list): The full attribute names (long names)
+
+    Returns:
+        A dict of attribute name to the node that drives it, attributes without an input are left out
+    """
+    connections = cmds.listConnections(
+        attr_names, source=True, destination=False, plugs=True, connections=True, skipConversionNodes=True) or []
+
+    # Every plug is normalized on its own (one ls per node), so nothing depends on the order or the number of
+    # names ls gives back
+    long_nodes = {}
+    wanted = set(attr_names)
+    inputs = {}
+    for plug, source in zip(connections[0::2], connections[1::2]):
+        node, attr = plug.split('.', 1)
+        if node not in long_nodes:
+            long_nodes[node] = (cmds.ls(node, long=True) or [node])[0]
+        attr_name = long_nodes[node] + '.' + attr
+        if attr_name in wanted:
+            inputs[attr_name] = source.split('.', 1)[0]
+    return inputs
+
+
+def get_curves(attr_names):
+    """
+    Gets the animation curves that drive attributes
+    Args:
+        attr_names (list): The full attribute names (long names)
+
+    Returns:
+        A tuple of a dict of attribute name to the name of the curve that directly drives it, and a list of
+        the attributes that are driven by another node (eg: a pairBlend, an animation layer or a constraint)
+    """
+    inputs = get_inputs(attr_names)
+    curves = set(cmds.ls(sorted(set(inputs.values())), type='animCurve') or [])
+
+    attr_curves = dict((attr_name, node) for attr_name, node in inputs.items() if node in curves)
+    others = [attr_name for attr_name in attr_names if attr_name in inputs and attr_name not in attr_curves]
+    return attr_curves, others
+
+
+def get_sampled_bounds(attr_names):
+    """
+    Samples the min and max value and the first and last keyframe of attributes whose keys reach them
+    through another node, in one sweep over the union of their keyframe ranges
+    Args:
+        attr_names (list): The full attribute names
+
+    Returns:
+        A dict of attribute name to a tuple of (min value, max value) and (first keyframe, last keyframe),
+        attributes without keys (eg: driven by a constraint) are left out
+    """
+    keyframe_ranges = {}
+    for attr_name in attr_names:
+        keyframes = cmds.keyframe(attr_name, query=True)
+        if keyframes:
+            keyframe_ranges[attr_name] = (int(min(keyframes)), int(max(keyframes)))
+    if not keyframe_ranges:
+        return {}
+
+    keyed = sorted(keyframe_ranges)
+    extrema = CameraSampling.RunningExtrema(
+        len(keyed),
+        start_frames=[keyframe_ranges[attr_name][0] for attr_name in keyed],
+        end_frames=[keyframe_ranges[attr_name][1] for attr_name in keyed]
+    )
+    for frames, values in CameraSampling.iter_samples(
+            keyed, min(extrema.start_frames), max(extrema.end_frames)):
+        extrema.update(frames, values)
+
+    return dict((attr_name, (extrema.value_range(column), keyframe_ranges[attr_name]))
+                for column, attr_name in enumerate(keyed))
+
+
+def get_curve_bounds(curves):
+    """
+    Solves the min and max value and the first and last keyframe of many curves
+    Args:
+        curves (list): The animation curve nodes
+
+    Returns:
+        A dict of curve name to a tuple of (min value, max value) and (first keyframe, last keyframe),
+        curves of other types than CURVE_TYPES are left out
+    """
+    bounds = {}
+    for curve_type in CURVE_TYPES:
+        # Read the keys of all the curves of one type together, they share their unit scales
+        typed = cmds.ls(curves, type=curve_type) or []
+        for curve, keys in zip(typed, CameraSampling.read_curves(typed, curve_type)):
+            out_x, out_y, in_x, in_y = CurveBounds.control_points(
+                keys['times'], keys['values'], keys['in_angles'], keys['out_angles'],
+                in_weights=keys['in_weights'],
+                out_weights=keys['out_weights'],
+                slope_scale=keys['slope_scale'],
+                weight_scale=keys['weight_scale']
+            )
+            data = CurveBounds.CurveData(
+                keys['times'], keys['values'], out_x, out_y, in_x, in_y, keys['steps'])
+            bounds[curve] = (
+                CurveBounds.curve_bounds(data),
+                (int(keys['times'].min()), int(keys['times'].max()))
+            )
+    return bounds
+
+
+def audit_scene(cameras=None, animated_only=True):
+    """
+    Solves the aperture and resolution CompMoveCamera would give every camera, without changing the scene
+    Args:
+        cameras (list): (transform, shape) tuples of long names, all the scene cameras (see get_cameras)
+            are audited if this isn't given
+        animated_only (bool): Leave out the cameras whose focal length and rotations aren't animated
+
+    Returns:
+        A list of dicts, one per camera, with the most overscan first. Every dict has the 'camera',
+        'shape', the 'animated' attribute names, the 'focal_length', 'rotate_x' and 'rotate_y' (min, max)
+        values and keyframes, the 'aperture', 'new_aperture', 'resolution' and 'new_resolution', and the
+        'overscan' (how many times bigger the new resolution is, on its most grown side)
+    """
+    if cameras is None:
+        cameras = get_cameras()
+    if not cameras:
+        return []
+
+    # One column per camera, one row per attribute (focalLength, rotateX, rotateY)
+    attr_names = [[shape + '.' + attr for _, shape in cameras] for attr in SHAPE_ATTRS] + \
+                 [[camera + '.' + attr for camera, _ in cameras] for attr in TRANSFORM_ATTRS]
+    attr_curves, others = get_curves([attr_name for row in attr_names for attr_name in row])
+    curve_bounds = get_curve_bounds(sorted(set(attr_curves.values())))
+    attr_bounds = dict((attr_name, curve_bounds[curve]) for attr_name, curve in attr_curves.items()
+                       if curve in curve_bounds)
+    attr_bounds.update(get_sampled_bounds(others))
+
+    # Read the attributes that aren't keyed and the apertures through the API in one go
+    static = [attr_name for row in attr_names for attr_name in row if attr_name not in attr_bounds]
+    static += [shape + '.verticalFilmAperture' for _, shape in cameras]
+    static += [shape + '.horizontalFilmAperture' for _, shape in cameras]
+    static_values = dict(zip(static, CameraSampling.read_plugs(static)))
+
+    count = len(cameras)
+    minimums = numpy.empty((len(attr_names), count), dtype=numpy.float64)
+    maximums = numpy.empty((len(attr_names), count), dtype=numpy.float64)
+    keyframes = [[None] * count for _ in attr_names]
+    for row, row_attr_names in enumerate(attr_names):
+        for column, attr_name in enumerate(row_attr_names):
+            bounds = attr_bounds.get(attr_name)
+            if bounds is None:
+                minimums[row, column] = maximums[row, column] = static_values[attr_name]
+            else:
+                (minimums[row, column], maximums[row, column]), keyframes[row][column] = bounds
+
+    animated = numpy.array([[keyframe is not None for keyframe in row] for row in keyframes])
+    aperture_height = numpy.array([static_values[shape + '.verticalFilmAperture'] for _, shape in cameras])
+    aperture_width = numpy.array([static_values[shape + '.horizontalFilmAperture'] for _, shape in cameras])
+    resolution_height = cmds.getAttr('defaultResolution.height')
+    resolution_width = cmds.getAttr('defaultResolution.width')
+
+    # Like CompMoveCamera.get_rotations, a rotation without keys is used as its own spread
+    _, spread_x = OverscanMath.rotation_spread(minimums[1], maximums[1])
+    _, spread_y = OverscanMath.rotation_spread(minimums[2], maximums[2])
+    spread_x = numpy.where(animated[1], spread_x, numpy.radians(minimums[1]))
+    spread_y = numpy.where(animated[2], spread_y, numpy.radians(minimums[2]))
+
+    # Like CompMoveCamera.do_the_math, solved at the widest focal length
+    focal_min = minimums[0] / OverscanMath.MILLIMETERS_PER_INCH
+    result = OverscanMath.solve_overscan(
+        focal_min, focal_min, spread_x, spread_y,
+        aperture_height, aperture_width, resolution_height, resolution_width)
+
+    overscan = numpy.maximum(result['resolution_width'] / resolution_width,
+                             result['resolution_height'] / resolution_height)
+
+    rows = []
+    for column, (camera, shape) in enumerate(cameras):
+        animated_attrs = [attr for row, attr in enumerate(SHAPE_ATTRS + TRANSFORM_ATTRS) if animated[row, column]]
+        if animated_only and not animated_attrs:
+            continue
+
+        values = {}
+        for row, name in enumerate(['focal_length', 'rotate_x', 'rotate_y']):
+            values[name] = {
+                'min': float(minimums[row, column]),
+                'max': float(maximums[row, column]),
+                'keyframes': keyframes[row][column],
+            }
+
+        rows.append(dict(values, **{
+            'camera': camera,
+            'shape': shape,
+            'animated': animated_attrs,
+            'aperture': {'width': float(aperture_width[column]), 'height': float(aperture_height[column])},
+            'new_aperture': {'width': float(result['aperture_width'][column]),
+                             'height': float(result['aperture_height'][column])},
+            'resolution': {'width': resolution_width, 'height': resolution_height},
+            'new_resolution': {'width': float(result['resolution_width'][column]),
+                               'height': float(result['resolution_height'][column])},
+            'overscan': float(overscan[column]),
+        }))
+
+    # Most overscan first
+    rows.sort(key=lambda row: row['overscan'], reverse=True)
+    return rows
+
+
+def format_table(rows, limit=None):
+    # The audit as a text table, one line per camera
+    lines = ['{:>4} {:>9} {:>12} {:>15} {:>15} {:>15}  {}'.format(
+        '#', 'overscan', 'resolution', 'focal length', 'rotateX', 'rotateY', 'camera (animated)')]
+    for rank, row in enumerate(rows[:limit], 1):
+        lines.append('{:>4} {:>9} {:>12} {:>15} {:>15} {:>15}  {} ({})'.format(
+            rank,
+            '{:+.1%}'.format(row['overscan'] - 1.0),
+            '{:.0f}x{:.0f}'.format(row['new_resolution']['width'], row['new_resolution']['height']),
+            '{:.1f}-{:.1f}'.format(row['focal_length']['min'], row['focal_length']['max']),
+            '{:.1f}-{:.1f}'.format(row['rotate_x']['min'], row['rotate_x']['max']),
+            '{:.1f}-{:.1f}'.format(row['rotate_y']['min'], row['rotate_y']['max']),
+            row['camera'], ', '.join(row['animated']) or 'nothing'))
+    lines.append('{} cameras'.format(len(rows)))
+    return '\n'.join(lines)
@@ -0,0 +1,229 @@
+import json
+import math
+import struct
+
+
+def _number(value):
+    # Missing values are stored as NaN in the binary format
+    return float('nan') if value is None else float(value)
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+def _pack_string(value):
+    data = value.encode('utf-8')
+    return struct.pack('<H', len(data)) + data
+
+
+def _unpack_string(data, offset):
+    length, = struct.unpack_from('<H', data, offset)
+    offset += 2
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+class Size(object):
+    """
+    A width and height, used for film apertures (inches) and render resolutions (pixels)
+    """
+    __slots__ = ('width', 'height')
+
+    def __init__(self, width=None, height=None):
+        self.width = width
+        self.height = height
+
+    def to_dict(self):
+        return {'width': self.width, 'height': self.height}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('width'), data.get('height'))
+
+
+class AxisRotation(object):
+    """
+    The rotation of one camera axis over the shot, all in degrees
+    """
+    __slots__ = ('attr_name', 'average', 'spread',
+                 'min', 'max', 'min_keyframe', 'max_keyframe')
+    NUMBERS = ('average', 'spread', 'min', 'max', 'min_keyframe', 'max_keyframe')
+    FORMAT = struct.Struct('<6d')
+
+    def __init__(self, attr_name='', average=None, spread=None, min=None, max=None, min_keyframe=None, max_keyframe=None):  # pylint: disable=redefined-builtin
+        self.attr_name = attr_name
+        self.average = average
+        self.spread = spread
+        self.min = min
+        self.max = max
+        self.min_keyframe = min_keyframe
+        self.max_keyframe = max_keyframe
+
+    @classmethod
+    def from_rotation(cls, rotation):
+        # Build it from CompMoveCamera's rotation dict
+        return cls(
+            attr_name=rotation['attr_name'],
+            average=rotation['rotation_average'],
+            spread=rotation['field_of_angle_in_degrees'],
+            min=rotation.get('value', {}).get('min'),
+            max=rotation.get('value', {}).get('max'),
+            min_keyframe=rotation.get('keyframes', {}).get('min'),
+            max_keyframe=rotation.get('keyframes', {}).get('max')
+        )
+
+    def to_dict(self):
+        data = {'attr_name': self.attr_name}
+        for name in self.NUMBERS:
+            data[name] = getattr(self, name)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_bytes(self):
+        return _pack_string(self.attr_name) + self.FORMAT.pack(
+            *[_number(getattr(self, name)) for name in self.NUMBERS])
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        attr_name, offset = _unpack_string(data, offset)
+        numbers = cls.FORMAT.unpack_from(data, offset)
+        result = cls(attr_name, *[_optional(number) for number in numbers])
+        return result, offset + cls.FORMAT.size
+
+
+class CameraResult(object):
+    """
+    Everything CompMoveCamera read and computed for one camera, kept small so that batch tools can hold
+    thousands of them in memory and send them between processes
+    """
+    __slots__ = ('camera', 'shape', 'focal_min', 'focal_max', 'focal_min_keyframe', 'focal_max_keyframe',
+                 'x', 'y', 'aperture', 'new_aperture', 'resolution', 'new_resolution')
+    NUMBERS = ('focal_min', 'focal_max',
+               'focal_min_keyframe', 'focal_max_keyframe')
+    SIZES = ('aperture', 'new_aperture', 'resolution', 'new_resolution')
+    FORMAT = struct.Struct('<12d')
+
+    def __init__(self, camera='', shape='', focal_min=None, focal_max=None, focal_min_keyframe=None,
+                 focal_max_keyframe=None, x=None, y=None, aperture=None, new_aperture=None, resolution=None,
+                 new_resolution=None):
+        self.camera = camera
+        self.shape = shape
+        self.focal_min = focal_min
+        self.focal_max = focal_max
+        self.focal_min_keyframe = focal_min_keyframe
+        self.focal_max_keyframe = focal_max_keyframe
+        self.x = x or AxisRotation()
+        self.y = y or AxisRotation()
+        self.aperture = aperture or Size()
+        self.new_aperture = new_aperture or Size()
+        self.resolution = resolution or Size()
+        self.new_resolution = new_resolution or Size()
+
+    @classmethod
+    def from_camera(cls, comp_move_camera):
+        """
+        Builds the result of a CompMoveCamera that has done its math
+        Args:
+            comp_move_camera (CompMoveCamera): The camera tool
+
+        Returns:
+            A CameraResult
+        """
+        focal_length = comp_move_camera.focal_length
+        aperture = comp_move_camera.aperature
+        resolution = comp_move_camera.resolution
+        return cls(
+            camera=comp_move_camera.selected['camera'],
+            shape=comp_move_camera.selected['shape'],
+            focal_min=focal_length['value_millimeters']['min'],
+            focal_max=focal_length['value_millimeters']['max'],
+            focal_min_keyframe=focal_length.get('keyframes', {}).get('min'),
+            focal_max_keyframe=focal_length.get('keyframes', {}).get('max'),
+            x=AxisRotation.from_rotation(comp_move_camera.X['rotation']),
+            y=AxisRotation.from_rotation(comp_move_camera.Y['rotation']),
+            aperture=Size.from_dict(aperture['original']),
+            new_aperture=Size.from_dict(aperture.get('new', {})),
+            resolution=Size.from_dict(resolution['original']),
+            new_resolution=Size.from_dict(resolution.get('new', {}))
+        )
+
+    def to_dict(self):
+        data = {'camera': self.camera, 'shape': self.shape,
+                'x': self.x.to_dict(), 'y': self.y.to_dict()}
+        for name in self.NUMBERS:
+            data[name] = getattr(self, name)
+        for name in self.SIZES:
+            data[name] = getattr(self, name).to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['x'] = AxisRotation.from_dict(data['x'])
+        data['y'] = AxisRotation.from_dict(data['y'])
+        for name in cls.SIZES:
+            data[name] = Size.from_dict(data[name])
+        return cls(**data)
+
+    def to_bytes(self):
+        numbers = [getattr(self, name) for name in self.NUMBERS]
+        for name in self.SIZES:
+            size = getattr(self, name)
+            numbers.extend([size.width, size.height])
+
+        return (_pack_string(self.camera) + _pack_string(self.shape) +
+                self.FORMAT.pack(*[_number(number) for number in numbers]) +
+                self.x.to_bytes() + self.y.to_bytes())
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """
+        Reads a result that was written with to_bytes
+        Args:
+            data (bytes): The binary data
+            offset (int): Where in the data the result starts
+
+        Returns:
+            A tuple of the CameraResult and the offset right after it
+        """
+        camera, offset = _unpack_string(data, offset)
+        shape, offset = _unpack_string(data, offset)
+        numbers = [_optional(number)
+                   for number in cls.FORMAT.unpack_from(data, offset)]
+        offset += cls.FORMAT.size
+        x, offset = AxisRotation.from_bytes(data, offset)
+        y, offset = AxisRotation.from_bytes(data, offset)
+
+        result = cls(camera, shape, *numbers[:len(cls.NUMBERS)], x=x, y=y)
+        sizes = numbers[len(cls.NUMBERS):]
+        for index, name in enumerate(cls.SIZES):
+            setattr(result, name, Size(
+                sizes[index * 2], sizes[index * 2 + 1]))
+        return result, offset
+
+
+def dumps(results):
+    # Many results as one JSON string
+    return json.dumps([result.to_dict() for result in results])
+
+
+def loads(data):
+    return [CameraResult.from_dict(item) for item in json.loads(data)]
+
+
+def to_bytes(results):
+    # Many results as one binary blob, prefixed with how many there are
+    return struct.pack('<I', len(results)) + b''.join(result.to_bytes() for result in results)
+
+
+def from_bytes(data):
+    count, = struct.unpack_from('<I', data, 0)
+    offset = 4
+    results = []
+    for _ in range(count):
+        result, offset = CameraResult.from_bytes(data, offset)
+        results.append(result)
+    return results
@@ -0,0 +1,594 @@
+import numpy
+import AdaptiveSampling
+import CurveBounds
+import maya.OpenMaya as OpenMaya  # pylint: disable=import-error
+import maya.OpenMayaAnim as OpenMayaAnim  # pylint: disable=import-error
+from maya import cmds  # pylint: disable=import-error
+
+# How many frames iter_samples evaluates at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def get_plug(attr_name):
+    """
+    Gets the MPlug of an attribute
+    Args:
+        attr_name (str): The full attribute name, eg: 'cameraShape1.focalLength'
+
+    Returns:
+        The MPlug of the attribute
+    """
+    selection = OpenMaya.MSelectionList()
+    selection.add(attr_name)
+    plug = OpenMaya.MPlug()
+    selection.getPlug(0, plug)
+    return plug
+
+
+def get_anim_curve(attr_name):
+    """
+    Gets the animation curve that directly drives an attribute
+    Args:
+        attr_name (str): The full attribute name
+
+    Returns:
+        An MFnAnimCurve, or None if the attribute isn't driven by a time based curve
+        (eg: constraints, expressions, driven keys or animation layers)
+    """
+    plug = get_plug(attr_name)
+
+    sources = OpenMaya.MPlugArray()
+    plug.connectedTo(sources, True, False)
+    if sources.length() == 0:
+        return None
+
+    node = sources[0].node()
+    if not node.hasFn(OpenMaya.MFn.kAnimCurve):
+        return None
+
+    curve = OpenMayaAnim.MFnAnimCurve(node)
+    if not curve.isTimeInput():
+        return None
+
+    return curve
+
+
+def get_curve_scale(curve):
+    """
+    Gets the factor that converts a curve's evaluated values to UI units
+    Args:
+        curve (MFnAnimCurve): The animation curve
+
+    Returns:
+        The factor to multiply the evaluated values with
+    """
+    # Angular curves evaluate in radians, convert them to the UI unit (like getAttr does)
+    if curve is not None and curve.animCurveType() == OpenMayaAnim.MFnAnimCurve.kAnimCurveTA:
+        return OpenMaya.MAngle(1.0, OpenMaya.MAngle.kRadians).asUnits(
+            OpenMaya.MAngle.uiUnit())
+    return 1.0
+
+
+def get_plug_scale(plug):
+    """
+    Gets the factor that converts a plug's internal values to UI units
+    Args:
+        plug (MPlug): The plug
+
+    Returns:
+        The factor to multiply the internal values with
+    """
+    attribute = plug.attribute()
+    if attribute.hasFn(OpenMaya.MFn.kUnitAttribute):
+        unit_type = OpenMaya.MFnUnitAttribute(attribute).unitType()
+        if unit_type == OpenMaya.MFnUnitAttribute.kAngle:
+            return OpenMaya.MAngle(1.0, OpenMaya.MAngle.kRadians).asUnits(
+                OpenMaya.MAngle.uiUnit())
+        if unit_type == OpenMaya.MFnUnitAttribute.kDistance:
+            return OpenMaya.MDistance(1.0, OpenMaya.MDistance.kCentimeters).asUnits(
+                OpenMaya.MDistance.uiUnit())
+    return 1.0
+
+
+def evaluate_plugs(plugs, frames):
+    """
+    Evaluates plugs through the DG, pulling all of them through one time context per frame
+    Args:
+        plugs (list): The MPlugs
+        frames (list): The frames to evaluate
+
+    Returns:
+        A numpy array of shape (frames, plugs), in internal units
+    """
+    values = numpy.empty((len(frames), len(plugs)), dtype=numpy.float64)
+    time_unit = OpenMaya.MTime.uiUnit()
+
+    for row, frame in enumerate(frames):
+        context = OpenMaya.MDGContext(OpenMaya.MTime(float(frame), time_unit))
+        for column, plug in enumerate(plugs):
+            values[row, column] = plug.asDouble(context)
+
+    return values
+
+
+def evaluate_curves(curves, frames):
+    """
+    Evaluates animation curves directly, this doesn't go through the command layer or the DG
+    Args:
+        curves (list): The MFnAnimCurves
+        frames (list): The frames to evaluate
+
+    Returns:
+        A numpy array of shape (frames, curves), in internal units
+    """
+    values = numpy.empty((len(frames), len(curves)), dtype=numpy.float64)
+    time_unit = OpenMaya.MTime.uiUnit()
+
+    for row, frame in enumerate(frames):
+        time = OpenMaya.MTime(float(frame), time_unit)
+        for column, curve in enumerate(curves):
+            values[row, column] = curve.evaluate(time)
+
+    return values
+
+
+def evaluate_matrices(matrix_plugs, plugs, frames):
+    """
+    Evaluates matrix plugs (eg: worldMatrix) and other plugs through the DG in one sweep, pulling all of them
+    through one time context per frame
+    Args:
+        matrix_plugs (list): The MPlugs of matrix attributes
+        plugs (list): The MPlugs of numeric attributes
+        frames (list): The frames to evaluate
+
+    Returns:
+        A tuple of a numpy array of shape (frames, matrix plugs, 4, 4) and a numpy array of shape
+        (frames, plugs) in internal units
+    """
+    matrices = numpy.empty((len(frames), len(matrix_plugs), 4, 4), dtype=numpy.float64)
+    values = numpy.empty((len(frames), len(plugs)), dtype=numpy.float64)
+    time_unit = OpenMaya.MTime.uiUnit()
+
+    for row, frame in enumerate(frames):
+        context = OpenMaya.MDGContext(OpenMaya.MTime(float(frame), time_unit))
+        for column, plug in enumerate(matrix_plugs):
+            matrix = OpenMaya.MFnMatrixData(plug.asMObject(context)).matrix()
+            matrices[row, column] = [[matrix(i, j) for j in range(4)] for i in range(4)]
+        for column, plug in enumerate(plugs):
+            values[row, column] = plug.asDouble(context)
+
+    return matrices, values
+
+
+def iter_matrix_samples(matrix_attr_names, attr_names, start_frame, end_frame, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Samples matrix attributes together with other attributes on every frame between two frames (both
+    included), one chunk of frames at a time
+    Args:
+        matrix_attr_names (list): The full names of matrix attributes, eg: 'camera1.worldMatrix[0]'
+        attr_names (list): The full names of numeric attributes
+        start_frame (int): The first frame to sample
+        end_frame (int): The last frame to sample
+        chunk_size (int): How many frames to sample per chunk
+
+    Yields:
+        A tuple of the chunk's frames, a numpy array of shape (frames, matrix attributes, 4, 4) and a numpy
+        array of shape (frames, attributes) in UI units
+    """
+    matrix_plugs = [get_plug(attr_name) for attr_name in matrix_attr_names]
+    plugs = [get_plug(attr_name) for attr_name in attr_names]
+    scales = numpy.array([get_plug_scale(plug) for plug in plugs])
+
+    start_frame = int(start_frame)
+    end_frame = int(end_frame)
+    for chunk_start in range(start_frame, end_frame + 1, chunk_size):
+        frames = numpy.arange(chunk_start, min(chunk_start + chunk_size, end_frame + 1))
+        matrices, values = evaluate_matrices(matrix_plugs, plugs, frames)
+        yield frames, matrices, values * scales
+
+
+def sample_plugs(attr_names, start_frame, end_frame):
+    """
+    Evaluates several attributes through the DG on every frame between two frames (both included).
+    All the attributes are pulled through the same time context, so the scene is evaluated once per frame
+    no matter how many attributes there are. This works for anything, eg: constraints and expressions
+    Args:
+        attr_names (list): The full attribute names
+        start_frame (int): The first frame to sample
+        end_frame (int): The last frame to sample
+
+    Returns:
+        A numpy array of shape (frames, attributes), in the attributes' UI units
+    """
+    plugs = [get_plug(attr_name) for attr_name in attr_names]
+    values = evaluate_plugs(plugs, range(int(start_frame), int(end_frame) + 1))
+    values *= numpy.array([get_plug_scale(plug) for plug in plugs])
+    return values
+
+
+def iter_samples(attr_names, start_frame, end_frame, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Samples several attributes on every frame between two frames (both included), one chunk of frames
+    at a time, so that very long frame ranges never have to be held in memory at once
+    Args:
+        attr_names (list): The full attribute names
+        start_frame (int): The first frame to sample
+        end_frame (int): The last frame to sample
+        chunk_size (int): How many frames to sample per chunk
+
+    Yields:
+        A tuple of the chunk's frames and a numpy array of shape (frames, attributes), in UI units
+    """
+    curves = [get_anim_curve(attr_name) for attr_name in attr_names]
+
+    # Curves are evaluated directly, everything else is evaluated together through the DG
+    keyed = [column for column, curve in enumerate(curves) if curve is not None]
+    evaluated = [column for column, curve in enumerate(curves) if curve is None]
+
+    keyed_curves = [curves[column] for column in keyed]
+    keyed_scales = numpy.array([get_curve_scale(curve)
+                                for curve in keyed_curves])
+    evaluated_plugs = [get_plug(attr_names[column]) for column in evaluated]
+    evaluated_scales = numpy.array(
+        [get_plug_scale(plug) for plug in evaluated_plugs])
+
+    start_frame = int(start_frame)
+    end_frame = int(end_frame)
+    for chunk_start in range(start_frame, end_frame + 1, chunk_size):
+        frames = numpy.arange(chunk_start, min(
+            chunk_start + chunk_size, end_frame + 1))
+        values = numpy.empty((len(frames), len(attr_names)),
+                             dtype=numpy.float64)
+
+        if keyed:
+            values[:, keyed] = evaluate_curves(
+                keyed_curves, frames) * keyed_scales
+        if evaluated:
+            values[:, evaluated] = evaluate_plugs(
+                evaluated_plugs, frames) * evaluated_scales
+
+        yield frames, values
+
+
+def sample_attributes(attr_names, start_frame, end_frame):
+    """
+    Gets the values of several attributes on every frame between two frames (both included),
+    sweeping the timeline only once for all of them
+    Args:
+        attr_names (list): The full attribute names
+        start_frame (int): The first frame to sample
+        end_frame (int): The last frame to sample
+
+    Returns:
+        A numpy array of shape (frames, attributes), in the attributes' UI units
+    """
+    chunks = [values for _, values in iter_samples(
+        attr_names, start_frame, end_frame)]
+    if not chunks:
+        return numpy.empty((0, len(attr_names)), dtype=numpy.float64)
+    return numpy.concatenate(chunks)
+
+
+def sample_attribute(attr_name, start_frame, end_frame):
+    """
+    Gets the value of an attribute on every frame between two frames (both included)
+    Args:
+        attr_name (str): The full attribute name
+        start_frame (int): The first frame to sample
+        end_frame (int): The last frame to sample
+
+    Returns:
+        A numpy array with one value per frame, in the attribute's UI units
+    """
+    return sample_attributes([attr_name], start_frame, end_frame)[:, 0]
+
+
+def value_range(values):
+    """
+    Gets the min and max of sampled values
+    Args:
+        values (numpy.ndarray): The sampled values
+
+    Returns:
+        A tuple of the min and max values
+    """
+    return float(numpy.min(values)), float(numpy.max(values))
+
+
+def get_evaluator(attr_name):
+    """
+    Gets a function that evaluates an attribute on any frames, including subframes
+    Args:
+        attr_name (str): The full attribute name
+
+    Returns:
+        A function that takes a numpy array of frames and returns the values in the attribute's UI units
+    """
+    curve = get_anim_curve(attr_name)
+    if curve is not None:
+        scale = get_curve_scale(curve)
+        return lambda frames: evaluate_curves([curve], frames)[:, 0] * scale
+
+    plug = get_plug(attr_name)
+    scale = get_plug_scale(plug)
+    return lambda frames: evaluate_plugs([plug], frames)[:, 0] * scale
+
+
+def adaptive_value_range(attr_name, start_frame, end_frame, tolerance=0.01, subframe_step=1.0):
+    """
+    Gets the min and max value of an attribute between two frames, refining the samples only around the
+    extremes instead of evaluating every frame (see AdaptiveSampling.adaptive_extrema)
+    Args:
+        attr_name (str): The full attribute name
+        start_frame (float): The first frame
+        end_frame (float): The last frame
+        tolerance (float): How far (in the attribute's UI units) the extremes are allowed to be off
+        subframe_step (float): The smallest distance between two samples, eg: 0.25 to include motion blur samples
+
+    Returns:
+        The AdaptiveSampling.adaptive_extrema dict, its error is a bound for attributes driven by a single
+        curve and an estimate for everything else
+    """
+    # A curve gives its keys and the steepest it can get, everything else only its keys
+    curve = read_curve(attr_name)
+    if curve is not None:
+        key_times = curve.times
+        slope = CurveBounds.segment_slopes(curve)
+    else:
+        key_times = cmds.keyframe(attr_name, query=True)
+        slope = None
+
+    return AdaptiveSampling.adaptive_extrema(
+        get_evaluator(attr_name), start_frame, end_frame, tolerance=tolerance, subframe_step=subframe_step,
+        key_times=key_times, slope=slope)
+
+
+def get_unit_scales(curve_type):
+    """
+    Gets the factors that convert Maya's internal tangent units to UI units
+    Args:
+        curve_type (str): The node type of the animation curve, eg: 'animCurveTA'
+
+    Returns:
+        A tuple of the frames per second and the internal to UI value factor
+    """
+    frames_per_second = OpenMaya.MTime(1.0, OpenMaya.MTime.kSeconds).asUnits(
+        OpenMaya.MTime.uiUnit())
+
+    if curve_type == 'animCurveTA':
+        value_scale = OpenMaya.MAngle(1.0, OpenMaya.MAngle.kRadians).asUnits(
+            OpenMaya.MAngle.uiUnit())
+    elif curve_type == 'animCurveTL':
+        value_scale = OpenMaya.MDistance(1.0, OpenMaya.MDistance.kCentimeters).asUnits(
+            OpenMaya.MDistance.uiUnit())
+    else:
+        value_scale = 1.0
+
+    return frames_per_second, value_scale
+
+
+def get_steps(out_types):
+    # The CurveBounds step kinds of out tangent types
+    return numpy.array([
+        CurveBounds.STEP if out_type == 'step' else
+        CurveBounds.STEP_NEXT if out_type == 'stepnext' else
+        CurveBounds.STEP_NONE
+        for out_type in out_types
+    ], dtype=numpy.int8)
+
+
+def read_keys(curve, curve_type, index_range=None):
+    """
+    Reads the times, values and tangents of some or all keys of an animation curve with a few bulk queries
+    Args:
+        curve (str): The animation curve node
+        curve_type (str): The node type of the curve, eg: 'animCurveTA'
+        index_range (tuple): The first and last index of the keys to read, all keys are read if this isn't given
+
+    Returns:
+        A dict with numpy arrays of the 'times', 'values', 'in_angles', 'out_angles', 'in_weights' and
+        'out_weights' (None for non weighted curves) and 'steps' of the keys, and the 'slope_scale' and
+        'weight_scale' that CurveBounds.control_points needs for them
+    """
+    flags = {'index': tuple(index_range)} if index_range is not None else {}
+
+    # Get every key's time and value in one query, they come back interleaved
+    time_values = numpy.array(
+        cmds.keyframe(curve, query=True, timeChange=True, valueChange=True, **flags),
+        dtype=numpy.float64
+    )
+
+    steps = get_steps(cmds.keyTangent(curve, query=True, outTangentType=True, **flags))
+
+    # Maya measures tangents against time in seconds and values in internal units
+    frames_per_second, value_scale = get_unit_scales(curve_type)
+    weighted = cmds.keyTangent(curve, query=True, weightedTangents=True)[0]
+
+    return {
+        'times': time_values[0::2],
+        'values': time_values[1::2],
+        'in_angles': numpy.array(cmds.keyTangent(curve, query=True, inAngle=True, **flags), dtype=numpy.float64),
+        'out_angles': numpy.array(cmds.keyTangent(curve, query=True, outAngle=True, **flags), dtype=numpy.float64),
+        'in_weights': numpy.array(cmds.keyTangent(curve, query=True, inWeight=True, **flags),
+                                  dtype=numpy.float64) if weighted else None,
+        'out_weights': numpy.array(cmds.keyTangent(curve, query=True, outWeight=True, **flags),
+                                   dtype=numpy.float64) if weighted else None,
+        'steps': steps,
+        'slope_scale': value_scale / frames_per_second,
+        'weight_scale': (frames_per_second, value_scale),
+    }
+
+
+def read_curves(curves, curve_type):
+    """
+    Reads the keys of many animation curves of the same type with the queries read_keys uses for one curve
+    Args:
+        curves (list): The animation curve nodes
+        curve_type (str): The node type of the curves, eg: 'animCurveTA'
+
+    Returns:
+        A list with a read_keys dict per curve
+    """
+    if not curves:
+        return []
+
+    # The key indices start over at 0 on every curve, so they tell where the keys of each curve are
+    indices = numpy.array(cmds.keyframe(curves, query=True, indexValue=True), dtype=numpy.int64)
+    starts = numpy.flatnonzero(indices == 0)
+    if len(starts) != len(curves):
+        # A curve without keys, the keys can't be told apart
+        return [read_keys(curve, curve_type) for curve in curves]
+    ends = numpy.append(starts[1:], len(indices))
+
+    time_values = numpy.array(
+        cmds.keyframe(curves, query=True, timeChange=True, valueChange=True), dtype=numpy.float64)
+    in_angles = numpy.array(cmds.keyTangent(curves, query=True, inAngle=True), dtype=numpy.float64)
+    out_angles = numpy.array(cmds.keyTangent(curves, query=True, outAngle=True), dtype=numpy.float64)
+    steps = get_steps(cmds.keyTangent(curves, query=True, outTangentType=True))
+
+    weighted = cmds.keyTangent(curves, query=True, weightedTangents=True)
+    if any(weighted):
+        in_weights = numpy.array(cmds.keyTangent(curves, query=True, inWeight=True), dtype=numpy.float64)
+        out_weights = numpy.array(cmds.keyTangent(curves, query=True, outWeight=True), dtype=numpy.float64)
+
+    frames_per_second, value_scale = get_unit_scales(curve_type)
+    keys = []
+    for start, end, curve_weighted in zip(starts, ends, weighted):
+        keys.append({
+            'times': time_values[start * 2:end * 2:2],
+            'values': time_values[start * 2 + 1:end * 2:2],
+            'in_angles': in_angles[start:end],
+            'out_angles': out_angles[start:end],
+            'in_weights': in_weights[start:end] if curve_weighted else None,
+            'out_weights': out_weights[start:end] if curve_weighted else None,
+            'steps': steps[start:end],
+            'slope_scale': value_scale / frames_per_second,
+            'weight_scale': (frames_per_second, value_scale),
+        })
+    return keys
+
+
+def read_plugs(attr_names):
+    """
+    Reads the current values of many attributes through the API, instead of a getAttr per attribute
+    Args:
+        attr_names (list): The full attribute names
+
+    Returns:
+        A numpy array with the values in UI units (like getAttr)
+    """
+    selection = OpenMaya.MSelectionList()
+    for attr_name in attr_names:
+        selection.add(attr_name)
+
+    values = numpy.empty(len(attr_names), dtype=numpy.float64)
+    for index in range(len(attr_names)):
+        plug = OpenMaya.MPlug()
+        selection.getPlug(index, plug)
+        values[index] = plug.asDouble() * get_plug_scale(plug)
+    return values
+
+
+def get_single_curve(attr_name):
+    """
+    Gets the animation curve node that drives an attribute
+    Args:
+        attr_name (str): The full attribute name
+
+    Returns:
+        A tuple of the curve's name and node type, or None if the attribute isn't driven by a single
+        time based curve
+    """
+    curves = cmds.keyframe(attr_name, query=True, name=True)
+    if not curves or len(curves) != 1:
+        return None
+
+    curve_type = cmds.nodeType(curves[0])
+    if not curve_type.startswith('animCurveT'):
+        return None
+
+    return curves[0], curve_type
+
+
+def read_curve(attr_name):
+    """
+    Reads the keys and tangents of the curve driving an attribute with a few bulk queries
+    Args:
+        attr_name (str): The full attribute name
+
+    Returns:
+        A CurveBounds.CurveData, or None if the attribute isn't driven by a single time based curve
+    """
+    single_curve = get_single_curve(attr_name)
+    if single_curve is None:
+        return None
+
+    curve, curve_type = single_curve
+    keys = read_keys(curve, curve_type)
+    out_x, out_y, in_x, in_y = CurveBounds.control_points(
+        keys['times'], keys['values'], keys['in_angles'], keys['out_angles'],
+        in_weights=keys['in_weights'],
+        out_weights=keys['out_weights'],
+        slope_scale=keys['slope_scale'],
+        weight_scale=keys['weight_scale']
+    )
+
+    return CurveBounds.CurveData(
+        keys['times'], keys['values'], out_x, out_y, in_x, in_y, keys['steps'],
+        pre_infinity=cmds.getAttr(curve + '.preInfinity'),
+        post_infinity=cmds.getAttr(curve + '.postInfinity')
+    )
+
+
+class RunningExtrema(object):
+    """
+    Keeps the min and max values (and the frames they are on) of sampled columns while the samples stream
+    past, so the memory use doesn't depend on the length of the frame range. Every column can have its own
+    frame range, samples outside of it are ignored
+    Args:
+        count (int): The number of columns
+        start_frames (list): The first frame that counts for every column, all frames count if not given
+        end_frames (list): The last frame that counts for every column, all frames count if not given
+    """
+
+    def __init__(self, count, start_frames=None, end_frames=None):
+        self.min = numpy.full(count, numpy.inf)
+        self.max = numpy.full(count, -numpy.inf)
+        self.argmin = numpy.full(count, numpy.nan)
+        self.argmax = numpy.full(count, numpy.nan)
+        self.start_frames = numpy.full(count, -numpy.inf) if start_frames is None else numpy.asarray(
+            start_frames, dtype=numpy.float64)
+        self.end_frames = numpy.full(count, numpy.inf) if end_frames is None else numpy.asarray(
+            end_frames, dtype=numpy.float64)
+
+    def update(self, frames, values):
+        """
+        Adds a chunk of samples
+        Args:
+            frames (numpy.ndarray): The frames of the chunk, shape (frames,)
+            values (numpy.ndarray): The sampled values, shape (frames, columns)
+        """
+        frames = numpy.asarray(frames, dtype=numpy.float64)
+        if not len(frames):
+            return
+
+        inside = (frames[:, None] >= self.start_frames) & (
+            frames[:, None] <= self.end_frames)
+        columns = numpy.arange(values.shape[1])
+
+        low = numpy.where(inside, values, numpy.inf)
+        rows = numpy.argmin(low, axis=0)
+        # Only replace on strictly smaller values, so the first frame wins like it does with numpy.argmin
+        better = low[rows, columns] < self.min
+        self.min = numpy.where(better, low[rows, columns], self.min)
+        self.argmin = numpy.where(better, frames[rows], self.argmin)
+
+        high = numpy.where(inside, values, -numpy.inf)
+        rows = numpy.argmax(high, axis=0)
+        better = high[rows, columns] > self.max
+        self.max = numpy.where(better, high[rows, columns], self.max)
+        self.argmax = numpy.where(better, frames[rows], self.argmax)
+
+    def value_range(self, column):
+        # The min and max of one column, like value_range
+        return float(self.min[column]), float(self.max[column])
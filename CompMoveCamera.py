@@ -1,13 +1,205 @@
+import contextlib
 import math
+import os
+import numpy
 import maya.OpenMaya as OpenMaya  # pylint: disable=import-error
 import maya.OpenMayaAnim as OpenMayaAnim  # pylint: disable=import-error
 from maya import cmds  # pylint: disable=import-error
-import pprint
-PPrint = pprint.PrettyPrinter(width=10).pprint
+import sys
+import CameraResult
+import CameraSampling
+import CurveBounds
+import DeferredRun
+import FrustumSolver
+import LensDistortion
+import OverscanMath
+import ResultCache
+import RunReport
 
+# The columns of the per frame crop table, the window is in pixels of the new resolution
+CROP_TABLE_DTYPE = numpy.dtype([
+    ('frame', '<f4'),
+    ('left', '<f4'),
+    ('bottom', '<f4'),
+    ('right', '<f4'),
+    ('top', '<f4'),
+])
 
-class CompMoveCamera:
+
+class UndoChunk(object):
+    # Tells suspended_undo_chunk whether anything was written yet, the write code marks it after every write
     def __init__(self):
+        self.written = False
+
+    def mark(self):
+        self.written = True
+
+
+@contextlib.contextmanager
+def suspended_undo_chunk(name):
+    # Groups all the changes into one undo step and stops the viewport from refreshing after every change.
+    # If anything fails, the changes that were already made get undone. Undo is turned on for the chunk when
+    # it is off, so there is always something to undo them with.
+    # Maya only evaluates what is pulled (eg: by a refresh), so with the refresh suspended the writes don't
+    # trigger any evaluation. Pausing the evaluation manager would rebuild its graph and cost more than it saves.
+    # Yields an UndoChunk, a failure before its first write doesn't undo (the empty chunk isn't on the undo
+    # queue, so that would undo the artist's last change instead)
+    undo_enabled = cmds.undoInfo(query=True, state=True)
+    refresh_suspended = cmds.refresh(query=True, suspend=True)
+    chunk = UndoChunk()
+
+    if not undo_enabled:
+        cmds.undoInfo(state=True)
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    cmds.refresh(suspend=True)
+    try:
+        yield chunk
+    except Exception:
+        cmds.undoInfo(closeChunk=True)
+        if chunk.written:
+            cmds.undo()
+        raise
+    else:
+        cmds.undoInfo(closeChunk=True)
+    finally:
+        cmds.refresh(suspend=refresh_suspended)
+        if not undo_enabled:
+            cmds.undoInfo(state=False)
+
+
+def sample_value_ranges(keyed, chunk_size=CameraSampling.DEFAULT_CHUNK_SIZE):
+    # Samples every keyed attribute in a single sweep over the union of their frame ranges and stores
+    # the min and max values in each CompMoveCamera's value_ranges.
+    # keyed is a list of (CompMoveCamera, attribute name, keyframe range) tuples.
+    # The samples are reduced chunk by chunk, so the memory use doesn't depend on the length of the range
+    for _ in iter_sample_value_ranges(keyed, chunk_size):
+        pass
+
+
+def iter_sample_value_ranges(keyed, chunk_size=CameraSampling.DEFAULT_CHUNK_SIZE):
+    # The same as sample_value_ranges, but yields how much of the range is done (0 to 1) after every chunk,
+    # so the sampling can be spread over several idle events (see DeferredRun)
+    if not keyed:
+        return
+
+    start_frame = min(keyframe_range[0] for _, _, keyframe_range in keyed)
+    end_frame = max(keyframe_range[1] for _, _, keyframe_range in keyed)
+
+    # Only use the frames between each attribute's own min and max keyframes
+    extrema = CameraSampling.RunningExtrema(
+        len(keyed),
+        start_frames=[keyframe_range[0] for _, _, keyframe_range in keyed],
+        end_frames=[keyframe_range[1] for _, _, keyframe_range in keyed]
+    )
+
+    for frames, values in CameraSampling.iter_samples(
+            [attr_name for _, attr_name, _ in keyed], start_frame, end_frame, chunk_size):
+        extrema.update(frames, values)
+        yield float(frames[-1] - start_frame + 1) / (end_frame - start_frame + 1)
+
+    for column, (item, attr_name, _) in enumerate(keyed):
+        item.value_ranges[attr_name] = extrema.value_range(column)
+
+
+def merge_frame_ranges(frame_ranges):
+    # Merges overlapping and touching (start, end) frame ranges, so every frame is in exactly one range
+    merged = []
+    for start_frame, end_frame in sorted(frame_ranges):
+        if merged and start_frame <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_frame))
+        else:
+            merged.append((start_frame, end_frame))
+    return merged
+
+
+class CropTableWriter(object):
+    # Writes the crop table one chunk at a time.
+    # CSV files are for reading by hand, everything else is written as a compact binary .npy table
+    def __init__(self, path, length):
+        self.offset = 0
+        self.csv = path.lower().endswith('.csv')
+        if self.csv:
+            self.handle = open(path, 'w')
+            self.handle.write(','.join(CROP_TABLE_DTYPE.names) + '\n')
+        else:
+            self.table = numpy.lib.format.open_memmap(
+                path, mode='w+', dtype=CROP_TABLE_DTYPE, shape=(length,))
+
+    def write(self, rows):
+        if self.csv:
+            numpy.savetxt(self.handle, rows, fmt='%g', delimiter=',')
+        else:
+            self.table[self.offset:self.offset + len(rows)] = rows
+        self.offset += len(rows)
+
+    def close(self):
+        if self.csv:
+            self.handle.close()
+        else:
+            self.table.flush()
+            del self.table
+
+
+# Change this when the cached values change meaning, so old cache entries are ignored
+CACHE_VERSION = 1
+
+
+def get_default_cache():
+    # The cache that is shared by every run, stored in the user's Maya app directory
+    userAppDir = cmds.internalVar(userAppDir=True)
+    return ResultCache.ResultCache(os.path.join(userAppDir, 'CompMoveCamera', 'cache.json'))
+
+
+class CompMoveCamera:
+    def __init__(self, bounds='sampled', camera=None, solver='axis', chunk_size=CameraSampling.DEFAULT_CHUNK_SIZE, cache=None, tolerance=0.01, subframe_step=1.0, space='local', shots=False, distortion=None):
+        # How the min and max values of keyed attributes are found:
+        #   'sampled': evaluate every frame between the first and last keyframe
+        #   'analytic': solve the extremes of the curve segments from the keys and tangents
+        #   'adaptive': sample coarsely and only refine around the extremes, see AdaptiveSampling
+        self.bounds = bounds
+        # How far the adaptive extremes are allowed to be off, and the smallest step between adaptive samples
+        # (eg: 0.25 to include the subframes that motion blur samples)
+        self.tolerance = tolerance
+        self.subframe_step = subframe_step
+        # The AdaptiveSampling.adaptive_extrema result (with the error bound) of every adaptively sampled attribute
+        self.adaptive_results = {}
+        # How the new aperture is solved:
+        #   'axis': widen the field of view by the rotateX and rotateY spreads separately
+        #   'frustum': project the camera's frustum corners of every frame onto the locked camera's film back,
+        #              this also accounts for rotateZ and parent rotations
+        self.solver = solver
+        # Where the focal length and rotations are read from:
+        #   'local': the camera's own focalLength, rotateX and rotateY keys, unkeyed attributes are static
+        #   'world': the camera's evaluated world matrix and focal length on every frame of the playback range,
+        #            so parents, constraints, motion paths and expressions count too (bounds is not used then)
+        self.space = space
+        # The world focalLength, rotateX, rotateY and rotateZ values on the first frame of the 'world' space, and
+        # whether the camera's parents move over the shot (then the world rotation only stays locked on the frame
+        # the new values are written on)
+        self.world_values = None
+        self.world_parent_animated = False
+        # Also solve the overscan of every sequencer shot that looks through the camera, see solve_shots
+        self.shots = shots
+        # The overscan of every shot, see solve_shots
+        self.shot_results = []
+        # The lens distortion of the plate, a dict of the LensDistortion 'k1', 'k2', 'k3', 'p1' and 'p2'
+        # coefficients. Each one is a number or an attribute name, attributes are sampled on every frame of the
+        # frame range (eg: for a zoom lens). The aperture grows to cover the whole distorted plate
+        self.distortion = distortion
+        # How much the aperture grows to cover the distortion, see get_distortion_coverage
+        self.distortion_coverage = None
+        # How many frames are sampled at a time, this caps the memory use on very long frame ranges
+        self.chunk_size = chunk_size
+        # The camera to use, the first selected item is used if this isn't given
+        self.camera = camera
+        # Keyframe and value ranges per attribute, these can be filled in up front (see CompMoveCameraBatch)
+        self.keyframe_ranges = {}
+        self.value_ranges = {}
+        # A ResultCache with the sampled values of cameras that didn't change, True uses the default cache
+        self.cache = get_default_cache() if cache is True else cache
+        self.curves = {}
+        # The timings and command counts of the last run
+        self.report = None
         self.aperature = {}
         self.focal_length = {}
         self.resolution = {}
@@ -20,11 +212,300 @@ class CompMoveCamera:
         # This allows you to do stuff like: self[variable]
         return getattr(self, item)
 
+    def get_keyframe_range(self, attr_name):
+        # Get the min and max keyframes of the attribute, or None if it has no keyframes
+        if attr_name not in self.keyframe_ranges:
+            keyframes = cmds.keyframe(attr_name, query=True)
+            if keyframes:
+                self.keyframe_ranges[attr_name] = (
+                    int(min(keyframes)), int(max(keyframes)))
+            else:
+                self.keyframe_ranges[attr_name] = None
+
+        return self.keyframe_ranges[attr_name]
+
+    def get_static_value(self, attr_name):
+        # The value of an attribute that doesn't change, world space values were sampled already
+        if self.space == 'world' and self.world_values is not None:
+            return float(self.world_values[self.get_attr_names().index(attr_name)])
+        return cmds.getAttr(attr_name)
+
+    def get_value_range(self, attr_name, min_keyframe, max_keyframe):
+        # Use the values that were already sampled, if there are any
+        if attr_name in self.value_ranges:
+            return self.value_ranges[attr_name]
+
+        # Solve the exact extremes from the curve's keys and tangents, this scales with the number of keys
+        if self.bounds == 'analytic':
+            curve = self.get_curve(attr_name)
+            if curve is not None:
+                return CurveBounds.curve_bounds(curve)
+
+        if self.bounds == 'adaptive':
+            return self.get_adaptive_range(attr_name, (min_keyframe, max_keyframe))
+
+        # Sample every frame between the min and max keyframes in one go and get the min and max values
+        values = CameraSampling.sample_attribute(
+            attr_name, min_keyframe, max_keyframe)
+        return CameraSampling.value_range(values)
+
+    def get_adaptive_range(self, attr_name, keyframe_range):
+        # Sample only as much as needed to find the extremes within the tolerance
+        result = CameraSampling.adaptive_value_range(
+            attr_name, keyframe_range[0], keyframe_range[1], self.tolerance, self.subframe_step)
+        self.adaptive_results[attr_name] = result
+        return result['min'], result['max']
+
+    def get_curve(self, attr_name):
+        # Read the keys and tangents of the curve driving the attribute, only once per attribute
+        if attr_name not in self.curves:
+            self.curves[attr_name] = CameraSampling.read_curve(attr_name)
+        return self.curves[attr_name]
+
+    def get_cache_key(self):
+        # A fingerprint of everything the sampled values depend on, or None if an attribute is driven by
+        # something else than a curve (eg: a constraint) because then there's no way to tell if it changed
+        # World space values depend on the whole rig, there's no telling when those change
+        if self.space == 'world':
+            return None
+
+        parts = [CACHE_VERSION, self.bounds,
+                 self.aperature['original'], self.resolution['original']]
+        if self.bounds == 'adaptive':
+            parts.extend([self.tolerance, self.subframe_step])
+
+        for attr_name in self.get_attr_names():
+            if not self.get_keyframe_range(attr_name):
+                parts.append([attr_name])
+                continue
+
+            curve = self.get_curve(attr_name)
+            if curve is None:
+                return None
+
+            parts.append([attr_name, curve.pre_infinity, curve.post_infinity] + [
+                getattr(curve, column).tolist()
+                for column in ['times', 'values', 'out_x', 'out_y', 'in_x', 'in_y', 'steps']
+            ])
+
+        return ResultCache.fingerprint(parts)
+
+    def load_from_cache(self):
+        # Use the values of the last run if the camera didn't change since then
+        if self.cache is None:
+            return False
+
+        key = self.get_cache_key()
+        cached = self.cache.get(key) if key else None
+        if cached is None:
+            return False
+
+        for attr_name, keyframe_range in cached['keyframe_ranges'].items():
+            self.keyframe_ranges[attr_name] = tuple(
+                keyframe_range) if keyframe_range else None
+        for attr_name, value_range in cached['value_ranges'].items():
+            self.value_ranges[attr_name] = tuple(value_range)
+        return True
+
+    def save_to_cache(self):
+        # Remember the sampled values for the next run, cache.save() writes them to disk
+        if self.cache is None:
+            return
+
+        key = self.get_cache_key()
+        if key:
+            attr_names = self.get_attr_names()
+            self.cache.put(key, {
+                'keyframe_ranges': dict((attr_name, self.keyframe_ranges.get(attr_name)) for attr_name in attr_names),
+                'value_ranges': dict((attr_name, self.value_ranges[attr_name]) for attr_name in attr_names
+                                     if attr_name in self.value_ranges)
+            })
+
+    def get_attr_names(self):
+        # The attributes that are locked by this tool
+        return [
+            self.selected['shape'] + '.focalLength',
+            self.selected['camera'] + '.rotateX',
+            self.selected['camera'] + '.rotateY'
+        ]
+
+    def get_keyed_attributes(self):
+        # Get the keyed attributes whose min and max values still have to be sampled, as
+        # (CompMoveCamera, attribute name, keyframe range) tuples for sample_value_ranges
+        keyed = []
+        # World space values all come from one sweep over the world matrix, see iter_sample_world
+        if self.space == 'world':
+            return keyed
+
+        for attr_name in self.get_attr_names():
+            if attr_name in self.value_ranges:
+                continue
+
+            keyframe_range = self.get_keyframe_range(attr_name)
+            if not keyframe_range:
+                continue
+
+            # Analytic bounds don't need the timeline, unless the attribute isn't driven by a plain curve
+            if self.bounds == 'analytic':
+                curve = self.get_curve(attr_name)
+                if curve is not None:
+                    self.value_ranges[attr_name] = CurveBounds.curve_bounds(
+                        curve)
+                    continue
+
+            # Adaptive bounds refine every attribute on its own, so they don't share a timeline sweep either
+            if self.bounds == 'adaptive':
+                self.value_ranges[attr_name] = self.get_adaptive_range(
+                    attr_name, keyframe_range)
+                continue
+
+            keyed.append((self, attr_name, keyframe_range))
+
+        return keyed
+
+    def phase(self, name):
+        # Times a part of the run when there is a report to put it in
+        if self.report is None:
+            return RunReport.null_phase()
+        return self.report.phase(name)
+
     def get_all_values_we_need(self):
+        for _ in self.iter_all_values_we_need():
+            pass
+
+    def iter_all_values_we_need(self):
+        # The same as get_all_values_we_need, but yields the sampling progress (0 to 1) after every chunk
+        with self.phase('selection'):
+            self.get_selected_camera()
+
+        with self.phase('settings'):
+            self.get_apertures()
+            self.get_resolutions()
+
+        # Cameras that didn't change since the last run don't need to be sampled again
+        with self.phase('cache'):
+            cached = self.load_from_cache()
+
+        # Walk the timeline once for all the keyed attributes, instead of once per attribute
+        with self.phase('sampling'):
+            if self.space == 'world':
+                samples = self.iter_sample_world()
+            else:
+                samples = iter_sample_value_ranges(self.get_keyed_attributes(), self.chunk_size)
+            for progress in samples:
+                yield progress
+
+            # The focal lengths and rotations only read the sampled ranges (or the static values) now
+            self.get_focal_lengths()
+            self.get_rotations()
+
+        # A hit is already in the cache, putting it back would only make save rewrite the file
+        if not cached:
+            with self.phase('cache'):
+                self.save_to_cache()
+
+    def iter_sample_world(self):
+        # Sample the world matrix and the focal length on every frame in one sweep, and get the extents of the
+        # world rotations (in the camera's rotate order) from it. The samples are reduced chunk by chunk like
+        # the local space. Yields the progress (0 to 1) after every chunk
+        camera = self.selected['camera']
+        start_frame, end_frame = self.get_frame_range()
+        rotate_order = FrustumSolver.ROTATE_ORDERS[cmds.getAttr(
+            camera + '.rotateOrder')]
+
+        extrema = CameraSampling.RunningExtrema(4)
+        first_parent = None
+        previous = None
+        self.world_parent_animated = False
+        for frames, matrices, values in CameraSampling.iter_matrix_samples(
+                [camera + '.worldMatrix[0]', camera + '.parentMatrix[0]'], [self.selected['shape'] + '.focalLength'],
+                start_frame, end_frame, self.chunk_size):
+            values = self.get_world_values(matrices[:, 0], values[:, 0], rotate_order, previous)
+            previous = values[-1]
+            extrema.update(frames, values)
+
+            if first_parent is None:
+                first_parent = matrices[0, 1]
+                self.world_values = values[0]
+            if not numpy.allclose(matrices[:, 1], first_parent):
+                self.world_parent_animated = True
+
+            yield float(frames[-1] - start_frame + 1) / (end_frame - start_frame + 1)
+
+        # Only the attributes that change over the shot count as animated, the others are read as usual
+        for column, attr_name in enumerate(self.get_attr_names()):
+            value_range = extrema.value_range(column)
+            if value_range[0] != value_range[1]:
+                self.keyframe_ranges[attr_name] = (start_frame, end_frame)
+                self.value_ranges[attr_name] = value_range
+
+    @staticmethod
+    def get_world_values(matrices, focal_lengths, rotate_order, previous=None):
+        # The world focalLength, rotateX, rotateY and rotateZ values (frames, 4) of a chunk of world matrices.
+        # The angles are unwrapped from the last values of the previous chunk, so a camera that turns past
+        # 180 degrees doesn't jump to -180
+        rotations, _ = FrustumSolver.split_matrices(matrices)
+        angles = numpy.radians(FrustumSolver.matrix_to_euler(rotations, rotate_order))
+        if previous is None:
+            angles = numpy.unwrap(angles, axis=0)
+        else:
+            angles = numpy.unwrap(numpy.vstack([numpy.radians(previous[1:]), angles]), axis=0)[1:]
+        return numpy.column_stack([focal_lengths, numpy.degrees(angles)])
+
+    def iter_world_samples(self, start_frame, end_frame):
+        # The world space samples between two frames (both included) a chunk at a time, like
+        # CameraSampling.iter_matrix_samples: the frames, the world matrices and the world values
+        camera = self.selected['camera']
+        rotate_order = FrustumSolver.ROTATE_ORDERS[cmds.getAttr(
+            camera + '.rotateOrder')]
+
+        previous = None
+        for frames, matrices, values in CameraSampling.iter_matrix_samples(
+                [camera + '.worldMatrix[0]'], [self.selected['shape'] + '.focalLength'],
+                start_frame, end_frame, self.chunk_size):
+            values = self.get_world_values(matrices[:, 0], values[:, 0], rotate_order, previous)
+            previous = values[-1]
+            yield frames, matrices[:, 0], values
+
+    def get_local_rotations(self):
+        # The local rotateX, rotateY and rotateZ that lock the camera's world rotation to the world rotation
+        # averages (keeping its world rotateZ) on the current frame. The locked world rotation is taken out of
+        # the parents' rotation on that frame and decomposed in the camera's rotate order
+        camera = self.selected['camera']
+        rotate_order = FrustumSolver.ROTATE_ORDERS[cmds.getAttr(
+            camera + '.rotateOrder')]
+        frame = cmds.currentTime(query=True)
+
+        matrices, _ = CameraSampling.evaluate_matrices(
+            [CameraSampling.get_plug(camera + '.worldMatrix[0]'), CameraSampling.get_plug(camera + '.parentMatrix[0]')],
+            [], [frame])
+        rotations, _ = FrustumSolver.split_matrices(matrices[0])
+        world_rotate_z = FrustumSolver.matrix_to_euler(rotations[0], rotate_order)[2]
+
+        # Maya's matrices are row vectors, world = local * parent, so local = world * parent^-1
+        locked_rotation = FrustumSolver.euler_to_matrix(
+            self.X['rotation']['rotation_average'],
+            self.Y['rotation']['rotation_average'],
+            world_rotate_z,
+            rotate_order
+        )
+        local_rotation = numpy.matmul(locked_rotation, rotations[1].T)
+        rotate_x, rotate_y, rotate_z = FrustumSolver.matrix_to_euler(local_rotation, rotate_order)
+
+        if self.world_parent_animated:
+            print("WARNING: The parents of {} move over the shot, its world rotation is only locked on frame {}".format(
+                camera, frame))
+
+        return {'X': float(rotate_x), 'Y': float(rotate_y), 'Z': float(rotate_z)}
+
+    def get_selected_camera(self):
         # region Get the selected camera object
 
         # Get camera object
-        selected_items = cmds.ls(sl=True, long=True)
+        if self.camera:
+            selected_items = [self.camera]
+        else:
+            selected_items = cmds.ls(sl=True, long=True)
 
         # Check if no items are selected
         if not selected_items:
@@ -33,7 +514,8 @@ class CompMoveCamera:
             raise ValueError(error)
 
         # Get camera shapes
-        shapes = cmds.listRelatives(selected_items[0], shapes=True)
+        shapes = cmds.listRelatives(
+            selected_items[0], shapes=True, fullPath=True)
 
         # Check if no shapes are attached
         if not shapes:
@@ -49,29 +531,20 @@ class CompMoveCamera:
 
         # endregion
 
+    def get_focal_lengths(self):
         # region Get the focal lengths
 
         # Set shape name
         shape_name = self.selected['shape'] + '.focalLength'
 
         # Get the max and min keyframes of the attribute
-        keyframes = cmds.keyframe(shape_name, query=True)
-        if keyframes:
-            min_keyframe = int(min(keyframes))
-            max_keyframe = int(max(keyframes))
-
-            # Reset the min and max variables to a value that will be replaced immediately (we will use it below to hold the min and max values)
-            max_focal_length = -9999999999
-            min_focal_length = 9999999999
-
-            # Loop through every frame between the min and max keyframes
-            for frame in range(min_keyframe, max_keyframe):
-                # Get the max value of the focal length
-                value = cmds.getAttr(shape_name, time=frame)
-                if value > max_focal_length:
-                    max_focal_length = value
-                if value < min_focal_length:
-                    min_focal_length = value
+        keyframe_range = self.get_keyframe_range(shape_name)
+        if keyframe_range:
+            min_keyframe, max_keyframe = keyframe_range
+
+            # Get the min and max values of the focal length
+            min_focal_length, max_focal_length = self.get_value_range(
+                shape_name, min_keyframe, max_keyframe)
 
             # Save everything to self for later use
             self.focal_length = {
@@ -90,7 +563,7 @@ class CompMoveCamera:
             }
         else:
             # Get the current focal length
-            focal_length = cmds.getAttr(shape_name)
+            focal_length = self.get_static_value(shape_name)
 
             # Save everything to self for later use
             self.focal_length = {
@@ -104,8 +577,9 @@ class CompMoveCamera:
                 }
             }
 
-            # endregion
+        # endregion
 
+    def get_rotations(self):
         # region Get rotation averages
 
         attr_name_base = self.selected['camera'] + '.rotate'
@@ -116,11 +590,11 @@ class CompMoveCamera:
             attr_name = attr_name_base + axis
 
             # Get the max and min keyframes of the attribute
-            keyframes = cmds.keyframe(attr_name, query=True)
+            keyframe_range = self.get_keyframe_range(attr_name)
 
             # If there are no keyframes, just return the average data
-            if not keyframes:
-                rotation_average = cmds.getAttr(attr_name)
+            if not keyframe_range:
+                rotation_average = self.get_static_value(attr_name)
 
                 # Field of angle increase (it is the triangle shape in the Word Reference document)
                 field_of_angle_in_radians = math.radians(rotation_average)
@@ -134,22 +608,11 @@ class CompMoveCamera:
                 }
                 continue
 
-            min_keyframe = int(min(keyframes))
-            max_keyframe = int(max(keyframes))
+            min_keyframe, max_keyframe = keyframe_range
 
-            # Reset the min and max variables to a value that will be replaced immediately (we will use it below to hold the min and max values)
-            max_value = -9999999999
-            min_value = 9999999999
-
-            # Loop through every frame between the min and max keyframes
-            for frame in range(min_keyframe, max_keyframe):
-
-                # Get the min and max values of the attribute
-                value = cmds.getAttr(attr_name, time=frame)
-                if value > max_value:
-                    max_value = value
-                if value < min_value:
-                    min_value = value
+            # Get the min and max values of the attribute
+            min_value, max_value = self.get_value_range(
+                attr_name, min_keyframe, max_keyframe)
 
             # Get the rotation average
             rotation_average = (max_value + min_value) / 2
@@ -175,6 +638,7 @@ class CompMoveCamera:
             }
         # endregion
 
+    def get_apertures(self):
         # region Get the camera aperatures
 
         # Save everything to self for later use
@@ -194,7 +658,13 @@ class CompMoveCamera:
         }
         # endregion
 
+    def get_resolutions(self):
         # region Get the current resolutions
+
+        # The resolution is shared by all cameras, it might have been read already (see CompMoveCameraBatch)
+        if 'original' in self.resolution:
+            return
+
         resolution_height = cmds.getAttr(
             'defaultResolution.height'
         )
@@ -211,48 +681,203 @@ class CompMoveCamera:
         }
         # endregion
 
+    def get_distortion_coefficients(self, frame=None):
+        # The distortion coefficients, attributes are sampled on every frame of the frame range (or read on
+        # one frame if it is given) in one sweep
+        attr_names = sorted(set(value for value in self.distortion.values() if isinstance(value, str)))
+        if frame is not None:
+            sampled = dict((attr_name, cmds.getAttr(attr_name, time=frame)) for attr_name in attr_names)
+        elif attr_names:
+            start_frame, end_frame = self.get_frame_range()
+            values = CameraSampling.sample_attributes(attr_names, start_frame, end_frame)
+            sampled = dict((attr_name, values[:, column]) for column, attr_name in enumerate(attr_names))
+        else:
+            sampled = {}
+
+        return dict((name, sampled.get(value, value)) for name, value in self.distortion.items())
+
+    def get_distortion_coverage(self):
+        # How many times wider and taller the aperture has to be to cover the distorted plate on every frame,
+        # solved on a grid as dense as the render resolution. It never shrinks, so pincushion distortion
+        # (which only pulls the plate in) and no distortion both give 1
+        if self.distortion_coverage is None:
+            self.distortion_coverage = {'height': 1.0, 'width': 1.0}
+            if self.distortion:
+                coverage = LensDistortion.coverage(
+                    self.aperature['original']['width'],
+                    self.aperature['original']['height'],
+                    self.get_distortion_coefficients(),
+                    columns=int(self.resolution['original']['width']),
+                    rows=int(self.resolution['original']['height'])
+                )
+                self.distortion_coverage = {
+                    'height': max(1.0, coverage['height']),
+                    'width': max(1.0, coverage['width'])
+                }
+        return self.distortion_coverage
+
+    def get_covered_aperture(self):
+        # The aperture the camera needs to see the whole distorted plate, the original one without distortion
+        coverage = self.get_distortion_coverage()
+        return {
+            'height': self.aperature['original']['height'] * coverage['height'],
+            'width': self.aperature['original']['width'] * coverage['width']
+        }
+
     def do_the_math(self):
+        for _ in self.iter_the_math():
+            pass
+
+    def iter_the_math(self):
+        # The same as do_the_math, but yields the progress (0 to 1) of the frustum solver after every chunk
         focal_min = self.focal_length['value_inches']['min']
         focal_max = self.focal_length['value_inches']['min']
 
-        xHeight = self.aperature['original']['height'] / (focal_min * 2)
-        yWidth = self.aperature['original']['width'] / (focal_min * 2)
-
-        self.X['original_field_of_view'] = math.atan(xHeight)
-        self.Y['original_field_of_view'] = math.atan(yWidth)
+        # Start from the aperture that covers the distorted plate, the resolution grows by the same amount
+        aperture = self.get_covered_aperture()
+        coverage = self.get_distortion_coverage()
+        result = OverscanMath.solve_overscan(
+            focal_min,
+            focal_max,
+            self.X['rotation']['field_of_angle_in_radians'],
+            self.Y['rotation']['field_of_angle_in_radians'],
+            aperture['height'],
+            aperture['width'],
+            self.resolution['original']['height'] * coverage['height'],
+            self.resolution['original']['width'] * coverage['width']
+        )
 
-        xTan = self.X['original_field_of_view'] + \
-            self.X['rotation']['field_of_angle_in_radians']
-        yTan = self.Y['original_field_of_view'] + \
-            self.Y['rotation']['field_of_angle_in_radians']
+        self.X['original_field_of_view'] = float(result['field_of_view_x'])
+        self.Y['original_field_of_view'] = float(result['field_of_view_y'])
 
         self.aperature['new'] = {}
-        self.aperature['new']['height'] = (2 * focal_max) * math.tan(xTan)
-        self.aperature['new']['width'] = (2 * focal_max) * math.tan(yTan)
-
-        temp_height = self.aperature['new']['height'] / \
-            self.aperature['original']['height']
-        temp_width = self.aperature['new']['width'] / \
-            self.aperature['original']['width']
+        self.aperature['new']['height'] = float(result['aperture_height'])
+        self.aperature['new']['width'] = float(result['aperture_width'])
 
         self.resolution['new'] = {}
-        self.resolution['new']['height'] = self.resolution['original']['height'] * temp_height
-        self.resolution['new']['width'] = self.resolution['original']['width'] * temp_width
+        self.resolution['new']['height'] = float(result['resolution_height'])
+        self.resolution['new']['width'] = float(result['resolution_width'])
+
+        if self.solver == 'frustum':
+            for progress in self.iter_solve_frustum():
+                yield progress
+
+    def solve_frustum(self):
+        for _ in self.iter_solve_frustum():
+            pass
+
+    def iter_solve_frustum(self):
+        start_frame, end_frame = self.get_frame_range()
+
+        # Sample the camera over the shot one chunk at a time and keep the biggest aperture
+        aperture = self.get_covered_aperture()
+        aperture_height = 0.0
+        aperture_width = 0.0
+        for frames, rotations, focal_lengths, locked_rotations in self.iter_frustum_samples(start_frame, end_frame):
+            result = FrustumSolver.solve_frustum_coverage(
+                rotations,
+                focal_lengths / OverscanMath.MILLIMETERS_PER_INCH,
+                aperture['width'],
+                aperture['height'],
+                locked_rotations,
+                self.focal_length['value_inches']['min']
+            )
+            aperture_height = max(aperture_height, result['aperture_height'])
+            aperture_width = max(aperture_width, result['aperture_width'])
+            yield float(frames[-1] - start_frame + 1) / (end_frame - start_frame + 1)
+
+        self.aperature['new'] = {
+            'height': aperture_height,
+            'width': aperture_width
+        }
+
+        # The resolution grows by the same amount as the aperture
+        self.resolution['new'] = {
+            'height': self.resolution['original']['height'] * aperture_height / self.aperature['original']['height'],
+            'width': self.resolution['original']['width'] * aperture_width / self.aperature['original']['width']
+        }
+
+    def iter_frustum_samples(self, start_frame, end_frame):
+        # The world rotations and focal lengths of the camera, and the world rotations of the locked camera,
+        # one chunk of frames at a time
+        camera = self.selected['camera']
+        rotate_order = FrustumSolver.ROTATE_ORDERS[cmds.getAttr(
+            camera + '.rotateOrder')]
+        average_x = self.X['rotation']['rotation_average']
+        average_y = self.Y['rotation']['rotation_average']
+
+        # The world space averages are world rotations already, the locked camera only keeps the world rotateZ
+        if self.space == 'world':
+            for frames, matrices, values in self.iter_world_samples(start_frame, end_frame):
+                rotations, _ = FrustumSolver.split_matrices(matrices)
+                locked_rotations = FrustumSolver.euler_to_matrix(average_x, average_y, values[:, 3], rotate_order)
+                yield frames, rotations, values[:, 0], locked_rotations
+            return
+
+        # The locked camera keeps its parent and rotateZ, but rotateX and rotateY are set to their averages.
+        # Its translation keys are kept too, so only the rotations matter.
+        # The matrices come through the same time context as the values, in one sweep over the shot
+        for frames, matrices, values in CameraSampling.iter_matrix_samples(
+                [camera + '.worldMatrix[0]', camera + '.parentMatrix[0]'],
+                [self.selected['shape'] + '.focalLength', camera + '.rotateZ'],
+                start_frame, end_frame, self.chunk_size):
+            rotations, _ = FrustumSolver.split_matrices(matrices[:, 0])
+            parent_rotations, _ = FrustumSolver.split_matrices(matrices[:, 1])
+            locked_rotations = numpy.matmul(
+                FrustumSolver.euler_to_matrix(average_x, average_y, values[:, 1], rotate_order),
+                parent_rotations
+            )
+            yield frames, rotations, values[:, 0], locked_rotations
 
     def set_all_the_new_values(self):
-        # region Set the focal length to the max focal length
+        # Apply everything as one undoable change, without redrawing the viewport in between
+        with suspended_undo_chunk('CompMoveCamera') as chunk:
+            # Set the new values on the camera itself
+            self.set_the_new_camera_values(chunk)
 
-        # If there are keyframes on the focalLength, then delete all keyframes. Otherwise just leave the current keyframe alone
+            # Set the new render settings
+            self.set_the_new_render_values(chunk)
+
+    def is_settable(self, attr_name):
+        # World space values can be driven by a constraint or an expression, those attributes can't be set
+        if self.space == 'world' and not cmds.getAttr(attr_name, settable=True):
+            print("WARNING: {} is driven by something else, it is left alone".format(attr_name))
+            return False
+        return True
+
+    def set_the_new_camera_values(self, chunk=None):
+        # Every write marks the chunk (see suspended_undo_chunk)
+        chunk = chunk or UndoChunk()
+
+        # The world space averages are world angles, they are turned into local ones before anything changes
+        local_rotations = self.get_local_rotations() if self.space == 'world' else None
+
+        # region Delete the keyframes of everything that gets locked
+
+        # Only attributes with keyframes get their keys deleted. Otherwise just leave the current value alone
         if 'keyframes' in self.focal_length:
-            # Delete all the camera's focal length keys
             cmds.cutKey(
                 self.selected['shape'],
-                time=(self.focal_length['keyframes']['min'],
-                      self.focal_length['keyframes']['max']),
                 attribute='focalLength',
                 option="keys"
             )
+            chunk.mark()
+
+        keyed_axes = [
+            'rotate' + axis for axis in ['X', 'Y'] if 'keyframes' in self[axis]['rotation']]
+        if keyed_axes:
+            # Delete the keys of all the rotation axes in one go
+            cmds.cutKey(
+                self.selected['camera'],
+                attribute=keyed_axes,
+                option="keys"
+            )
+            chunk.mark()
+
+        # endregion
 
+        # region Set the focal length to the max focal length
+        if 'keyframes' in self.focal_length and self.is_settable(self.selected['shape'] + '.focalLength'):
             # Round the value up
             max_value_rounded_up = math.ceil(
                 self.focal_length['value_inches']['max'])
@@ -262,43 +887,54 @@ class CompMoveCamera:
                 self.selected['shape'] +
                 '.focalLength', max_value_rounded_up
             )
+            chunk.mark()
         # endregion
 
         # region Set the camera's rotation to the rotation averages
-
         for axis in ['X', 'Y']:
-            # If there are keyframes on the rotation, then delete all keyframes. Otherwise just leave the current keyframe alone
-            if 'keyframes' in self[axis]['rotation']:
-                cmds.cutKey(
-                    self.selected['camera'],
-                    time=(self[axis]['rotation']['keyframes']['min'],
-                          self[axis]['rotation']['keyframes']['max']),
-                    attribute='rotate' + axis,
-                    option="keys"
-                )
+            if not self.is_settable(self[axis]['rotation']['attr_name']):
+                continue
 
-            # Set the new rotation average
-            cmds.setAttr(self[axis]['rotation']['attr_name'],
-                         self[axis]['rotation']['rotation_average'])
+            if local_rotations is None:
+                cmds.setAttr(self[axis]['rotation']['attr_name'],
+                             self[axis]['rotation']['rotation_average'])
+            else:
+                cmds.setAttr(self[axis]['rotation']['attr_name'], local_rotations[axis])
+            chunk.mark()
 
+        # Under a rotated parent the locked rotation can need a different local rotateZ too. A keyed rotateZ
+        # keeps its keys, like in the local space
+        attr_name = self.selected['camera'] + '.rotateZ'
+        if local_rotations is not None and \
+                abs(local_rotations['Z'] - cmds.getAttr(attr_name)) > 1e-6 and self.is_settable(attr_name):
+            if cmds.keyframe(attr_name, query=True, keyframeCount=True):
+                print("WARNING: {} is keyed, it is left alone so the world rotation isn't exactly locked".format(
+                    attr_name))
+            else:
+                cmds.setAttr(attr_name, local_rotations['Z'])
+                chunk.mark()
         # endregion
 
-        # region Set the camera's new apetures
+        # region Set the camera's new apetures (both in one go through the compound attribute)
         cmds.setAttr(
-            self.selected['shape'] + '.verticalFilmAperture',
-            round(self.aperature['new']['height'], 2)
-        )
-        cmds.setAttr(
-            self.selected['shape'] + '.horizontalFilmAperture',
-            round(self.aperature['new']['width'], 2)
+            self.selected['shape'] + '.cameraAperture',
+            round(self.aperature['new']['width'], 2),
+            round(self.aperature['new']['height'], 2),
+            type='double2'
         )
+        chunk.mark()
         # endregion
 
+    def set_the_new_render_values(self, chunk=None):
+        # Every write marks the chunk (see suspended_undo_chunk)
+        chunk = chunk or UndoChunk()
+
         # region Set the new render resolutions
         cmds.setAttr(
             'defaultResolution.height',
             round(self.resolution['new']['height'])
         )
+        chunk.mark()
         cmds.setAttr(
             'defaultResolution.width',
             round(self.resolution['new']['width'])
@@ -308,15 +944,485 @@ class CompMoveCamera:
         # Make sure pixel aspect ratio is 1
         cmds.setAttr('defaultResolution.pixelAspect', 1.000)
 
-    def run(self):
+    def get_frame_range(self):
+        # The union of the keyframe ranges of the focal length and rotations
+        keyframe_ranges = [self.get_keyframe_range(
+            attr_name) for attr_name in self.get_attr_names()]
+        keyframe_ranges = [
+            keyframe_range for keyframe_range in keyframe_ranges if keyframe_range]
+
+        # Use the playback range if nothing is keyed, world space values can change on any frame
+        if not keyframe_ranges or self.space == 'world':
+            return (int(cmds.playbackOptions(query=True, minTime=True)),
+                    int(cmds.playbackOptions(query=True, maxTime=True)))
+
+        return (min(keyframe_range[0] for keyframe_range in keyframe_ranges),
+                max(keyframe_range[1] for keyframe_range in keyframe_ranges))
+
+    def get_shots(self):
+        # The sequencer shots that look through the camera, as dicts with their frame range and resolution
+        # The camera can be given by its short name, the shots always give back long ones
+        cameras = cmds.ls([self.selected['camera'], self.selected['shape']], long=True) or []
+        shots = []
+        for shot in cmds.ls(type='shot') or []:
+            shot_camera = cmds.shot(shot, query=True, currentCamera=True)
+            if not shot_camera or cmds.ls(shot_camera, long=True)[0] not in cameras:
+                continue
+
+            shots.append({
+                'shot': shot,
+                'start_frame': int(cmds.getAttr(shot + '.startFrame')),
+                'end_frame': int(cmds.getAttr(shot + '.endFrame')),
+                'resolution': {
+                    'height': cmds.getAttr(shot + '.hResolution'),
+                    'width': cmds.getAttr(shot + '.wResolution')
+                }
+            })
+        return shots
+
+    def sample_frame_ranges(self, frame_ranges):
+        # The focalLength, rotateX and rotateY values on every frame of some frame ranges, sampling every frame
+        # only once even when the ranges overlap. Returns the frames and a (frames, 3) array
+        camera = self.selected['camera']
+        chunks = []
+        for start_frame, end_frame in merge_frame_ranges(frame_ranges):
+            if self.space == 'world':
+                rotate_order = FrustumSolver.ROTATE_ORDERS[cmds.getAttr(camera + '.rotateOrder')]
+                for frames, matrices, values in CameraSampling.iter_matrix_samples(
+                        [camera + '.worldMatrix[0]'], [self.selected['shape'] + '.focalLength'],
+                        start_frame, end_frame, self.chunk_size):
+                    rotations, _ = FrustumSolver.split_matrices(matrices[:, 0])
+                    angles = FrustumSolver.matrix_to_euler(rotations, rotate_order)
+                    chunks.append((frames, numpy.column_stack([values[:, 0], angles[:, :2]])))
+            else:
+                chunks.extend(CameraSampling.iter_samples(
+                    self.get_attr_names(), start_frame, end_frame, self.chunk_size))
+
+        frames = numpy.concatenate([frames for frames, _ in chunks])
+        values = numpy.concatenate([values for _, values in chunks])
+        if self.space == 'world':
+            # Unwrap the angles like iter_sample_world, a camera that turns past 180 degrees doesn't jump
+            values[:, 1:] = numpy.degrees(numpy.unwrap(numpy.radians(values[:, 1:]), axis=0))
+        return frames, values
+
+    def solve_shots(self):
+        # Solve the overscan of every shot that looks through the camera, each over its own frame range and
+        # with its own resolution. The camera is sampled once over all the shots and the samples are split
+        # per shot. This needs the values of get_all_values_we_need, the shots are solved like the 'axis' solver
+        shots = self.get_shots()
+        self.shot_results = []
+        if not shots:
+            return self.shot_results
+
+        frames, values = self.sample_frame_ranges(
+            [(shot['start_frame'], shot['end_frame']) for shot in shots])
+
+        # The min and max of every attribute in every shot, shape (shots, 3)
+        minimums = numpy.empty((len(shots), 3))
+        maximums = numpy.empty((len(shots), 3))
+        for row, shot in enumerate(shots):
+            first = numpy.searchsorted(frames, shot['start_frame'], side='left')
+            last = numpy.searchsorted(frames, shot['end_frame'], side='right')
+            minimums[row] = values[first:last].min(axis=0)
+            maximums[row] = values[first:last].max(axis=0)
+
+        # Attributes that don't change keep the values of the whole camera, like get_focal_lengths and get_rotations
+        focal_min = minimums[:, 0] / OverscanMath.MILLIMETERS_PER_INCH
+        if 'keyframes' not in self.focal_length:
+            focal_min[:] = self.focal_length['value_inches']['min']
+
+        spreads = []
+        for column, axis in [(1, 'X'), (2, 'Y')]:
+            if 'keyframes' in self[axis]['rotation']:
+                spreads.append(OverscanMath.rotation_spread(minimums[:, column], maximums[:, column])[1])
+            else:
+                spreads.append(numpy.full(len(shots), self[axis]['rotation']['field_of_angle_in_radians']))
+
+        aperture = self.get_covered_aperture()
+        coverage = self.get_distortion_coverage()
+        result = OverscanMath.solve_overscan(
+            focal_min,
+            focal_min,
+            spreads[0],
+            spreads[1],
+            aperture['height'],
+            aperture['width'],
+            numpy.array([shot['resolution']['height'] for shot in shots], dtype=numpy.float64) * coverage['height'],
+            numpy.array([shot['resolution']['width'] for shot in shots], dtype=numpy.float64) * coverage['width']
+        )
+
+        for row, shot in enumerate(shots):
+            self.shot_results.append(dict(shot, **{
+                'focal_length': {'min': float(minimums[row, 0]), 'max': float(maximums[row, 0])},
+                'rotate_x': {'min': float(minimums[row, 1]), 'max': float(maximums[row, 1])},
+                'rotate_y': {'min': float(minimums[row, 2]), 'max': float(maximums[row, 2])},
+                'new_aperture': {
+                    'height': float(result['aperture_height'][row]),
+                    'width': float(result['aperture_width'][row])
+                },
+                'new_resolution': {
+                    'height': float(result['resolution_height'][row]),
+                    'width': float(result['resolution_width'][row])
+                }
+            }))
+        return self.shot_results
+
+    def export_crop_table(self, path, start_frame=None, end_frame=None):
+        # This needs the new aperture, so it has to run after do_the_math
+        if 'new' not in self.aperature:
+            error = "ERROR: The new aperture hasn't been calculated yet"
+            print(error)
+            raise ValueError(error)
+
+        if start_frame is None or end_frame is None:
+            start_frame, end_frame = self.get_frame_range()
+
+        # Sample the original focal length and rotations in one sweep, writing the table one chunk at a time
+        if self.space == 'world':
+            samples = ((frames, values) for frames, _, values in self.iter_world_samples(start_frame, end_frame))
+        else:
+            samples = CameraSampling.iter_samples(
+                self.get_attr_names(), start_frame, end_frame, self.chunk_size)
+
+        aperture = self.get_covered_aperture()
+        writer = CropTableWriter(path, end_frame - start_frame + 1)
+        try:
+            for frames, values in samples:
+                windows = OverscanMath.crop_windows(
+                    values[:, 0] / OverscanMath.MILLIMETERS_PER_INCH,
+                    values[:, 1],
+                    values[:, 2],
+                    self.X['rotation']['rotation_average'],
+                    self.Y['rotation']['rotation_average'],
+                    aperture['height'],
+                    aperture['width'],
+                    self.focal_length['value_inches']['min'],
+                    self.aperature['new']['height'],
+                    self.aperature['new']['width']
+                )
+
+                rows = numpy.empty(len(frames), dtype=CROP_TABLE_DTYPE)
+                rows['frame'] = frames
+                rows['left'] = windows['left'] * self.resolution['new']['width']
+                rows['right'] = windows['right'] * self.resolution['new']['width']
+                rows['bottom'] = windows['bottom'] * self.resolution['new']['height']
+                rows['top'] = windows['top'] * self.resolution['new']['height']
+                writer.write(rows)
+        finally:
+            writer.close()
+
+    def export_st_map(self, path, frame=None):
+        """
+        Writes the ST-map that undistorts the plate: every pixel of the plate (at the original resolution) holds
+        where it lands on the covered aperture (see get_covered_aperture), from 0 to 1 across it.
+        See LensDistortion.write_st_map for the file layout
+        Args:
+            path (str): The .npy file to write
+            frame (float): The frame to read the distortion attributes on, the current frame if this isn't given
+        """
+        if not self.distortion:
+            error = "ERROR: The camera has no distortion to write an ST-map of"
+            print(error)
+            raise ValueError(error)
+
+        if frame is None:
+            frame = cmds.currentTime(query=True)
+
+        aperture = self.get_covered_aperture()
+        LensDistortion.write_st_map(
+            path,
+            self.aperature['original']['width'],
+            self.aperature['original']['height'],
+            aperture['width'],
+            aperture['height'],
+            self.get_distortion_coefficients(frame),
+            int(self.resolution['original']['width']),
+            int(self.resolution['original']['height'])
+        )
+
+    def get_values(self):
+        # All the values that were read and computed, for the report
+        return {
+            'selected': self.selected,
+            'focal_length': self.focal_length,
+            'X': self.X,
+            'Y': self.Y,
+            'aperature': self.aperature,
+            'resolution': self.resolution,
+            'shots': self.shot_results,
+            'distortion_coverage': self.distortion_coverage
+        }
+
+    def get_result(self):
+        # A compact copy of the values, see CameraResult
+        return CameraResult.CameraResult.from_camera(self)
+
+    def iter_run(self, crop_table_path=None, st_map_path=None):
+        # Everything run does before it writes anything, as (step, progress) pairs
         # This gets all the values we need and stores it in the class's self
-        self.get_all_values_we_need()
+        for progress in self.iter_all_values_we_need():
+            yield 'sampling', progress
 
         # Does all the complicated math using the variables from the class's self
-        self.do_the_math()
+        with self.phase('math'):
+            for progress in self.iter_the_math():
+                yield 'math', progress
+
+        # Solve every sequencer shot that looks through the camera on its own
+        if self.shots:
+            with self.phase('shots'):
+                self.solve_shots()
+                yield 'shots', 1.0
 
+        # Write out which part of the new aperture is used on every frame (before the keys get removed)
+        if crop_table_path:
+            with self.phase('crop_table'):
+                self.export_crop_table(crop_table_path)
+                yield 'crop_table', 1.0
+
+        # Write out the ST-map that undistorts the plate onto the covered aperture
+        if st_map_path:
+            with self.phase('st_map'):
+                self.export_st_map(st_map_path)
+                yield 'st_map', 1.0
+
+    def write_results(self):
         # Set all the new values in Maya
-        self.set_all_the_new_values()
+        with self.phase('writes'):
+            self.set_all_the_new_values()
+
+    def finish_run(self, verbosity=1):
+        if self.cache is not None:
+            self.cache.save()
 
-        # Print all values
-        PPrint(vars(self))
+        # Print the report (0: nothing, 1: compact summary, 2: everything as JSON)
+        self.report.values = self.get_values()
+        self.report.emit(verbosity)
+        return self.report
+
+    def run(self, crop_table_path=None, verbosity=1, st_map_path=None):
+        # Time every phase and count the Maya commands of this module and the sampling module
+        self.report = RunReport.RunReport('CompMoveCamera')
+        with self.report.counting([sys.modules[__name__], CameraSampling]):
+            for _ in self.iter_run(crop_table_path, st_map_path):
+                pass
+            self.write_results()
+
+        return self.finish_run(verbosity)
+
+    def run_deferred(self, crop_table_path=None, verbosity=1, progress=True, time_slice=DeferredRun.DEFAULT_TIME_SLICE,
+                     st_map_path=None):
+        """
+        Runs without freezing Maya: the sampling is done a chunk at a time whenever Maya is idle, with a
+        progress dialog that can cancel it. Nothing is written until all the sampling is done, so cancelling
+        leaves the scene untouched. The timings in the report include the time Maya spent in between chunks
+        Args:
+            crop_table_path (str): Like run
+            verbosity (int): Like run
+            progress (bool): Show a progress dialog
+            time_slice (float): How many seconds to work before giving control back to Maya
+            st_map_path (str): Like run
+
+        Returns:
+            The DeferredRun, its result is the RunReport once it is done
+        """
+        self.report = RunReport.RunReport('CompMoveCamera')
+
+        def finish():
+            with self.report.counting([sys.modules[__name__], CameraSampling]):
+                self.write_results()
+            return self.finish_run(verbosity)
+
+        deferred = DeferredRun.DeferredRun(
+            self.iter_run(crop_table_path, st_map_path),
+            finish,
+            title='CompMoveCamera' if progress else None,
+            time_slice=time_slice,
+            slice_context=lambda: self.report.counting([sys.modules[__name__], CameraSampling])
+        )
+        deferred.start()
+        return deferred
+
+
+class CompMoveCameraBatch:
+    def __init__(self, cameras=None, bounds='sampled', solver='axis', chunk_size=CameraSampling.DEFAULT_CHUNK_SIZE, cache=None, tolerance=0.01, subframe_step=1.0, space='local', shots=False, distortion=None):
+        # The cameras to use, all the selected items are used if this isn't given
+        self.cameras = cameras
+        self.bounds = bounds
+        self.space = space
+        self.shots = shots
+        # The lens distortion of every camera's plate, see CompMoveCamera
+        self.distortion = distortion
+        self.tolerance = tolerance
+        self.subframe_step = subframe_step
+        self.solver = solver
+        self.chunk_size = chunk_size
+        # One ResultCache shared by all the cameras, True uses the default cache
+        self.cache = get_default_cache() if cache is True else cache
+        self.items = []
+        self.resolution = {}
+        # The timings and command counts of the last run
+        self.report = None
+
+    def get_all_values_we_need(self):
+        # region Get the cameras
+
+        cameras = self.cameras or cmds.ls(sl=True, long=True)
+
+        # Check if no items are selected
+        if not cameras:
+            error = "ERROR: No camera selected"
+            print(error)
+            raise ValueError(error)
+
+        self.items = [CompMoveCamera(bounds=self.bounds, camera=camera, solver=self.solver, chunk_size=self.chunk_size, cache=self.cache,
+                                     tolerance=self.tolerance, subframe_step=self.subframe_step, space=self.space,
+                                     shots=self.shots, distortion=self.distortion)
+                      for camera in cameras]
+
+        # endregion
+
+        # region Read the render resolution once for all the cameras
+        self.resolution = {
+            'original': {
+                'height': cmds.getAttr('defaultResolution.height'),
+                'width': cmds.getAttr('defaultResolution.width')
+            }
+        }
+
+        for item in self.items:
+            item.resolution = {'original': dict(self.resolution['original'])}
+        # endregion
+
+        # region Sample every keyed attribute of every camera in a single sweep over the union frame range
+        # World space values come from a sweep over each camera's own world matrix, those aren't shared
+        keyed = []
+        cached = []
+        for item in self.items:
+            item.get_selected_camera()
+
+            # Cameras that didn't change since the last run don't need to be sampled again
+            item.get_apertures()
+            cached.append(item.load_from_cache())
+
+            keyed.extend(item.get_keyed_attributes())
+
+        sample_value_ranges(keyed, self.chunk_size)
+        # endregion
+
+        # region Get the focal lengths and rotations of every camera from the sampled ranges
+        for item, hit in zip(self.items, cached):
+            if item.space == 'world':
+                for _ in item.iter_sample_world():
+                    pass
+
+            item.get_focal_lengths()
+            item.get_rotations()
+
+            if not hit:
+                item.save_to_cache()
+        # endregion
+
+    def do_the_math(self):
+        # Solve all the cameras together in one vectorized call
+        def values(get):
+            return numpy.array([get(item) for item in self.items], dtype=numpy.float64)
+
+        focal_min = values(lambda item: item.focal_length['value_inches']['min'])
+        result = OverscanMath.solve_overscan(
+            focal_min,
+            focal_min,
+            values(lambda item: item.X['rotation']['field_of_angle_in_radians']),
+            values(lambda item: item.Y['rotation']['field_of_angle_in_radians']),
+            values(lambda item: item.get_covered_aperture()['height']),
+            values(lambda item: item.get_covered_aperture()['width']),
+            self.resolution['original']['height'] * values(lambda item: item.get_distortion_coverage()['height']),
+            self.resolution['original']['width'] * values(lambda item: item.get_distortion_coverage()['width'])
+        )
+
+        for index, item in enumerate(self.items):
+            item.X['original_field_of_view'] = float(result['field_of_view_x'][index])
+            item.Y['original_field_of_view'] = float(result['field_of_view_y'][index])
+            item.aperature['new'] = {
+                'height': float(result['aperture_height'][index]),
+                'width': float(result['aperture_width'][index])
+            }
+            item.resolution['new'] = {
+                'height': float(result['resolution_height'][index]),
+                'width': float(result['resolution_width'][index])
+            }
+
+            if item.solver == 'frustum':
+                item.solve_frustum()
+
+            if item.shots:
+                item.solve_shots()
+
+        # All the cameras share the render resolution, so use the biggest one that was needed
+        self.resolution['new'] = {
+            'height': max(item.resolution['new']['height'] for item in self.items),
+            'width': max(item.resolution['new']['width'] for item in self.items)
+        }
+
+    def set_all_the_new_values(self):
+        # Apply the changes of all the cameras as one undoable change, without redrawing the viewport in between
+        with suspended_undo_chunk('CompMoveCameraBatch') as chunk:
+            # Set the new values on every camera
+            for item in self.items:
+                item.set_the_new_camera_values(chunk)
+
+            # Set the shared render settings once
+            self.items[0].resolution['new'] = self.resolution['new']
+            self.items[0].set_the_new_render_values(chunk)
+
+    def get_results(self):
+        # A compact copy of the values of every camera, see CameraResult
+        return [item.get_result() for item in self.items]
+
+    def print_cameras(self):
+        # Print one line per camera instead of every value
+        for item in self.items:
+            print('{}: aperture {:.3f} x {:.3f} -> {:.2f} x {:.2f}, resolution {} x {}'.format(
+                item.selected['camera'],
+                item.aperature['original']['width'],
+                item.aperature['original']['height'],
+                item.aperature['new']['width'],
+                item.aperature['new']['height'],
+                int(round(item.resolution['new']['width'])),
+                int(round(item.resolution['new']['height']))
+            ))
+
+        print('Render resolution: {} x {} -> {} x {}'.format(
+            self.resolution['original']['width'],
+            self.resolution['original']['height'],
+            int(round(self.resolution['new']['width'])),
+            int(round(self.resolution['new']['height']))
+        ))
+
+    def run(self, verbosity=1):
+        self.report = RunReport.RunReport('CompMoveCameraBatch')
+        with self.report.counting([sys.modules[__name__], CameraSampling]):
+            # This gets all the values of all the cameras, sampling the timeline once
+            with self.report.phase('sampling'):
+                self.get_all_values_we_need()
+
+            # Does the math for every camera
+            with self.report.phase('math'):
+                self.do_the_math()
+
+            # Set all the new values in Maya
+            with self.report.phase('writes'):
+                self.set_all_the_new_values()
+
+        if self.cache is not None:
+            self.cache.save()
+
+        # Print a combined report
+        self.report.values = {
+            'cameras': [item.get_values() for item in self.items],
+            'resolution': self.resolution
+        }
+        if verbosity == 1:
+            self.print_cameras()
+        self.report.emit(verbosity)
+        return self.report
@@ -0,0 +1,293 @@
+"""
+Benchmarks CompMoveCamera on synthetic shots
+
+Usage:
+    python CompMoveCameraBenchmark.py --output benchmark.json
+    python CompMoveCameraBenchmark.py --frames 1000 100000 --key-step 10 --compare baseline.json
+    mayapy CompMoveCameraBenchmark.py --standalone --output maya.json
+
+Every case builds a camera with the given number of frames, keys every key_step frames, and animates
+nothing, only the rotations, or the rotations and the focal length. get_all_values_we_need, do_the_math
+and set_all_the_new_values are then measured for wall time, peak Python memory and the number of Maya
+commands they issue. Without --standalone the cases run on FakeMaya, so no Maya is needed.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 Maya versions have no tracemalloc, the peak memory is left out there
+    tracemalloc = None
+
+PHASES = ['get_all_values_we_need', 'do_the_math', 'set_all_the_new_values']
+# What is animated in a case, everything else is constant
+ANIMATED = {
+    'none': [],
+    'rotation': ['rotateX', 'rotateY'],
+    'all': ['rotateX', 'rotateY', 'focalLength'],
+}
+
+
+def build_camera(frames, key_step, animated, seed=0):
+    """
+    Creates a camera with synthetic animation
+    Args:
+        frames (int): The number of frames of the shot, starting at frame 1
+        key_step (int): The number of frames between keys
+        animated (str): What is animated, one of the ANIMATED names
+        seed (int): The seed of the random animation, so every run builds the same camera
+
+    Returns:
+        The long name of the camera transform
+    """
+    from maya import cmds  # pylint: disable=import-error
+
+    camera, shape = cmds.camera()
+    camera = cmds.ls(camera, long=True)[0]
+    random = numpy.random.RandomState(seed)
+    key_times = numpy.arange(1, frames + key_step, key_step)
+    key_times[-1] = frames
+
+    for attr in ANIMATED[animated]:
+        node = shape if attr == 'focalLength' else camera
+        if attr == 'focalLength':
+            values = numpy.clip(35.0 + numpy.cumsum(random.normal(0.0, 2.0, len(key_times))), 18.0, 85.0)
+        else:
+            values = numpy.cumsum(random.normal(0.0, 1.0, len(key_times)))
+
+        for key_time, value in zip(key_times, values):
+            cmds.setKeyframe(node, attribute=attr, time=float(key_time), value=float(value))
+
+    cmds.playbackOptions(minTime=1, maxTime=frames)
+    return camera
+
+
+class PhaseMeter(object):
+    """
+    Measures one phase of a case
+    Args:
+        memory (bool): Also trace the peak Python memory, this makes the phase slower so it is measured in
+            its own pass
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory and tracemalloc is not None
+        self.seconds = None
+        self.peak_bytes = None
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.start()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.seconds = time.time() - self.start
+        if self.memory:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def measure(camera, options, memory=False):
+    """
+    Runs CompMoveCamera on a camera once and measures every phase, the changes are undone afterwards
+    Args:
+        camera (str): The camera to run on
+        options (dict): The benchmark options, see parse_args
+        memory (bool): Measure the peak memory instead of the time and commands
+
+    Returns:
+        A dict of phase name to a PhaseMeter and the command counts of that phase
+    """
+    from maya import cmds  # pylint: disable=import-error
+    import CameraSampling
+    import CompMoveCamera
+    import RunReport
+
+    tool = CompMoveCamera.CompMoveCamera(
+        bounds=options['bounds'], camera=camera, solver=options['solver'],
+        tolerance=options['tolerance'], subframe_step=options['subframe_step'], space=options['space'])
+    results = {}
+    for phase in PHASES:
+        report = RunReport.RunReport(phase)
+        with report.counting([CompMoveCamera, CameraSampling]):
+            with PhaseMeter(memory) as meter:
+                getattr(tool, phase)()
+        results[phase] = (meter, dict(report.command_counts))
+
+    cmds.undo()
+    return results
+
+
+def run_case(frames, key_step, animated, options):
+    """
+    Builds and measures one case
+    Args:
+        frames (int): The number of frames of the shot
+        key_step (int): The number of frames between keys
+        animated (str): What is animated, one of the ANIMATED names
+        options (dict): The benchmark options, see parse_args
+
+    Returns:
+        A dict with the case and its measurements
+    """
+    camera = build_camera(frames, key_step, animated)
+
+    phases = {}
+    best = {}
+    for _ in range(options['repeat']):
+        for phase, (meter, counts) in measure(camera, options).items():
+            if phase not in best or meter.seconds < best[phase][0].seconds:
+                best[phase] = (meter, counts)
+
+    peaks = measure(camera, options, memory=True) if options['memory'] else {}
+
+    for phase in PHASES:
+        meter, counts = best[phase]
+        phases[phase] = {
+            'seconds': meter.seconds,
+            'peak_bytes': peaks[phase][0].peak_bytes if phase in peaks else None,
+            'command_count': sum(counts.values()),
+            'command_counts': counts,
+        }
+
+    return {
+        'name': '{}f_step{}_{}'.format(frames, key_step, animated),
+        'frames': frames,
+        'key_step': key_step,
+        'animated': animated,
+        'seconds': sum(phase['seconds'] for phase in phases.values()),
+        'phases': phases,
+    }
+
+
+def run(options):
+    """
+    Runs every case
+    Args:
+        options (dict): The benchmark options, see parse_args
+
+    Returns:
+        The benchmark results as a dict
+    """
+    if options['standalone']:
+        import maya.standalone  # pylint: disable=import-error
+        maya.standalone.initialize(name='python')
+    else:
+        import FakeMaya
+        FakeMaya.install(latency=options['latency'])
+
+    from maya import cmds  # pylint: disable=import-error
+
+    cases = []
+    for frames in options['frames']:
+        for key_step in options['key_steps']:
+            for animated in options['animated']:
+                cmds.file(new=True, force=True)
+                case = run_case(frames, key_step, animated, options)
+                cases.append(case)
+                print('{:<28} {:>9.3f}s {:>8} commands'.format(
+                    case['name'], case['seconds'],
+                    sum(phase['command_count'] for phase in case['phases'].values())))
+
+    return {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'maya': 'standalone' if options['standalone'] else 'fake',
+        'options': options,
+        'cases': cases,
+    }
+
+
+def compare(baseline, results, threshold=0.2):
+    """
+    Finds the phases that got slower or use more commands than in an earlier run
+    Args:
+        baseline (dict): The results of the earlier run
+        results (dict): The results of this run
+        threshold (float): How much slower (0.2 is 20%) a phase can get before it counts as a regression
+
+    Returns:
+        A list of regression descriptions, empty if there are none
+    """
+    earlier = dict((case['name'], case) for case in baseline['cases'])
+    regressions = []
+    for case in results['cases']:
+        if case['name'] not in earlier:
+            continue
+
+        for phase, values in case['phases'].items():
+            old = earlier[case['name']]['phases'].get(phase)
+            if old is None:
+                continue
+            if values['seconds'] > old['seconds'] * (1.0 + threshold) and values['seconds'] - old['seconds'] > 0.001:
+                regressions.append('{} {}: {:.3f}s -> {:.3f}s'.format(
+                    case['name'], phase, old['seconds'], values['seconds']))
+            if values['command_count'] > old['command_count']:
+                regressions.append('{} {}: {} -> {} commands'.format(
+                    case['name'], phase, old['command_count'], values['command_count']))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark CompMoveCamera on synthetic shots')
+    parser.add_argument('--frames', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='The shot lengths to benchmark')
+    parser.add_argument('--key-step', dest='key_steps', type=int, nargs='+', default=[1, 24],
+                        help='The number of frames between keys')
+    parser.add_argument('--animated', nargs='+', choices=sorted(ANIMATED), default=['none', 'rotation', 'all'],
+                        help='What is animated')
+    parser.add_argument('--bounds', choices=['sampled', 'analytic', 'adaptive'], default='sampled',
+                        help='How the min and max values of keyed attributes are found')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='How far the adaptive bounds are allowed to be off')
+    parser.add_argument('--subframe-step', type=float, default=1.0,
+                        help='The smallest step between adaptive samples')
+    parser.add_argument('--solver', choices=['axis', 'frustum'], default='axis',
+                        help='How the new aperture is solved')
+    parser.add_argument('--space', choices=['local', 'world'], default='local',
+                        help='Read the camera\'s own keys, or its world matrix')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run every case this many times and keep the fastest time')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='Skip the (slower) peak memory pass')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='The seconds every FakeMaya command takes, to mimic the real command layer')
+    parser.add_argument('--standalone', action='store_true',
+                        help='Run in headless Maya (mayapy) instead of on FakeMaya')
+    parser.add_argument('--output',
+                        help='The JSON file the results are written to')
+    parser.add_argument('--compare',
+                        help='An earlier results file, exits with 1 when a phase got slower or uses more commands')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='How much slower a phase can get before --compare counts it as a regression')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = vars(args).copy()
+    results = run(options)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(json.load(handle), results, args.threshold)
+        for regression in regressions:
+            print('REGRESSION: ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
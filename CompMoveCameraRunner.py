@@ -0,0 +1,286 @@
+"""
+Runs CompMoveCamera over many scene files with a pool of headless Maya processes
+
+Usage:
+    mayapy CompMoveCameraRunner.py shots/*.mb --manifest overscan.jsonl --workers 4 --output-dir out
+
+Every scene gets one JSON line in the manifest with its outcome and timings. Running the same command
+again skips the scenes that already succeeded, so a crashed or cancelled run can simply be resumed.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+
+def initialize_worker(setup_module=None):
+    """
+    Starts Maya inside a worker process
+    Args:
+        setup_module (str): A module to import instead of starting Maya, eg: FakeMaya so the runner can be
+            tested without Maya. Its install() is called if it has one, otherwise importing it has to put
+            the stand-in maya.cmds in sys.modules
+    """
+    if setup_module:
+        module = importlib.import_module(setup_module)
+        install = getattr(module, 'install', None)
+        if callable(install):
+            install()
+        return
+
+    import maya.standalone  # pylint: disable=import-error
+    maya.standalone.initialize(name='python')
+
+
+def get_scene_cameras():
+    """
+    Gets all the cameras in the open scene, except the default persp, top, front and side cameras
+
+    Returns:
+        A list of camera transforms (long names)
+    """
+    from maya import cmds  # pylint: disable=import-error
+
+    cameras = []
+    for shape in cmds.ls(type='camera', long=True) or []:
+        if cmds.camera(shape, query=True, startupCamera=True):
+            continue
+        cameras.extend(cmds.listRelatives(
+            shape, parent=True, fullPath=True) or [])
+    return cameras
+
+
+def process_scene(scene, options):
+    """
+    Opens a scene, runs CompMoveCamera on its cameras and saves the result
+    Args:
+        scene (str): The path of the scene file
+        options (dict): The runner options, see parse_args
+
+    Returns:
+        A dict with the outcome of the scene, this is what ends up in the manifest
+    """
+    record = {
+        'scene': scene,
+        'status': 'ok',
+        'pid': os.getpid(),
+        'started': time.time(),
+        'timings': {},
+        'cameras': [],
+    }
+
+    try:
+        from maya import cmds  # pylint: disable=import-error
+        from CompMoveCamera import CompMoveCameraBatch
+
+        phase_start = time.time()
+        cmds.file(scene, open=True, force=True)
+        record['timings']['open'] = time.time() - phase_start
+
+        cameras = options['cameras'] or get_scene_cameras()
+        if not cameras:
+            raise ValueError('No cameras found in scene')
+
+        phase_start = time.time()
+        batch = CompMoveCameraBatch(
+            cameras=cameras, bounds=options['bounds'], solver=options['solver'],
+            tolerance=options['tolerance'], subframe_step=options['subframe_step'], space=options['space'],
+            shots=options['shots'])
+        batch.get_all_values_we_need()
+        batch.do_the_math()
+        batch.set_all_the_new_values()
+        record['timings']['compute'] = time.time() - phase_start
+
+        record['cameras'] = [result.to_dict() for result in batch.get_results()]
+        if options['shots']:
+            record['shots'] = dict((item.selected['camera'], item.shot_results) for item in batch.items)
+        record['resolution'] = batch.resolution
+
+        phase_start = time.time()
+        if options['output_dir']:
+            output = os.path.join(options['output_dir'], os.path.basename(scene))
+            cmds.file(rename=output)
+            cmds.file(save=True, force=True)
+            record['output'] = output
+        elif options['save']:
+            cmds.file(save=True, force=True)
+            record['output'] = scene
+        record['timings']['save'] = time.time() - phase_start
+
+    except Exception as error:  # pylint: disable=broad-except
+        # One broken scene shouldn't stop the whole batch, it just gets recorded as failed
+        record['status'] = 'error'
+        record['error'] = str(error)
+        record['traceback'] = traceback.format_exc()
+
+    record['seconds'] = time.time() - record['started']
+    return record
+
+
+def _process_scene_star(args):
+    # Pool.imap only passes one argument
+    return process_scene(*args)
+
+
+def read_finished_scenes(manifest):
+    """
+    Gets the scenes that were already processed successfully
+    Args:
+        manifest (str): The path of the JSON-lines manifest
+
+    Returns:
+        A set of scene paths
+    """
+    finished = set()
+    if not os.path.exists(manifest):
+        return finished
+
+    with open(manifest) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A half written line from a run that got killed
+                continue
+
+            if record.get('status') == 'ok':
+                finished.add(record['scene'])
+            else:
+                finished.discard(record['scene'])
+
+    return finished
+
+
+def run(scenes, manifest, workers=1, options=None):
+    """
+    Processes scenes in parallel and appends every outcome to the manifest as soon as it is done
+    Args:
+        scenes (list): The scene paths
+        manifest (str): The path of the JSON-lines manifest
+        workers (int): The number of worker processes, 0 processes everything in this process
+        options (dict): The runner options, see parse_args
+
+    Returns:
+        A list of the records of the processed scenes
+    """
+    options = dict(options or {})
+    options.setdefault('cameras', [])
+    options.setdefault('bounds', 'sampled')
+    options.setdefault('solver', 'axis')
+    options.setdefault('tolerance', 0.01)
+    options.setdefault('subframe_step', 1.0)
+    options.setdefault('space', 'local')
+    options.setdefault('shots', False)
+    options.setdefault('output_dir', None)
+    options.setdefault('save', False)
+    options.setdefault('setup', None)
+    options.setdefault('scenes_per_worker', None)
+
+    finished = read_finished_scenes(manifest)
+    todo = [os.path.abspath(scene) for scene in scenes]
+    todo = [scene for scene in todo if scene not in finished]
+
+    skipped = len(scenes) - len(todo)
+    if skipped:
+        print('Skipping {} scenes that are already done'.format(skipped))
+
+    if options['output_dir'] and not os.path.exists(options['output_dir']):
+        os.makedirs(options['output_dir'])
+
+    jobs = [(scene, options) for scene in todo]
+    records = []
+
+    if workers == 0:
+        initialize_worker(options['setup'])
+        results = (process_scene(*job) for job in jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            processes=workers,
+            initializer=initialize_worker,
+            initargs=(options['setup'],),
+            maxtasksperchild=options['scenes_per_worker']
+        )
+        results = pool.imap_unordered(_process_scene_star, jobs)
+
+    try:
+        with open(manifest, 'a') as handle:
+            for record in results:
+                handle.write(json.dumps(record, default=str) + '\n')
+                handle.flush()
+                records.append(record)
+
+                print('[{}/{}] {} {} ({:.1f}s)'.format(
+                    len(records), len(jobs), record['status'], record['scene'], record['seconds']))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run CompMoveCamera over many scene files')
+    parser.add_argument('scenes', nargs='+', help='The scene files to process')
+    parser.add_argument('--manifest', default='CompMoveCamera.jsonl',
+                        help='The JSON-lines file the outcomes are appended to')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='The number of headless Maya processes, 0 runs everything in this process')
+    parser.add_argument('--camera', dest='cameras', action='append', default=[],
+                        help='A camera to process, can be given more than once (default: all scene cameras)')
+    parser.add_argument('--bounds', choices=['sampled', 'analytic', 'adaptive'], default='sampled',
+                        help='How the min and max values of keyed attributes are found')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='How far the adaptive bounds are allowed to be off')
+    parser.add_argument('--subframe-step', type=float, default=1.0,
+                        help='The smallest step between adaptive samples, eg: 0.25 to include motion blur subframes')
+    parser.add_argument('--solver', choices=['axis', 'frustum'], default='axis',
+                        help='How the new aperture is solved')
+    parser.add_argument('--space', choices=['local', 'world'], default='local',
+                        help='Read the camera\'s own keys, or its world matrix (for constrained and parented cameras)')
+    parser.add_argument('--shots', action='store_true',
+                        help='Also record the overscan of every sequencer shot that looks through a camera')
+    parser.add_argument('--output-dir',
+                        help='Save the processed scenes in this directory')
+    parser.add_argument('--save', action='store_true',
+                        help='Save the processed scenes over the originals')
+    parser.add_argument('--scenes-per-worker', type=int,
+                        help='Restart the worker processes after this many scenes')
+    parser.add_argument('--setup',
+                        help='A module to import in the workers instead of starting Maya (eg: FakeMaya), its '
+                             'install() is called if it has one to put the stand-in maya.cmds in place')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = run(args.scenes, args.manifest, workers=args.workers, options={
+        'cameras': args.cameras,
+        'bounds': args.bounds,
+        'solver': args.solver,
+        'tolerance': args.tolerance,
+        'subframe_step': args.subframe_step,
+        'space': args.space,
+        'shots': args.shots,
+        'output_dir': args.output_dir,
+        'save': args.save,
+        'setup': args.setup,
+        'scenes_per_worker': args.scenes_per_worker,
+    })
+
+    failed = [record for record in records if record['status'] != 'ok']
+    print('Done: {} processed, {} failed'.format(len(records), len(failed)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import numpy
+
+# Tangent types that hold a value over the whole segment instead of interpolating
+STEP_NONE = 0
+STEP = 1
+STEP_NEXT = 2
+
+# Maya's preInfinity/postInfinity enum, what a curve does before its first and after its last key
+INFINITY_CONSTANT = 0
+INFINITY_LINEAR = 1
+INFINITY_CYCLE = 3
+INFINITY_CYCLE_RELATIVE = 4
+INFINITY_OSCILLATE = 5
+
+
+class CurveData(object):
+    """
+    The keys and bezier control points of an animation curve, one entry per key
+    Args:
+        times (numpy.ndarray): The key times in frames
+        values (numpy.ndarray): The key values in UI units
+        out_x (numpy.ndarray): The time of the control point after each key
+        out_y (numpy.ndarray): The value of the control point after each key
+        in_x (numpy.ndarray): The time of the control point before each key
+        in_y (numpy.ndarray): The value of the control point before each key
+        steps (numpy.ndarray): The step type (STEP_NONE, STEP or STEP_NEXT) of each key's out tangent
+        pre_infinity (int): What the curve does before the first key (one of the INFINITY values)
+        post_infinity (int): What the curve does after the last key (one of the INFINITY values)
+    """
+
+    def __init__(self, times, values, out_x, out_y, in_x, in_y, steps, pre_infinity=INFINITY_CONSTANT, post_infinity=INFINITY_CONSTANT):
+        self.times = numpy.asarray(times, dtype=numpy.float64)
+        self.values = numpy.asarray(values, dtype=numpy.float64)
+        self.out_x = numpy.asarray(out_x, dtype=numpy.float64)
+        self.out_y = numpy.asarray(out_y, dtype=numpy.float64)
+        self.in_x = numpy.asarray(in_x, dtype=numpy.float64)
+        self.in_y = numpy.asarray(in_y, dtype=numpy.float64)
+        self.steps = numpy.asarray(steps, dtype=numpy.int8)
+        self.pre_infinity = int(pre_infinity)
+        self.post_infinity = int(post_infinity)
+
+    def __len__(self):
+        return len(self.times)
+
+
+def control_points(times, values, in_angles, out_angles, in_weights=None, out_weights=None, slope_scale=1.0, weight_scale=(1.0, 1.0)):
+    """
+    Builds the bezier control points of every key from its tangents
+    Args:
+        times (numpy.ndarray): The key times in frames
+        values (numpy.ndarray): The key values
+        in_angles (numpy.ndarray): The in tangent angles in degrees
+        out_angles (numpy.ndarray): The out tangent angles in degrees
+        in_weights (numpy.ndarray): The in tangent weights, only for weighted curves
+        out_weights (numpy.ndarray): The out tangent weights, only for weighted curves
+        slope_scale (float): Converts tan(angle) to value units per frame
+        weight_scale (tuple): Converts the weighted tangent's x and y to frames and value units
+
+    Returns:
+        A tuple of out_x, out_y, in_x, in_y
+    """
+    times = numpy.asarray(times, dtype=numpy.float64)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    in_radians = numpy.radians(numpy.asarray(in_angles, dtype=numpy.float64))
+    out_radians = numpy.radians(numpy.asarray(out_angles, dtype=numpy.float64))
+
+    # The length (in frames) of the segment after and before every key
+    gaps = numpy.diff(times)
+    after = numpy.append(gaps, gaps[-1] if len(gaps) else 1.0)
+    before = numpy.insert(gaps, 0, gaps[0] if len(gaps) else 1.0)
+
+    if in_weights is None or out_weights is None:
+        # Non weighted tangents always put their control points a third of the way into the segment
+        out_dx = after / 3.0
+        in_dx = before / 3.0
+        out_dy = numpy.tan(out_radians) * slope_scale * out_dx
+        in_dy = numpy.tan(in_radians) * slope_scale * in_dx
+    else:
+        out_weights = numpy.asarray(out_weights, dtype=numpy.float64)
+        in_weights = numpy.asarray(in_weights, dtype=numpy.float64)
+        out_dx = out_weights * numpy.cos(out_radians) * weight_scale[0] / 3.0
+        in_dx = in_weights * numpy.cos(in_radians) * weight_scale[0] / 3.0
+        out_dy = out_weights * numpy.sin(out_radians) * weight_scale[1] / 3.0
+        in_dy = in_weights * numpy.sin(in_radians) * weight_scale[1] / 3.0
+
+    return times + out_dx, values + out_dy, times - in_dx, values - in_dy
+
+
+def segment_extrema(curve):
+    """
+    Solves the exact min and max value of every segment of a curve
+    Args:
+        curve (CurveData): The curve to solve
+
+    Returns:
+        A tuple of two numpy arrays (min and max) with one value per segment
+    """
+    # The four bezier values of every segment
+    y0 = curve.values[:-1]
+    y1 = curve.out_y[:-1]
+    y2 = curve.in_y[1:]
+    y3 = curve.values[1:]
+
+    segment_min = numpy.minimum(y0, y3)
+    segment_max = numpy.maximum(y0, y3)
+
+    # The derivative of a cubic bezier is the quadratic a*s^2 + b*s + c
+    d0 = y1 - y0
+    d1 = y2 - y1
+    d2 = y3 - y2
+    a = d0 - 2.0 * d1 + d2
+    b = 2.0 * (d1 - d0)
+    c = d0
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        discriminant = numpy.sqrt(numpy.maximum(b * b - 4.0 * a * c, 0.0))
+        quadratic = numpy.abs(a) > 1e-12
+        linear_root = numpy.where(b != 0.0, -c / b, numpy.nan)
+        roots = (
+            numpy.where(quadratic, (-b + discriminant) / (2.0 * a), linear_root),
+            numpy.where(quadratic, (-b - discriminant) / (2.0 * a), numpy.nan),
+        )
+
+    # Step segments hold their values, so only the keys themselves can be extremes
+    interpolated = curve.steps[:-1] == STEP_NONE
+
+    for s in roots:
+        valid = interpolated & (s > 0.0) & (s < 1.0)
+        s = numpy.where(valid, s, 0.0)
+        t = 1.0 - s
+        y = t * t * t * y0 + 3.0 * t * t * s * y1 + 3.0 * t * s * s * y2 + s * s * s * y3
+        segment_min = numpy.where(valid, numpy.minimum(segment_min, y), segment_min)
+        segment_max = numpy.where(valid, numpy.maximum(segment_max, y), segment_max)
+
+    return segment_min, segment_max
+
+
+def curve_bounds(curve):
+    """
+    Solves the exact min and max value of a curve between its first and last key
+    Args:
+        curve (CurveData): The curve to solve
+
+    Returns:
+        A tuple of the min and max values
+    """
+    if len(curve) == 1:
+        return float(curve.values[0]), float(curve.values[0])
+
+    segment_min, segment_max = segment_extrema(curve)
+    return float(segment_min.min()), float(segment_max.max())
+
+
+def segment_slopes(curve):
+    """
+    Gets the steepest slope (in value units per frame) every segment of a curve can have, from the control
+    point hull of the segment. The derivative of a bezier is a weighted average of the steps between its
+    control points, so |dy/dx| <= max |y step| / min x step
+    Args:
+        curve (CurveData): The curve
+
+    Returns:
+        A numpy array with one slope per segment, infinite when a weighted tangent has no length in time
+        (a vertical tangent). Step segments hold their values, so they have no slope (the jump is on a key)
+    """
+    x_steps = numpy.array([curve.out_x[:-1] - curve.times[:-1],
+                           curve.in_x[1:] - curve.out_x[:-1],
+                           curve.times[1:] - curve.in_x[1:]])
+    y_steps = numpy.abs(numpy.array([curve.out_y[:-1] - curve.values[:-1],
+                                     curve.in_y[1:] - curve.out_y[:-1],
+                                     curve.values[1:] - curve.in_y[1:]]))
+    rise = y_steps.max(axis=0)
+    run = numpy.maximum(x_steps.min(axis=0), 0.0)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        slopes = numpy.where(rise > 0.0, rise / run, 0.0)
+    return numpy.where(curve.steps[:-1] == STEP_NONE, slopes, 0.0)
+
+
+def _bezier(p0, p1, p2, p3, s):
+    t = 1.0 - s
+    return t * t * t * p0 + 3.0 * t * t * s * p1 + 3.0 * t * s * s * p2 + s * s * s * p3
+
+
+def evaluate_curve(curve, times):
+    """
+    Evaluates a curve the way Maya does, including its infinity modes, without Maya
+    Args:
+        curve (CurveData): The curve to evaluate
+        times (numpy.ndarray): The times (in frames) to evaluate at
+
+    Returns:
+        A numpy array with one value per time
+    """
+    times = numpy.asarray(times, dtype=numpy.float64)
+    first_time = curve.times[0]
+    last_time = curve.times[-1]
+
+    if len(curve) == 1:
+        return numpy.full(times.shape, curve.values[0])
+
+    # region Map times outside of the keys back into the keyed range
+    period = last_time - first_time
+    offsets = numpy.zeros(times.shape)
+    local = times.copy()
+
+    for infinity, outside in [(curve.pre_infinity, times < first_time), (curve.post_infinity, times > last_time)]:
+        if infinity in (INFINITY_CYCLE, INFINITY_CYCLE_RELATIVE, INFINITY_OSCILLATE):
+            cycles = numpy.floor((times - first_time) / period)
+            wrapped = first_time + (times - first_time) - cycles * period
+            if infinity == INFINITY_OSCILLATE:
+                # Every other cycle plays backwards
+                wrapped = numpy.where(cycles % 2 == 0, wrapped, first_time + last_time - wrapped)
+            if infinity == INFINITY_CYCLE_RELATIVE:
+                offsets = numpy.where(outside, cycles * (curve.values[-1] - curve.values[0]), offsets)
+            local = numpy.where(outside, wrapped, local)
+        else:
+            # Constant and linear infinity both start from the end key
+            local = numpy.where(outside, numpy.clip(times, first_time, last_time), local)
+    # endregion
+
+    # region Evaluate the segments
+    segments = numpy.clip(numpy.searchsorted(curve.times, local, side='right') - 1, 0, len(curve) - 2)
+    x0 = curve.times[segments]
+    x1 = curve.out_x[segments]
+    x2 = curve.in_x[segments + 1]
+    x3 = curve.times[segments + 1]
+
+    # Solve the bezier's s for every time, non weighted segments are linear in time so start from there
+    s = numpy.clip((local - x0) / (x3 - x0), 0.0, 1.0)
+    linear = numpy.isclose(x1 - x0, (x3 - x0) / 3.0) & numpy.isclose(x3 - x2, (x3 - x0) / 3.0)
+    if not numpy.all(linear):
+        low = numpy.zeros(s.shape)
+        high = numpy.ones(s.shape)
+        for _ in range(40):
+            middle = (low + high) / 2.0
+            before = _bezier(x0, x1, x2, x3, middle) < local
+            low = numpy.where(before, middle, low)
+            high = numpy.where(before, high, middle)
+        s = numpy.where(linear, s, (low + high) / 2.0)
+
+    values = _bezier(curve.values[segments], curve.out_y[segments],
+                     curve.in_y[segments + 1], curve.values[segments + 1], s)
+
+    steps = curve.steps[segments]
+    values = numpy.where(steps == STEP, curve.values[segments], values)
+    values = numpy.where(steps == STEP_NEXT, curve.values[segments + 1], values)
+    # Curves always go through their keys, even on step segments
+    values = numpy.where(local == x0, curve.values[segments], values)
+    values = numpy.where(local == x3, curve.values[segments + 1], values)
+    # endregion
+
+    # region Linear infinity continues along the end tangents
+    if curve.pre_infinity == INFINITY_LINEAR:
+        slope = (curve.out_y[0] - curve.values[0]) / (curve.out_x[0] - first_time)
+        values = numpy.where(times < first_time, curve.values[0] + (times - first_time) * slope, values)
+    if curve.post_infinity == INFINITY_LINEAR:
+        slope = (curve.values[-1] - curve.in_y[-1]) / (last_time - curve.in_x[-1])
+        values = numpy.where(times > last_time, curve.values[-1] + (times - last_time) * slope, values)
+    # endregion
+
+    return values + offsets
+
+
+class ExtremaTree(object):
+    """
+    A segment tree over the min and max values of a curve's segments. Changing a few segments only updates
+    their paths to the root, so the extremes of a long curve stay current in O(log n) per changed segment
+    Args:
+        segment_min (numpy.ndarray): The min value of every segment, like segment_extrema returns
+        segment_max (numpy.ndarray): The max value of every segment
+    """
+
+    def __init__(self, segment_min, segment_max):
+        self.count = len(segment_min)
+        self.size = 1
+        while self.size < max(self.count, 1):
+            self.size *= 2
+
+        # The leaves are in the second half, every parent holds the extremes of its two children
+        self.min = numpy.full(2 * self.size, numpy.inf)
+        self.max = numpy.full(2 * self.size, -numpy.inf)
+        self.min[self.size:self.size + self.count] = segment_min
+        self.max[self.size:self.size + self.count] = segment_max
+        for node in range(self.size - 1, 0, -1):
+            self.min[node] = min(self.min[2 * node], self.min[2 * node + 1])
+            self.max[node] = max(self.max[2 * node], self.max[2 * node + 1])
+
+    def update(self, segment, segment_min, segment_max):
+        # Changes one segment and the parents above it
+        node = self.size + segment
+        self.min[node] = segment_min
+        self.max[node] = segment_max
+        node //= 2
+        while node:
+            self.min[node] = min(self.min[2 * node], self.min[2 * node + 1])
+            self.max[node] = max(self.max[2 * node], self.max[2 * node + 1])
+            node //= 2
+
+    def query(self, first=0, last=None):
+        """
+        Gets the extremes of a range of segments
+        Args:
+            first (int): The first segment
+            last (int): The last segment (included), defaults to the last segment of the curve
+
+        Returns:
+            A tuple of the min and max values
+        """
+        last = self.count - 1 if last is None else last
+        low, high = numpy.inf, -numpy.inf
+        first += self.size
+        last += self.size + 1
+        while first < last:
+            if first % 2:
+                low, high = min(low, self.min[first]), max(high, self.max[first])
+                first += 1
+            if last % 2:
+                last -= 1
+                low, high = min(low, self.min[last]), max(high, self.max[last])
+            first //= 2
+            last //= 2
+        return float(low), float(high)
+
+    def bounds(self):
+        # The extremes of the whole curve
+        return float(self.min[1]), float(self.max[1])
@@ -0,0 +1,202 @@
+"""
+A compact columnar binary file format for animation curves, so curve analysis (like CompMoveCamera's
+bounds) can run outside of Maya, on machines without licenses.
+
+Layout (little endian, every array starts on an 8 byte boundary):
+    header      magic, version, curve count, key count, names size
+    offsets     int64[curves + 1]   where every curve's keys start in the key columns
+    times       float64[keys]
+    values      float64[keys]
+    out_x       float64[keys]
+    out_y       float64[keys]
+    in_x        float64[keys]
+    in_y        float64[keys]
+    steps       int8[keys]
+    infinity    int8[curves * 2]    pre and post infinity of every curve
+    names       utf-8, one name per line
+
+Files are read through mmap and numpy.frombuffer, so loading a file doesn't copy the keys.
+"""
+import mmap
+import multiprocessing
+import struct
+
+import numpy
+
+import CurveBounds
+
+MAGIC = b'ACRV'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQQ')
+COLUMNS = ('times', 'values', 'out_x', 'out_y', 'in_x', 'in_y')
+
+
+def _padding(size):
+    return b'\0' * (-size % 8)
+
+
+def write_curves(path, names, curves):
+    """
+    Writes curves to a file
+    Args:
+        path (str): The path of the file
+        names (list): A name for every curve, eg: the attribute it drives
+        curves (list): The CurveBounds.CurveData of every curve
+    """
+    offsets = numpy.zeros(len(curves) + 1, dtype='<i8')
+    offsets[1:] = numpy.cumsum([len(curve) for curve in curves])
+    names_data = '\n'.join(names).encode('utf-8')
+
+    with open(path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(curves), int(offsets[-1]), len(names_data)))
+        handle.write(_padding(HEADER.size))
+        handle.write(offsets.tobytes())
+
+        for column in COLUMNS:
+            data = numpy.concatenate([getattr(curve, column) for curve in curves] or [[]])
+            handle.write(data.astype('<f8').tobytes())
+
+        steps = numpy.concatenate([curve.steps for curve in curves] or [[]]).astype('i1')
+        infinity = numpy.array([[curve.pre_infinity, curve.post_infinity] for curve in curves],
+                               dtype='i1').reshape(-1)
+        handle.write(steps.tobytes())
+        handle.write(infinity.tobytes())
+        handle.write(names_data)
+
+
+class CurveFile(object):
+    """
+    A curve file opened for reading, the key columns are views into the memory mapped file.
+    Close it (or use it in a with statement) once it isn't needed anymore, so the file can be deleted once
+    the curves read from it are gone too
+    Args:
+        path (str): The path of the file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, keys, names_size = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('{} is not a version {} curve file'.format(path, VERSION))
+
+        offset = HEADER.size + len(_padding(HEADER.size))
+        self.offsets = numpy.frombuffer(self.buffer, dtype='<i8', count=count + 1, offset=offset)
+        offset += self.offsets.nbytes
+
+        for column in COLUMNS:
+            setattr(self, column, numpy.frombuffer(self.buffer, dtype='<f8', count=keys, offset=offset))
+            offset += keys * 8
+
+        self.steps = numpy.frombuffer(self.buffer, dtype='i1', count=keys, offset=offset)
+        offset += keys
+        self.infinity = numpy.frombuffer(self.buffer, dtype='i1', count=count * 2, offset=offset)
+        offset += count * 2
+
+        names = self.buffer[offset:offset + names_size].decode('utf-8')
+        self.names = names.split('\n') if count else []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # The views into the file have to go before the memory map can be closed. Curves that were read from
+        # the file share its memory and keep working, while any of them is still around the map is closed
+        # when the last one is garbage collected instead
+        if self.buffer is None:
+            return
+
+        self.offsets = self.steps = self.infinity = None
+        for column in COLUMNS:
+            setattr(self, column, None)
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass
+        self.buffer = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def curve(self, index):
+        """
+        Gets one curve
+        Args:
+            index (int): The index of the curve
+
+        Returns:
+            A CurveBounds.CurveData that shares its memory with the file, it stays usable after the file is
+            closed and keeps the file mapped until it is garbage collected
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return CurveBounds.CurveData(
+            *[getattr(self, column)[start:end] for column in COLUMNS],
+            steps=self.steps[start:end],
+            pre_infinity=self.infinity[index * 2],
+            post_infinity=self.infinity[index * 2 + 1]
+        )
+
+    def curves(self):
+        for index in range(len(self)):
+            yield self.names[index], self.curve(index)
+
+
+def export_curves(path, attr_names):
+    """
+    Exports the curves driving attributes in the open Maya scene
+    Args:
+        path (str): The path of the file
+        attr_names (list): The full attribute names, attributes without a single time based curve are skipped
+
+    Returns:
+        The names of the attributes that were exported
+    """
+    import CameraSampling
+
+    names = []
+    curves = []
+    for attr_name in attr_names:
+        curve = CameraSampling.read_curve(attr_name)
+        if curve is not None:
+            names.append(attr_name)
+            curves.append(curve)
+
+    write_curves(path, names, curves)
+    return names
+
+
+def compute_bounds(path):
+    """
+    Solves the exact min and max value of every curve in a file
+    Args:
+        path (str): The path of the file
+
+    Returns:
+        A dict of curve name to a (min, max) tuple
+    """
+    with CurveFile(path) as curve_file:
+        return dict((name, CurveBounds.curve_bounds(curve)) for name, curve in curve_file.curves())
+
+
+def compute_bounds_parallel(paths, processes=None):
+    """
+    Solves the bounds of every curve in many files with a pool of processes
+    Args:
+        paths (list): The paths of the files
+        processes (int): The number of processes, defaults to the number of CPUs
+
+    Returns:
+        A dict of path to the compute_bounds result of that file
+    """
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        return dict(zip(paths, pool.map(compute_bounds, paths)))
+    finally:
+        pool.close()
+        pool.join()
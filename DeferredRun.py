@@ -0,0 +1,160 @@
+"""
+Runs long jobs in Maya without freezing it, a slice of work at a time whenever Maya is idle
+
+A job is a generator that yields (step, progress) pairs between small pieces of work. Every time Maya is
+idle the job runs for one time slice, then hands control back so the viewport and the UI keep updating.
+A progress dialog (built with the bundled Qt.py) shows how far the job is and can cancel it between two
+pieces of work.
+"""
+import traceback
+import maya.utils  # pylint: disable=import-error
+from RunReport import clock
+
+# How many seconds a job works before it gives control back to Maya
+DEFAULT_TIME_SLICE = 0.05
+
+
+def get_maya_window():
+    # The Maya main window as a QWidget, or None outside of the Maya UI (eg: in mayapy)
+    try:
+        import maya.OpenMayaUI as OpenMayaUI  # pylint: disable=import-error
+        from Qt import QtCompat, QtWidgets
+    except ImportError:
+        return None
+
+    pointer = OpenMayaUI.MQtUtil.mainWindow()
+    if pointer is None:
+        return None
+    return QtCompat.wrapInstance(int(pointer), QtWidgets.QWidget)
+
+
+class ProgressDialog(object):
+    """
+    A progress bar with a cancel button
+    Args:
+        title (str): The title of the dialog
+        on_cancel (callable): Called when the cancel button is pressed
+    """
+
+    def __init__(self, title, on_cancel):
+        from Qt import QtCore, QtWidgets
+
+        self.dialog = QtWidgets.QProgressDialog(title, 'Cancel', 0, 100, get_maya_window())
+        self.dialog.setWindowTitle(title)
+        # Block the Maya window while the job runs, so the scene can't change under it, but keep it drawing
+        self.dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.dialog.setMinimumDuration(0)
+        self.dialog.canceled.connect(on_cancel)
+        self.dialog.show()
+
+    def update(self, step, progress):
+        self.dialog.setLabelText(step.replace('_', ' ').capitalize() + '...')
+        self.dialog.setValue(int(progress * 100))
+
+    def close(self):
+        self.dialog.close()
+        self.dialog.deleteLater()
+
+
+def make_progress_dialog(title, on_cancel):
+    # A ProgressDialog, or None when there is no Qt (eg: in mayapy without a Qt binding)
+    try:
+        return ProgressDialog(title, on_cancel)
+    except ImportError:
+        return None
+
+
+class DeferredRun(object):
+    """
+    Runs a job a time slice at a time on Maya's idle queue
+    Args:
+        steps (generator): The job, it yields (step name, progress from 0 to 1) pairs
+        finish (callable): Called once all the steps are done, its return value becomes the result.
+            This is where a job writes its results, so a cancelled job doesn't change anything
+        title (str): The title of the progress dialog, no dialog is shown when this is None
+        time_slice (float): How many seconds to work before giving control back to Maya
+        slice_context (callable): Returns a context manager that is entered around every slice,
+            eg: to count the Maya commands of the job
+    """
+    RUNNING = 'running'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+    def __init__(self, steps, finish=None, title=None, time_slice=DEFAULT_TIME_SLICE, slice_context=None):
+        self.steps = steps
+        self.finish = finish
+        self.title = title
+        self.time_slice = time_slice
+        self.slice_context = slice_context
+        self.state = None
+        self.step = None
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+        self.dialog = None
+
+    def start(self):
+        self.state = self.RUNNING
+        if self.title:
+            self.dialog = make_progress_dialog(self.title, self.cancel)
+        maya.utils.executeDeferred(self.tick)
+
+    def cancel(self):
+        # The job stops before its next piece of work
+        self.cancel_requested = True
+
+    def is_running(self):
+        return self.state == self.RUNNING
+
+    def tick(self):
+        # Runs the job for one time slice and queues the next slice
+        if self.state != self.RUNNING:
+            return
+
+        if self.cancel_requested:
+            self.steps.close()
+            self.end(self.CANCELLED)
+            return
+
+        try:
+            done = self.run_slice()
+            if done and self.finish is not None:
+                self.result = self.finish()
+        except Exception:  # pylint: disable=broad-except
+            self.error = traceback.format_exc()
+            self.end(self.FAILED)
+            raise
+
+        if done:
+            self.end(self.DONE)
+        else:
+            maya.utils.executeDeferred(self.tick)
+
+    def run_slice(self):
+        # Returns True once the steps are used up
+        context = self.slice_context() if self.slice_context else None
+        if context is not None:
+            context.__enter__()
+        try:
+            # Always take at least one step, so a slow step still moves the job forward
+            end = clock() + self.time_slice
+            while True:
+                try:
+                    self.step, self.progress = next(self.steps)
+                except StopIteration:
+                    return True
+                if clock() >= end or self.cancel_requested:
+                    return False
+        finally:
+            if context is not None:
+                context.__exit__(None, None, None)
+            if self.dialog is not None and self.step is not None:
+                self.dialog.update(self.step, self.progress)
+
+    def end(self, state):
+        self.state = state
+        if self.dialog is not None:
+            self.dialog.close()
+            self.dialog = None
@@ -0,0 +1,1411 @@
+"""
+An in-memory stand-in for maya.cmds (and the bits of maya.OpenMaya/maya.OpenMayaAnim the scripts use), so
+the scripts in this repo can be imported, regression tested and benchmarked without Maya.
+
+Usage:
+    import FakeMaya
+    scene = FakeMaya.install(latency=0.0001)
+    camera = scene.create_camera('shotCam')
+    scene.set_keys(camera + '.rotateY', [1, 50, 100], [0, 20, -5])
+    scene.select(camera)
+
+    from CompMoveCamera import CompMoveCamera
+    CompMoveCamera().run()
+    print(scene.call_counts.most_common())
+
+    FakeMaya.uninstall()
+
+The scene holds nodes with plain attributes, animation curves (with auto, spline, linear, flat, step and
+fixed tangents and infinity modes), a selection, the current time and a simple undo chunk history.
+Every command can be given an artificial latency to mimic the cost of the real command layer.
+"""
+import bisect
+import collections
+import copy
+import json
+import math
+import os
+import sys
+import tempfile
+import time as _time
+import types
+
+import numpy
+
+import CurveBounds
+import FrustumSolver
+
+# Short flag names the scripts use, mapped to their long names
+FLAG_ALIASES = {
+    'q': 'query', 'e': 'edit', 'sl': 'selection', 'l': 'long', 's': 'shapes', 'p': 'parent',
+    'c': 'children', 'f': 'fullPath', 'k': 'keyable', 'n': 'name', 'tc': 'timeChange',
+    'vc': 'valueChange', 'iv': 'indexValue', 'kc': 'keyframeCount', 'at': 'attribute', 't': 'time',
+    'v': 'value',
+    'ia': 'inAngle', 'oa': 'outAngle', 'iw': 'inWeight', 'ow': 'outWeight', 'itt': 'inTangentType',
+    'ott': 'outTangentType', 'wt': 'weightedTangents', 'sn': 'sceneName', 'o': 'open',
+    'ltz': 'localTranslateZ', 'sa': 'subdivisionsAxis', 'cl': 'clear', 'add': 'add', 'r': 'replace',
+    'su': 'suspend', 'min': 'minTime', 'max': 'maxTime', 'u': 'update', 'ex': 'exists',
+    'es': 'exportSelected', 'rn': 'rename', 'ty': 'type', 'fr': 'force', 'pl': 'plugs',
+    'd': 'destination', 'src': 'source', 'cn': 'connections', 'in': 'index', 'st': 'startupCamera',
+}
+
+ANGLE_ATTRS = ('rotateX', 'rotateY', 'rotateZ')
+DISTANCE_ATTRS = ('translateX', 'translateY', 'translateZ')
+COMPOUND_ATTRS = {
+    'translate': ('translateX', 'translateY', 'translateZ'),
+    'rotate': ('rotateX', 'rotateY', 'rotateZ'),
+    'scale': ('scaleX', 'scaleY', 'scaleZ'),
+    'cameraAperture': ('horizontalFilmAperture', 'verticalFilmAperture'),
+}
+DEFAULT_ATTRS = {
+    'transform': collections.OrderedDict([
+        ('visibility', 1.0),
+        ('translateX', 0.0), ('translateY', 0.0), ('translateZ', 0.0),
+        ('rotateX', 0.0), ('rotateY', 0.0), ('rotateZ', 0.0),
+        ('scaleX', 1.0), ('scaleY', 1.0), ('scaleZ', 1.0),
+        ('rotateOrder', 0),
+    ]),
+    'camera': collections.OrderedDict([
+        ('focalLength', 35.0), ('horizontalFilmAperture', 1.417), ('verticalFilmAperture', 0.945),
+        ('startupCamera', False),
+    ]),
+    'resolution': collections.OrderedDict([
+        ('width', 1920), ('height', 1080), ('pixelAspect', 1.0),
+    ]),
+    'mesh': collections.OrderedDict(),
+    'polyPipe': collections.OrderedDict([('subdivisionsAxis', 20)]),
+    'polyExtrudeFace': collections.OrderedDict([('localTranslateZ', 0.0), ('inputComponents', [])]),
+    'shot': collections.OrderedDict([
+        ('startFrame', 1.0), ('endFrame', 100.0), ('sequenceStartFrame', 1.0),
+        ('wResolution', 1920), ('hResolution', 1080), ('currentCamera', ''),
+    ]),
+}
+KEYABLE_ATTRS = {
+    'transform': ['visibility', 'translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ',
+                  'scaleX', 'scaleY', 'scaleZ'],
+    'camera': ['focalLength'],
+}
+
+FRAMES_PER_SECOND = 24.0
+DEGREES_PER_RADIAN = 180.0 / math.pi
+
+
+def _flags(flags):
+    # Turn short flag names into long ones
+    return dict((FLAG_ALIASES.get(name, name), value) for name, value in flags.items())
+
+
+def _short(name):
+    # '|group1|camera1' -> 'camera1'
+    return name.split('|')[-1]
+
+
+def _targets(targets):
+    # Commands take a single name, several names or a list of names
+    result = []
+    for target in targets:
+        if isinstance(target, (list, tuple)):
+            result.extend(target)
+        else:
+            result.append(target)
+    return result
+
+
+def _filter_keys(curve, flags):
+    # The (index, key) pairs of a curve that match the time and index flags of a command
+    time_range = flags.get('time')
+    if isinstance(time_range, (int, float)):
+        time_range = (time_range, time_range)
+    index_range = flags.get('index')
+    if isinstance(index_range, int):
+        index_range = (index_range, index_range)
+
+    return [(index, key) for index, key in enumerate(curve.keys)
+            if (not time_range or time_range[0] <= key[0] <= time_range[1]) and
+            (not index_range or index_range[0] <= index <= index_range[1])]
+
+
+class Node(object):
+    """
+    A node in the fake scene
+    Args:
+        name (str): The (short) name, unique in the scene
+        node_type (str): The Maya node type, eg: 'transform' or 'camera'
+        parent (str): The name of the parent node
+    """
+
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.attrs = copy.deepcopy(DEFAULT_ATTRS.get(node_type, collections.OrderedDict()))
+
+
+class AnimCurve(Node):
+    """
+    A time based animation curve, every key is a [time, value, in tangent type, out tangent type,
+    in angle, out angle] list, where the angles are only used by 'fixed' tangents
+    """
+
+    def __init__(self, name, node_type):
+        Node.__init__(self, name, node_type)
+        self.attrs['preInfinity'] = CurveBounds.INFINITY_CONSTANT
+        self.attrs['postInfinity'] = CurveBounds.INFINITY_CONSTANT
+        self.keys = []
+        self._data = None
+
+    def value_scale(self):
+        # Converts UI units to internal units
+        return 1.0 / DEGREES_PER_RADIAN if self.type == 'animCurveTA' else 1.0
+
+    def changed(self):
+        self.keys.sort(key=lambda key: key[0])
+        self._data = None
+
+    def set_key(self, time, value, in_type='auto', out_type='auto'):
+        time = float(time)
+        index = bisect.bisect_left([key[0] for key in self.keys], time) if self.keys and time <= self.keys[-1][0] \
+            else len(self.keys)
+        added = not (index < len(self.keys) and self.keys[index][0] == time)
+        if added:
+            self.keys.insert(index, [time, float(value), in_type, out_type, 0.0, 0.0])
+        else:
+            self.keys[index][1] = float(value)
+        self._data = None
+        return index, added
+
+    def slopes(self):
+        # The in and out slope of every key, in UI units per frame
+        times = numpy.array([key[0] for key in self.keys])
+        values = numpy.array([key[1] for key in self.keys])
+        count = len(self.keys)
+        in_slopes = numpy.zeros(count)
+        out_slopes = numpy.zeros(count)
+
+        for index, key in enumerate(self.keys):
+            previous_slope = next_slope = None
+            if index > 0:
+                previous_slope = (values[index] - values[index - 1]) / (times[index] - times[index - 1])
+            if index < count - 1:
+                next_slope = (values[index + 1] - values[index]) / (times[index + 1] - times[index])
+
+            for side, tangent_type in [(0, key[2]), (1, key[3])]:
+                if tangent_type == 'linear':
+                    slope = previous_slope if side == 0 else next_slope
+                    slope = slope if slope is not None else (next_slope if side == 0 else previous_slope)
+                elif tangent_type in ('spline', 'auto', 'clamped', 'plateau'):
+                    if previous_slope is not None and next_slope is not None:
+                        slope = (values[index + 1] - values[index - 1]) / (times[index + 1] - times[index - 1])
+                        # Auto tangents don't overshoot, so they are flat on peaks and valleys
+                        if tangent_type != 'spline' and previous_slope * next_slope <= 0.0:
+                            slope = 0.0
+                    elif tangent_type == 'spline':
+                        slope = previous_slope if previous_slope is not None else next_slope
+                    else:
+                        slope = 0.0
+                elif tangent_type == 'fixed':
+                    slope = math.tan(math.radians(key[4 + side])) / self.value_scale() / FRAMES_PER_SECOND
+                else:
+                    # flat, step and stepnext
+                    slope = 0.0
+
+                if side == 0:
+                    in_slopes[index] = slope or 0.0
+                else:
+                    out_slopes[index] = slope or 0.0
+
+        return in_slopes, out_slopes
+
+    def angles(self):
+        # The tangent angles like keyTangent reports them: against time in seconds and internal units
+        in_slopes, out_slopes = self.slopes()
+        factor = FRAMES_PER_SECOND * self.value_scale()
+        return numpy.degrees(numpy.arctan(in_slopes * factor)), numpy.degrees(numpy.arctan(out_slopes * factor))
+
+    def data(self):
+        """
+        The curve as CurveBounds.CurveData, in UI units
+
+        Returns:
+            A CurveBounds.CurveData
+        """
+        if self._data is None:
+            times = [key[0] for key in self.keys]
+            values = [key[1] for key in self.keys]
+            in_slopes, out_slopes = self.slopes()
+            points = CurveBounds.control_points(
+                times, values, numpy.degrees(numpy.arctan(in_slopes)), numpy.degrees(numpy.arctan(out_slopes)))
+            steps = [CurveBounds.STEP if key[3] == 'step' else
+                     CurveBounds.STEP_NEXT if key[3] == 'stepnext' else
+                     CurveBounds.STEP_NONE for key in self.keys]
+            self._data = CurveBounds.CurveData(
+                times, values, *points, steps=steps,
+                pre_infinity=self.attrs['preInfinity'], post_infinity=self.attrs['postInfinity'])
+            self._lists = [getattr(self._data, column).tolist()
+                           for column in ['times', 'values', 'out_y', 'in_y', 'steps']]
+        return self._data
+
+    def evaluate(self, time):
+        # The value at a time, in UI units.
+        # Fake curves are never weighted, so between the keys the bezier's s is linear in time and can be
+        # solved directly, that is a lot faster than a numpy call per time
+        data = self.data()
+        times, values, out_y, in_y, steps = self._lists
+        if len(times) < 2 or not times[0] <= time <= times[-1]:
+            return float(CurveBounds.evaluate_curve(data, numpy.array([float(time)]))[0])
+
+        index = min(bisect.bisect_right(times, time) - 1, len(times) - 2)
+        if time == times[index] or steps[index] == CurveBounds.STEP:
+            return values[index]
+        if time == times[index + 1] or steps[index] == CurveBounds.STEP_NEXT:
+            return values[index + 1]
+
+        s = (time - times[index]) / (times[index + 1] - times[index])
+        t = 1.0 - s
+        return (t * t * t * values[index] + 3.0 * t * t * s * out_y[index] +
+                3.0 * t * s * s * in_y[index + 1] + s * s * s * values[index + 1])
+
+
+class Scene(object):
+    """
+    The fake Maya scene that the fake commands work on
+    Args:
+        latency (float): How many seconds every command takes
+        latencies (dict): Per command latencies, eg: {'getAttr': 0.00005}
+    """
+
+    def __init__(self, latency=0.0, latencies=None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.call_counts = collections.Counter()
+        self.app_dir = tempfile.mkdtemp(prefix='FakeMaya')
+        self.ui = {}
+        self.deferred = []
+        # The fake MPlug class, set by install
+        self.plug_class = None
+        self.new()
+
+    # region Scene state
+
+    def new(self, scene_name=''):
+        self.nodes = collections.OrderedDict()
+        self.connections = {}
+        self.selection = []
+        self.time = 1.0
+        self.playback = [1.0, 120.0]
+        self.scene_name = scene_name
+        self.undo_enabled = True
+        self.undo_depth = 0
+        self.undo_snapshots = []
+        self.refresh_suspended = False
+        self.counters = collections.Counter()
+        # Callback id to (node name, function, client data), see MNodeMessage.addAttributeChangedCallback
+        self.callbacks = collections.OrderedDict()
+        self.next_callback_id = 1
+
+        self.create_node('resolution', 'defaultResolution')
+        for name in ['persp', 'top', 'front', 'side']:
+            self.create_camera(name, startup=True)
+
+    def to_dict(self):
+        nodes = []
+        for node in self.nodes.values():
+            data = {'name': node.name, 'type': node.type, 'parent': node.parent, 'attrs': node.attrs}
+            if isinstance(node, AnimCurve):
+                data['keys'] = node.keys
+            nodes.append(data)
+        return {'nodes': nodes, 'connections': self.connections, 'time': self.time, 'playback': self.playback}
+
+    def from_dict(self, data):
+        self.nodes = collections.OrderedDict()
+        for item in data['nodes']:
+            if item['type'].startswith('animCurve'):
+                node = AnimCurve(item['name'], item['type'])
+                node.keys = item['keys']
+            else:
+                node = Node(item['name'], item['type'], item['parent'])
+            node.attrs.update(item['attrs'])
+            self.nodes[node.name] = node
+        self.connections = dict(data['connections'])
+        self.time = data['time']
+        self.playback = data['playback']
+
+    def save(self, path):
+        with open(path, 'w') as handle:
+            json.dump(self.to_dict(), handle)
+
+    def load(self, path):
+        with open(path) as handle:
+            self.from_dict(json.load(handle))
+        self.selection = []
+        self.scene_name = path
+
+    # endregion
+
+    # region Helpers to build scenes
+
+    def unique_name(self, base, numbered=False):
+        # Names are used as they are when they are free, node type names become 'camera1', 'camera2', ...
+        if base not in self.nodes and not numbered:
+            return base
+        while True:
+            self.counters[base] += 1
+            name = '{}{}'.format(base, self.counters[base])
+            if name not in self.nodes:
+                return name
+
+    def create_node(self, node_type, name=None, parent=None, numbered=False):
+        name = self.unique_name(name or node_type, numbered=numbered or name is None)
+        if node_type.startswith('animCurve'):
+            node = AnimCurve(name, node_type)
+        else:
+            node = Node(name, node_type, parent and _short(parent))
+        self.nodes[name] = node
+        return name
+
+    def create_camera(self, name='camera', startup=False, **attrs):
+        """
+        Creates a camera transform with a camera shape
+        Args:
+            name (str): The name of the transform
+            startup (bool): If it is one of the default persp, top, front and side cameras
+            attrs: Initial attribute values for the transform or the shape, eg: focalLength=50
+
+        Returns:
+            The long name of the transform
+        """
+        transform = self.create_node('transform', name, numbered=name == 'camera')
+        # Like Maya: camera1 -> cameraShape1, shotCam -> shotCamShape
+        base = transform.rstrip('0123456789')
+        shape = self.create_node('camera', base + 'Shape' + transform[len(base):], parent=transform)
+        self.nodes[shape].attrs['startupCamera'] = startup
+        for attr, value in attrs.items():
+            node = self.nodes[shape] if attr in self.nodes[shape].attrs else self.nodes[transform]
+            node.attrs[attr] = value
+        return self.long_name(transform)
+
+    def set_keys(self, attr_name, times, values, tangent='auto'):
+        """
+        Keys an attribute in one go, much faster than one setKeyframe per key
+        Args:
+            attr_name (str): The full attribute name
+            times (list): The key times
+            values (list): The key values
+            tangent (str): The in and out tangent type of every key
+
+        Returns:
+            The name of the animation curve
+        """
+        curve = self.get_curve(attr_name, create=True)
+        existing = dict((key[0], key) for key in curve.keys)
+        for key_time, value in zip(times, values):
+            existing[float(key_time)] = [float(key_time), float(value), tangent, tangent, 0.0, 0.0]
+        curve.keys = list(existing.values())
+        curve.changed()
+        return curve.name
+
+    def select(self, *names):
+        self.selection = [self.long_name(_short(name)) if _short(name) in self.nodes else name
+                          for name in _targets(names)]
+
+    # endregion
+
+    # region Lookups
+
+    def node(self, name):
+        short = _short(name)
+        if short not in self.nodes:
+            raise ValueError('No object matches name: {}'.format(name))
+        return self.nodes[short]
+
+    def long_name(self, name):
+        node = self.node(name)
+        path = [node.name]
+        while node.parent:
+            node = self.nodes[node.parent]
+            path.insert(0, node.name)
+        return '|' + '|'.join(path)
+
+    def split(self, attr_name):
+        # 'node.attr' -> (Node, 'attr')
+        if '.' not in attr_name:
+            raise ValueError('No attribute given: {}'.format(attr_name))
+        node_name, attr = attr_name.split('.', 1)
+        return self.node(node_name), attr
+
+    def plug_key(self, node, attr):
+        return '{}.{}'.format(node.name, attr)
+
+    def get_curve(self, attr_name, create=False):
+        node, attr = self.split(attr_name)
+        if isinstance(node, AnimCurve):
+            return node
+
+        curve_name = self.connections.get(self.plug_key(node, attr))
+        if curve_name is None and create:
+            curve_type = 'animCurveTA' if attr in ANGLE_ATTRS else 'animCurveTL' if attr in DISTANCE_ATTRS else 'animCurveTU'
+            curve_name = self.create_node(curve_type, '{}_{}'.format(node.name, attr))
+            self.connections[self.plug_key(node, attr)] = curve_name
+            self.notify(node.name, attr, MNodeMessage.kConnectionMade)
+        return self.nodes[curve_name] if curve_name else None
+
+    def curves_for(self, targets, attribute=None):
+        # The curves of 'node.attr' names, curve names, or nodes (optionally limited to some attributes)
+        attributes = [attribute] if isinstance(attribute, str) else attribute
+        curves = []
+        for target in _targets(targets):
+            node = self.node(target.split('.', 1)[0])
+            if isinstance(node, AnimCurve):
+                curves.append(node)
+            elif '.' in target:
+                curve = self.get_curve(target)
+                if curve is not None:
+                    curves.append(curve)
+            else:
+                for attr in attributes or list(node.attrs.keys()):
+                    curve = self.get_curve('{}.{}'.format(node.name, attr))
+                    if curve is not None:
+                        curves.append(curve)
+        return curves
+
+    def plug_of(self, curve):
+        # The 'node.attr' a curve drives
+        for plug, curve_name in self.connections.items():
+            if curve_name == curve.name:
+                return plug
+        return None
+
+    # endregion
+
+    # region Values
+
+    def value(self, node, attr, time=None):
+        """
+        Gets a value in UI units, evaluating animation curves and computed matrices
+        """
+        time = self.time if time is None else float(time)
+        attr = attr.replace('[0]', '')
+
+        if attr in ('worldMatrix', 'parentMatrix', 'matrix'):
+            return self.matrix(node, attr, time).reshape(-1).tolist()
+        if attr in COMPOUND_ATTRS:
+            return [tuple(self.value(node, child, time) for child in COMPOUND_ATTRS[attr])]
+
+        curve_name = self.connections.get(self.plug_key(node, attr))
+        if curve_name is not None:
+            return self.nodes[curve_name].evaluate(time)
+        if attr not in node.attrs:
+            raise ValueError('No attribute named {}.{}'.format(node.name, attr))
+        return node.attrs[attr]
+
+    def local_matrix(self, node, time):
+        if node.type != 'transform':
+            return numpy.identity(4)
+
+        value = lambda attr: self.value(node, attr, time)
+        matrix = numpy.identity(4)
+        matrix[:3, :3] = numpy.diag([value('scaleX'), value('scaleY'), value('scaleZ')]).dot(
+            FrustumSolver.euler_to_matrix(value('rotateX'), value('rotateY'), value('rotateZ'),
+                                          FrustumSolver.ROTATE_ORDERS[int(node.attrs['rotateOrder'])]))
+        matrix[3, :3] = [value('translateX'), value('translateY'), value('translateZ')]
+        return matrix
+
+    def matrix(self, node, attr, time):
+        # Row vector matrices, like Maya
+        parent = numpy.identity(4)
+        ancestor = node
+        while ancestor.parent:
+            ancestor = self.nodes[ancestor.parent]
+            parent = parent.dot(self.local_matrix(ancestor, time))
+
+        if attr == 'parentMatrix':
+            return parent
+        if attr == 'matrix':
+            return self.local_matrix(node, time)
+        return self.local_matrix(node, time).dot(parent)
+
+    # endregion
+
+    # region Undo
+
+    def open_chunk(self):
+        if self.undo_depth == 0 and self.undo_enabled:
+            self.undo_snapshots.append(copy.deepcopy((self.nodes, self.connections)))
+        self.undo_depth += 1
+
+    def close_chunk(self):
+        self.undo_depth = max(self.undo_depth - 1, 0)
+
+    def undo(self):
+        # Only whole chunks can be undone in the fake scene
+        if self.undo_snapshots:
+            self.nodes, self.connections = self.undo_snapshots.pop()
+
+    # endregion
+
+    def notify(self, node_name, attr, message, index=None):
+        # Calls the attribute changed callbacks of a node, like Maya does when one of its plugs changes
+        for callback_node, function, client_data in list(self.callbacks.values()):
+            if callback_node == node_name and node_name in self.nodes:
+                plug = self.plug_class(self.nodes[node_name], attr, index)
+                function(message, plug, self.plug_class(), client_data)
+
+    def notify_keys(self, curve, indices, message=None):
+        for index in indices:
+            self.notify(curve.name, 'keyTimeValue', message or MNodeMessage.kAttributeSet, index)
+
+    def wait(self, command):
+        # Busy wait, sleep isn't precise enough for sub-millisecond latencies
+        latency = self.latencies.get(command, self.latency)
+        if latency > 0.0:
+            end = _time.time() + latency
+            while _time.time() < end:
+                pass
+
+    def run_deferred(self):
+        # Runs everything that was queued with maya.utils.executeDeferred, like Maya does when it is idle
+        while self.deferred:
+            function, args, kwargs = self.deferred.pop(0)
+            function(*args, **kwargs)
+
+
+class Commands(object):
+    """
+    The fake maya.cmds commands, every public method becomes a function of the fake maya.cmds module
+    Args:
+        scene (Scene): The scene the commands work on
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+
+    # region Nodes and selection
+
+    def ls(self, *names, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('selection'):
+            result = list(scene.selection)
+        elif names:
+            result = [name for name in _targets(names) if _short(name.split('.')[0]) in scene.nodes]
+        else:
+            result = [scene.long_name(name) for name in scene.nodes]
+
+        node_type = flags.get('type')
+        if node_type:
+            types_ = [node_type] if isinstance(node_type, str) else node_type
+            result = [name for name in result if _short(name) in scene.nodes and
+                      any(scene.nodes[_short(name)].type.startswith(item) for item in types_)]
+
+        if flags.get('long'):
+            result = [scene.long_name(name) if _short(name) in scene.nodes else
+                      scene.long_name(name.split('.', 1)[0]) + '.' + name.split('.', 1)[1]
+                      if '.' in name and _short(name.split('.', 1)[0]) in scene.nodes else name
+                      for name in result]
+        else:
+            result = [_short(name) if _short(name) in scene.nodes else name for name in result]
+        return result
+
+    def select(self, *names, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('clear'):
+            scene.selection = []
+            return
+        if flags.get('add'):
+            scene.selection.extend(_targets(names))
+        else:
+            scene.select(*names)
+
+    def listRelatives(self, name, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        node = scene.node(name)
+
+        if flags.get('parent'):
+            result = [node.parent] if node.parent else []
+        else:
+            result = [child.name for child in scene.nodes.values() if child.parent == node.name]
+            if flags.get('shapes'):
+                result = [child for child in result if scene.nodes[child].type != 'transform']
+            if flags.get('type'):
+                result = [child for child in result if scene.nodes[child].type == flags['type']]
+
+        if not result:
+            return None
+        if flags.get('fullPath'):
+            return [scene.long_name(child) for child in result]
+        return result
+
+    def listAttr(self, name, **flags):
+        flags = _flags(flags)
+        node = self.scene.node(name)
+        if flags.get('keyable'):
+            return list(KEYABLE_ATTRS.get(node.type, []))
+        return list(node.attrs.keys())
+
+    def listConnections(self, *names, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        result = []
+        for name in _targets(names):
+            if '.' in name and flags.get('source', True):
+                # The curve that drives a plug, the only inputs of the fake scene
+                node, attr = scene.split(name)
+                curve_name = scene.connections.get(scene.plug_key(node, attr))
+                if curve_name is None:
+                    continue
+                source = '{}.output'.format(curve_name) if flags.get('plugs') else curve_name
+                if flags.get('connections'):
+                    result.extend(['{}.{}'.format(node.name, attr), source])
+                else:
+                    result.append(source)
+                continue
+
+            curve = scene.node(name)
+            plug = scene.plug_of(curve) if isinstance(curve, AnimCurve) else None
+            if plug is None:
+                continue
+            node_name, attr = plug.split('.', 1)
+            destination = '{}.{}'.format(node_name, attr) if flags.get('plugs') else node_name
+            if flags.get('connections'):
+                result.extend(['{}.output'.format(curve.name), destination])
+            else:
+                result.append(destination)
+        return result or None
+
+    def nodeType(self, name):
+        return self.scene.node(name.split('.')[0]).type
+
+    def objExists(self, name):
+        try:
+            node, attr = self.scene.split(name) if '.' in name else (self.scene.node(name), None)
+        except ValueError:
+            return False
+        return attr is None or attr.replace('[0]', '') in node.attrs or attr in COMPOUND_ATTRS
+
+    def createNode(self, node_type, **flags):
+        flags = _flags(flags)
+        return self.scene.create_node(node_type, flags.get('name'), flags.get('parent'))
+
+    def camera(self, name=None, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            node = self.scene.node(name)
+            if node.type == 'transform':
+                node = self.scene.nodes[self.listRelatives(node.name, shapes=True)[0]]
+            return node.attrs.get('startupCamera', False)
+
+        transform = _short(self.scene.create_camera())
+        return [transform, self.listRelatives(transform, shapes=True)[0]]
+
+    def shot(self, name=None, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            node = self.scene.node(name)
+            if flags.get('currentCamera'):
+                return node.attrs['currentCamera'] or None
+            if flags.get('startTime'):
+                return node.attrs['startFrame']
+            if flags.get('endTime'):
+                return node.attrs['endFrame']
+            return None
+
+        node = self.scene.nodes[self.scene.create_node('shot', name, numbered=name is None)]
+        for attr, flag in [('startFrame', 'startTime'), ('endFrame', 'endTime'), ('currentCamera', 'currentCamera')]:
+            if flag in flags:
+                node.attrs[attr] = flags[flag]
+        return node.name
+
+    # endregion
+
+    # region Attributes
+
+    def getAttr(self, name, **flags):
+        flags = _flags(flags)
+        node, attr = self.scene.split(name)
+        if flags.get('settable'):
+            # Nothing but animation curves drives attributes here, and keyed attributes can be set
+            return attr in node.attrs or attr in COMPOUND_ATTRS
+        return self.scene.value(node, attr, flags.get('time'))
+
+    def setAttr(self, name, *values, **flags):
+        flags = _flags(flags)
+        node, attr = self.scene.split(name)
+
+        if flags.get('type') == 'componentList':
+            node.attrs[attr] = list(values[1:])
+        elif attr in COMPOUND_ATTRS:
+            for child, value in zip(COMPOUND_ATTRS[attr], values):
+                node.attrs[child] = value
+        else:
+            if attr not in node.attrs:
+                raise RuntimeError('No attribute named {}'.format(name))
+            node.attrs[attr] = values[0]
+        self.scene.notify(node.name, attr, MNodeMessage.kAttributeSet)
+
+    # endregion
+
+    # region Animation
+
+    def currentTime(self, *values, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            return self.scene.time
+        self.scene.time = float(values[0])
+        return self.scene.time
+
+    def playbackOptions(self, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            return self.scene.playback[0] if flags.get('minTime') else self.scene.playback[1]
+        if 'minTime' in flags:
+            self.scene.playback[0] = float(flags['minTime'])
+        if 'maxTime' in flags:
+            self.scene.playback[1] = float(flags['maxTime'])
+
+    def currentUnit(self, **flags):
+        flags = _flags(flags)
+        if flags.get('time'):
+            return 'film'
+        if flags.get('angle'):
+            return 'deg'
+        return 'cm'
+
+    def keyframe(self, *targets, **flags):
+        flags = _flags(flags)
+        curves = self.scene.curves_for(targets or self.scene.selection, flags.get('attribute'))
+
+        if flags.get('name'):
+            return [curve.name for curve in curves] or None
+        if flags.get('keyframeCount'):
+            return sum(len(curve.keys) for curve in curves)
+
+        if not flags.get('query'):
+            # Edit the keys, only absolute changes are supported
+            edited = 0
+            for curve in curves:
+                keys = [key for _, key in _filter_keys(curve, flags)]
+                for key in keys:
+                    if 'timeChange' in flags:
+                        key[0] = float(flags['timeChange'])
+                    if 'valueChange' in flags:
+                        key[1] = float(flags['valueChange'])
+                curve.changed()
+                self.scene.notify_keys(curve, [curve.keys.index(key) for key in keys])
+                edited += len(keys)
+            return edited
+
+        result = []
+        for curve in curves:
+            for index, key in _filter_keys(curve, flags):
+                if flags.get('indexValue'):
+                    result.append(index)
+                elif flags.get('timeChange') and flags.get('valueChange'):
+                    result.extend([key[0], key[1]])
+                elif flags.get('valueChange'):
+                    result.append(key[1])
+                else:
+                    result.append(key[0])
+
+        return result or None
+
+    def keyTangent(self, *targets, **flags):
+        flags = _flags(flags)
+        curves = self.scene.curves_for(targets or self.scene.selection, flags.get('attribute'))
+
+        if flags.get('query'):
+            result = []
+            for curve in curves:
+                if flags.get('weightedTangents'):
+                    result.append(False)
+                    continue
+
+                in_angles, out_angles = curve.angles()
+                for index, key in _filter_keys(curve, flags):
+                    if flags.get('inAngle'):
+                        result.append(float(in_angles[index]))
+                    elif flags.get('outAngle'):
+                        result.append(float(out_angles[index]))
+                    elif flags.get('inWeight') or flags.get('outWeight'):
+                        result.append(1.0)
+                    elif flags.get('inTangentType'):
+                        result.append(key[2])
+                    elif flags.get('outTangentType'):
+                        result.append(key[3])
+            return result
+
+        for curve in curves:
+            filtered = _filter_keys(curve, flags)
+            for _, key in filtered:
+                if 'inTangentType' in flags:
+                    key[2] = flags['inTangentType']
+                if 'outTangentType' in flags:
+                    key[3] = flags['outTangentType']
+                if 'inAngle' in flags:
+                    key[2], key[4] = 'fixed', float(flags['inAngle'])
+                if 'outAngle' in flags:
+                    key[3], key[5] = 'fixed', float(flags['outAngle'])
+            curve.changed()
+            self.scene.notify_keys(curve, [index for index, _ in filtered])
+
+    def setKeyframe(self, *targets, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        key_time = flags.get('time', scene.time)
+        if isinstance(key_time, (list, tuple)):
+            key_time = key_time[0]
+
+        attr_names = []
+        for target in _targets(targets) or scene.selection:
+            if '.' in target:
+                attr_names.append(target)
+            else:
+                attributes = flags.get('attribute') or KEYABLE_ATTRS.get(scene.node(target).type, [])
+                attributes = [attributes] if isinstance(attributes, str) else attributes
+                attr_names.extend('{}.{}'.format(target, attr) for attr in attributes)
+
+        for attr_name in attr_names:
+            node, attr = scene.split(attr_name)
+            value = flags['value'] if 'value' in flags else scene.value(node, attr, key_time)
+            curve = scene.get_curve(attr_name, create=True)
+            index, added = curve.set_key(
+                key_time, value, flags.get('inTangentType', 'auto'), flags.get('outTangentType', 'auto'))
+            scene.notify_keys(curve, [index], MNodeMessage.kAttributeArrayAdded if added else None)
+        return len(attr_names)
+
+    def cutKey(self, *targets, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        time_range = flags.get('time')
+        curves = scene.curves_for(targets or scene.selection, flags.get('attribute'))
+
+        for curve in curves:
+            remaining = [key for key in curve.keys
+                         if time_range and not time_range[0] <= key[0] <= time_range[1]]
+            if remaining:
+                removed = len(curve.keys) - len(remaining)
+                curve.keys = remaining
+                curve.changed()
+                if removed:
+                    scene.notify_keys(curve, [len(remaining)], MNodeMessage.kAttributeArrayRemoved)
+                continue
+
+            # Without keys the curve is deleted and the attribute keeps its current value
+            plug = scene.plug_of(curve)
+            if plug:
+                node, attr = scene.split(plug)
+                node.attrs[attr] = curve.evaluate(scene.time)
+                del scene.connections[plug]
+                scene.notify(node.name, attr, MNodeMessage.kConnectionBroken)
+            del scene.nodes[curve.name]
+        return len(curves)
+
+    # endregion
+
+    # region Undo and refresh
+
+    def undoInfo(self, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('query'):
+            return scene.undo_enabled
+        if flags.get('openChunk'):
+            scene.open_chunk()
+        if flags.get('closeChunk'):
+            scene.close_chunk()
+        if 'state' in flags:
+            scene.undo_enabled = bool(flags['state'])
+
+    def undo(self):
+        self.scene.undo()
+
+    def refresh(self, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            return self.scene.refresh_suspended
+        if 'suspend' in flags:
+            self.scene.refresh_suspended = bool(flags['suspend'])
+
+    # endregion
+
+    # region Files
+
+    def internalVar(self, **flags):
+        return self.scene.app_dir + '/'
+
+    def file(self, *paths, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('query'):
+            return scene.scene_name
+        if flags.get('new'):
+            scene.new()
+        elif flags.get('open'):
+            if not os.path.exists(paths[0]):
+                raise RuntimeError('File not found: {}'.format(paths[0]))
+            scene.load(paths[0])
+        elif 'rename' in flags:
+            scene.scene_name = flags['rename']
+        elif flags.get('save'):
+            scene.save(scene.scene_name)
+        elif flags.get('exportSelected'):
+            scene.save(scene.scene_name)
+        return scene.scene_name
+
+    # endregion
+
+    # region Modeling
+
+    def polyPipe(self, *names, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('edit'):
+            scene.node(names[0]).attrs.update(
+                (name, value) for name, value in flags.items() if name != 'edit')
+            return None
+
+        transform = scene.create_node('transform', 'pPipe', numbered=True)
+        scene.create_node('mesh', transform.replace('pPipe', 'pPipeShape'), parent=transform)
+        constructor = scene.create_node('polyPipe')
+        scene.nodes[constructor].attrs['subdivisionsAxis'] = flags.get('subdivisionsAxis', 20)
+        return [transform, constructor]
+
+    def polyExtrudeFacet(self, *names, **flags):
+        flags = _flags(flags)
+        scene = self.scene
+        if flags.get('edit'):
+            scene.node(names[0]).attrs['localTranslateZ'] = flags.get('localTranslateZ', 0.0)
+            return None
+
+        extrude = scene.create_node('polyExtrudeFace')
+        scene.nodes[extrude].attrs['localTranslateZ'] = flags.get('localTranslateZ', 0.0)
+        scene.nodes[extrude].attrs['inputComponents'] = [
+            name.split('.', 1)[1] for name in scene.selection if '.' in name]
+        return [extrude]
+
+    # endregion
+
+    # region UI
+
+    def window(self, name=None, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            return name in self.scene.ui
+        name = name or 'window{}'.format(len(self.scene.ui) + 1)
+        self.scene.ui[name] = flags
+        return name
+
+    def headsUpDisplay(self, name=None, **flags):
+        flags = _flags(flags)
+        huds = self.scene.ui.setdefault('headsUpDisplay', {})
+        if flags.get('exists'):
+            return name in huds
+        if flags.get('nextFreeBlock') is not None and name is None:
+            return len(huds)
+        if flags.get('remove'):
+            huds.pop(name, None)
+        elif flags.get('refresh'):
+            # Like the viewport does, ask the command for the text to show
+            huds[name]['text'] = huds[name]['command']()
+        else:
+            huds[name] = flags
+            huds[name]['text'] = flags['command']() if flags.get('command') else flags.get('label', '')
+        return name
+
+    def deleteUI(self, name):
+        self.scene.ui.pop(name, None)
+
+    def showWindow(self, *names):
+        pass
+
+    def setParent(self, *names):
+        pass
+
+    def _control(self, control_type, name=None, **flags):
+        flags = _flags(flags)
+        if flags.get('query'):
+            return self.scene.ui[name].get('value')
+        if flags.get('edit'):
+            self.scene.ui[name].update(flags)
+            return name
+        name = name or '{}{}'.format(control_type, len(self.scene.ui) + 1)
+        self.scene.ui[name] = flags
+        return name
+
+    def columnLayout(self, *names, **flags):
+        return self._control('columnLayout', *names, **flags)
+
+    def rowLayout(self, *names, **flags):
+        return self._control('rowLayout', *names, **flags)
+
+    def text(self, *names, **flags):
+        return self._control('text', *names, **flags)
+
+    def button(self, *names, **flags):
+        return self._control('button', *names, **flags)
+
+    def floatSlider(self, *names, **flags):
+        return self._control('floatSlider', *names, **flags)
+
+    # endregion
+
+
+# region Fake OpenMaya
+
+class MFn(object):
+    kAnimCurve = 'kAnimCurve'
+    kUnitAttribute = 'kUnitAttribute'
+    kTransform = 'kTransform'
+    kCamera = 'kCamera'
+
+
+class MNodeMessage(object):
+    kConnectionMade = 0x01
+    kConnectionBroken = 0x02
+    kAttributeSet = 0x08
+    kAttributeArrayAdded = 0x800
+    kAttributeArrayRemoved = 0x1000
+
+
+class MObject(object):
+    def __init__(self, node=None, attr=None):
+        self.node = node
+        self.attr = attr
+
+    def hasFn(self, function_type):
+        if self.attr is not None:
+            return function_type == MFn.kUnitAttribute and self.attr in ANGLE_ATTRS + DISTANCE_ATTRS
+        if function_type == MFn.kAnimCurve:
+            return isinstance(self.node, AnimCurve)
+        return function_type == {'transform': MFn.kTransform, 'camera': MFn.kCamera}.get(self.node.type)
+
+
+class MTime(object):
+    kSeconds = 'seconds'
+    kFilm = 'film'
+    UNITS = {'seconds': 1.0, 'film': FRAMES_PER_SECOND}
+
+    def __init__(self, value=0.0, unit='film'):
+        self._value = float(value)
+        self._unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    def value(self):
+        return self._value
+
+    def asUnits(self, unit):
+        return self._value / self.UNITS[self._unit] * self.UNITS[unit]
+
+
+class MAngle(object):
+    kRadians = 'radians'
+    kDegrees = 'degrees'
+    UNITS = {'radians': 1.0, 'degrees': DEGREES_PER_RADIAN}
+
+    def __init__(self, value=0.0, unit='radians'):
+        self._value = float(value)
+        self._unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MAngle.kDegrees
+
+    def asUnits(self, unit):
+        return self._value / self.UNITS[self._unit] * self.UNITS[unit]
+
+
+class MDistance(object):
+    kCentimeters = 'centimeters'
+    kMeters = 'meters'
+    UNITS = {'centimeters': 1.0, 'meters': 0.01}
+
+    def __init__(self, value=0.0, unit='centimeters'):
+        self._value = float(value)
+        self._unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MDistance.kCentimeters
+
+    def asUnits(self, unit):
+        return self._value / self.UNITS[self._unit] * self.UNITS[unit]
+
+
+class MDGContext(object):
+    def __init__(self, time=None):
+        self.time = time
+
+
+class MMatrix(object):
+    def __init__(self, values=None):
+        self.values = numpy.identity(4) if values is None else numpy.asarray(values, dtype=float).reshape(4, 4)
+
+    def __call__(self, row, column):
+        return float(self.values[row, column])
+
+
+class MFnMatrixData(object):
+    def __init__(self, data):
+        self.data = data
+
+    def matrix(self):
+        return MMatrix(self.data)
+
+
+class MFnUnitAttribute(object):
+    kAngle = 'angle'
+    kDistance = 'distance'
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+
+    def unitType(self):
+        return self.kAngle if self.attribute.attr in ANGLE_ATTRS else self.kDistance
+
+
+class MPlugArray(object):
+    def __init__(self):
+        self.plugs = []
+
+    def length(self):
+        return len(self.plugs)
+
+    def __getitem__(self, index):
+        return self.plugs[index]
+
+
+def _make_plug_class(scene):
+    class MPlug(object):
+        def __init__(self, node=None, attr=None, index=None):
+            self._node = node
+            self._attr = attr
+            self._index = index
+
+        def name(self):
+            if self._index is not None:
+                return '{}.{}[{}]'.format(self._node.name, self._attr, self._index)
+            return '{}.{}'.format(self._node.name, self._attr)
+
+        def isNull(self):
+            return self._node is None
+
+        def isElement(self):
+            return self._index is not None
+
+        def logicalIndex(self):
+            return self._index
+
+        def isChild(self):
+            return False
+
+        def node(self):
+            return MObject(self._node)
+
+        def attribute(self):
+            return MObject(attr=self._attr)
+
+        def connectedTo(self, array, as_destination, as_source):
+            curve_name = scene.connections.get(scene.plug_key(self._node, self._attr))
+            if as_destination and curve_name:
+                array.plugs.append(MPlug(scene.nodes[curve_name], 'output'))
+
+        def _time(self, context):
+            if context is None or context.time is None:
+                return scene.time
+            return context.time.asUnits(MTime.kFilm)
+
+        def asDouble(self, context=None):
+            # Internal units, like the real API
+            value = scene.value(self._node, self._attr, self._time(context))
+            if self._attr in ANGLE_ATTRS:
+                value /= DEGREES_PER_RADIAN
+            return float(value)
+
+        def asMObject(self, context=None):
+            return scene.value(self._node, self._attr, self._time(context))
+
+    return MPlug
+
+
+def _make_selection_list_class(scene, plug_class):
+    class MSelectionList(object):
+        def __init__(self):
+            self.items = []
+
+        def add(self, name):
+            scene.split(name) if '.' in name else scene.node(name)
+            self.items.append(name)
+
+        def length(self):
+            return len(self.items)
+
+        def getDependNode(self, index, node):
+            node.node = scene.node(self.items[index])
+
+        def getPlug(self, index, plug):
+            node, attr = scene.split(self.items[index])
+            plug._node = node
+            plug._attr = attr
+
+    return MSelectionList
+
+
+def _make_message_classes(scene):
+    class NodeMessage(MNodeMessage):
+        @staticmethod
+        def addAttributeChangedCallback(node, function, client_data=None):
+            callback_id = scene.next_callback_id
+            scene.next_callback_id += 1
+            scene.callbacks[callback_id] = (node.node.name, function, client_data)
+            return callback_id
+
+    class MMessage(object):
+        @staticmethod
+        def removeCallback(callback_id):
+            scene.callbacks.pop(callback_id, None)
+
+    return NodeMessage, MMessage
+
+
+def _make_anim_curve_class(scene):
+    class MFnAnimCurve(object):
+        kAnimCurveTA = 'animCurveTA'
+        kAnimCurveTL = 'animCurveTL'
+        kAnimCurveTT = 'animCurveTT'
+        kAnimCurveTU = 'animCurveTU'
+
+        def __init__(self, item=None):
+            if isinstance(item, MObject):
+                self.curve = item.node
+            else:
+                # An MPlug, attach to the curve driving it
+                curve_name = scene.connections.get(scene.plug_key(item._node, item._attr))
+                if curve_name is None:
+                    raise RuntimeError('(kInvalidParameter): No animation curve connected')
+                self.curve = scene.nodes[curve_name]
+
+        def isTimeInput(self):
+            return True
+
+        def animCurveType(self):
+            return self.curve.type
+
+        def numKeys(self):
+            return len(self.curve.keys)
+
+        def time(self, index):
+            return MTime(self.curve.keys[index][0])
+
+        def value(self, index):
+            return self.curve.keys[index][1] * self.curve.value_scale()
+
+        def findClosest(self, time):
+            times = numpy.array([key[0] for key in self.curve.keys])
+            return int(numpy.argmin(numpy.abs(times - time.asUnits(MTime.kFilm))))
+
+        def evaluate(self, time):
+            # Internal units, like the real API
+            return self.curve.evaluate(time.asUnits(MTime.kFilm)) * self.curve.value_scale()
+
+    return MFnAnimCurve
+
+# endregion
+
+
+_ORIGINAL_MODULES = {}
+MODULE_NAMES = ['maya', 'maya.cmds', 'maya.OpenMaya', 'maya.OpenMayaAnim', 'maya.standalone', 'maya.utils']
+
+
+def _commands_module(scene):
+    # Wrap every command so it counts its calls and takes the configured latency
+    commands = Commands(scene)
+    module = types.ModuleType('maya.cmds')
+
+    def wrap(name, function):
+        def command(*args, **kwargs):
+            scene.call_counts[name] += 1
+            scene.wait(name)
+            return function(*args, **kwargs)
+        command.__name__ = name
+        return command
+
+    for name in dir(commands):
+        if not name.startswith('_') and name != 'scene':
+            setattr(module, name, wrap(name, getattr(commands, name)))
+    return module
+
+
+def install(scene=None, latency=0.0, latencies=None):
+    """
+    Puts the fake maya modules in sys.modules, so 'from maya import cmds' imports the fake commands
+    Args:
+        scene (Scene): The scene to use, a new one is made if this isn't given
+        latency (float): How many seconds every command takes
+        latencies (dict): Per command latencies, eg: {'getAttr': 0.00005}
+
+    Returns:
+        The Scene
+    """
+    scene = scene or Scene(latency=latency, latencies=latencies)
+
+    for name in MODULE_NAMES:
+        if name not in _ORIGINAL_MODULES:
+            _ORIGINAL_MODULES[name] = sys.modules.get(name)
+
+    maya = types.ModuleType('maya')
+    maya.__path__ = []
+    cmds = _commands_module(scene)
+
+    open_maya = types.ModuleType('maya.OpenMaya')
+    plug_class = _make_plug_class(scene)
+    for item in [MFn, MObject, MTime, MAngle, MDistance, MDGContext, MMatrix, MFnMatrixData,
+                 MFnUnitAttribute, MPlugArray]:
+        setattr(open_maya, item.__name__, item)
+    open_maya.MPlug = plug_class
+    open_maya.MNodeMessage, open_maya.MMessage = _make_message_classes(scene)
+    scene.plug_class = plug_class
+    open_maya.MSelectionList = _make_selection_list_class(scene, plug_class)
+
+    open_maya_anim = types.ModuleType('maya.OpenMayaAnim')
+    open_maya_anim.MFnAnimCurve = _make_anim_curve_class(scene)
+
+    standalone = types.ModuleType('maya.standalone')
+    standalone.initialize = lambda name='python': None
+    standalone.uninitialize = lambda: None
+
+    utils = types.ModuleType('maya.utils')
+    utils.executeDeferred = lambda function, *args, **kwargs: scene.deferred.append((function, args, kwargs))
+
+    maya.cmds = cmds
+    maya.OpenMaya = open_maya
+    maya.OpenMayaAnim = open_maya_anim
+    maya.standalone = standalone
+    maya.utils = utils
+    maya.scene = scene
+
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = cmds
+    sys.modules['maya.OpenMaya'] = open_maya
+    sys.modules['maya.OpenMayaAnim'] = open_maya_anim
+    sys.modules['maya.standalone'] = standalone
+    sys.modules['maya.utils'] = utils
+    return scene
+
+
+def uninstall():
+    # Puts back whatever was in sys.modules before install
+    for name, module in _ORIGINAL_MODULES.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    _ORIGINAL_MODULES.clear()
+
+
+def current_scene():
+    # The scene of the installed fake, eg: for a --setup module of the batch runner
+    return sys.modules['maya'].scene
@@ -0,0 +1,169 @@
+import numpy
+
+# Maya's rotateOrder enum
+ROTATE_ORDERS = ['xyz', 'yzx', 'zxy', 'xzy', 'yxz', 'zyx']
+
+
+def euler_to_matrix(rotate_x, rotate_y, rotate_z, rotate_order='xyz'):
+    """
+    Builds rotation matrices from euler angles, the same way Maya does (row vectors, first axis applied first)
+    Args:
+        rotate_x (numpy.ndarray): The rotateX values in degrees
+        rotate_y (numpy.ndarray): The rotateY values in degrees
+        rotate_z (numpy.ndarray): The rotateZ values in degrees
+        rotate_order (str): The rotate order, eg: 'xyz'
+
+    Returns:
+        A numpy array of shape (..., 3, 3)
+    """
+    rotate_x, rotate_y, rotate_z = numpy.broadcast_arrays(
+        numpy.radians(rotate_x), numpy.radians(rotate_y), numpy.radians(rotate_z))
+
+    def axis_matrix(angle, first, second):
+        matrix = numpy.zeros(angle.shape + (3, 3))
+        matrix[..., 3 - first - second, 3 - first - second] = 1.0
+        matrix[..., first, first] = numpy.cos(angle)
+        matrix[..., first, second] = numpy.sin(angle)
+        matrix[..., second, first] = -numpy.sin(angle)
+        matrix[..., second, second] = numpy.cos(angle)
+        return matrix
+
+    matrices = {
+        'x': axis_matrix(rotate_x, 1, 2),
+        'y': axis_matrix(rotate_y, 2, 0),
+        'z': axis_matrix(rotate_z, 0, 1),
+    }
+
+    result = matrices[rotate_order[0]]
+    for axis in rotate_order[1:]:
+        result = numpy.matmul(result, matrices[axis])
+    return result
+
+
+def matrix_to_euler(rotations, rotate_order='xyz'):
+    """
+    Gets the euler angles of rotation matrices, the inverse of euler_to_matrix
+    Args:
+        rotations (numpy.ndarray): Pure rotation matrices of shape (..., 3, 3)
+        rotate_order (str): The rotate order, eg: 'xyz'
+
+    Returns:
+        A numpy array of shape (..., 3) with the rotateX, rotateY and rotateZ values in degrees
+    """
+    rotations = numpy.asarray(rotations, dtype=numpy.float64)
+    first, second, third = ['xyz'.index(axis) for axis in rotate_order]
+
+    # Orders like xzy turn the other way around, which flips the signs
+    sign = 1.0 if (second - first) % 3 == 1 else -1.0
+
+    angles = numpy.empty(rotations.shape[:-2] + (3,))
+    angles[..., second] = numpy.arcsin(
+        numpy.clip(-sign * rotations[..., first, third], -1.0, 1.0))
+    angles[..., third] = numpy.arctan2(
+        sign * rotations[..., first, second], rotations[..., first, first])
+    angles[..., first] = numpy.arctan2(
+        sign * rotations[..., second, third], rotations[..., third, third])
+    return numpy.degrees(angles)
+
+
+def split_matrices(matrices):
+    """
+    Splits 4x4 transform matrices into pure rotations (without scale or shear) and positions
+    Args:
+        matrices (numpy.ndarray): Maya matrices of shape (..., 4, 4)
+
+    Returns:
+        A tuple of the rotations (..., 3, 3) and positions (..., 3)
+    """
+    matrices = numpy.asarray(matrices, dtype=numpy.float64)
+    rotations = matrices[..., :3, :3]
+    rotations = rotations / \
+        numpy.linalg.norm(rotations, axis=-1, keepdims=True)
+    return rotations, matrices[..., 3, :3]
+
+
+def film_corners(aperture_width, aperture_height, focal_length):
+    """
+    Gets the four corners of the film back in camera space, the camera looks down -Z
+    Args:
+        aperture_width (numpy.ndarray): The horizontal film aperture
+        aperture_height (numpy.ndarray): The vertical film aperture
+        focal_length (numpy.ndarray): The focal length (same unit as the apertures)
+
+    Returns:
+        A numpy array of shape (..., 4, 3)
+    """
+    half_width, half_height, focal_length = numpy.broadcast_arrays(
+        numpy.asarray(aperture_width, dtype=numpy.float64) / 2.0,
+        numpy.asarray(aperture_height, dtype=numpy.float64) / 2.0,
+        numpy.asarray(focal_length, dtype=numpy.float64)
+    )
+    signs = numpy.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]])
+
+    corners = numpy.empty(half_width.shape + (4, 3))
+    corners[..., 0] = half_width[..., None] * signs[:, 0]
+    corners[..., 1] = half_height[..., None] * signs[:, 1]
+    corners[..., 2] = -focal_length[..., None]
+    return corners
+
+
+def solve_frustum_coverage(rotations, focal_length, aperture_width, aperture_height, locked_rotations, locked_focal_length, positions=None, locked_positions=None, depth=None):
+    """
+    Solves the smallest film aperture that lets the locked camera see everything the moving camera sees.
+    The frustum corners of every frame are projected onto the locked camera's film back in one pass.
+    Args:
+        rotations (numpy.ndarray): The world rotation of the moving camera on every frame, shape (N, 3, 3)
+        focal_length (numpy.ndarray): The focal length of the moving camera on every frame, shape (N,)
+        aperture_width (float): The horizontal film aperture of the moving camera
+        aperture_height (float): The vertical film aperture of the moving camera
+        locked_rotations (numpy.ndarray): The world rotation of the locked camera, shape (3, 3) or (N, 3, 3)
+        locked_focal_length (float): The focal length of the locked camera (same unit as the apertures)
+        positions (numpy.ndarray): The world position of the moving camera on every frame, shape (N, 3).
+            Only used together with depth
+        locked_positions (numpy.ndarray): The world position of the locked camera, shape (3,) or (N, 3)
+        depth (float): How far away (in world units) the frustum corners are. When this isn't given, the
+            corners are treated as infinitely far away, so only the rotations matter
+
+    Returns:
+        A dict with the 'aperture_width' and 'aperture_height' that cover every frame and the per frame
+        'frame_width' and 'frame_height' arrays
+    """
+    rotations = numpy.asarray(rotations, dtype=numpy.float64)
+    focal_length = numpy.broadcast_to(
+        numpy.asarray(focal_length, dtype=numpy.float64), rotations.shape[:1])
+    locked_rotations = numpy.broadcast_to(
+        numpy.asarray(locked_rotations, dtype=numpy.float64), rotations.shape)
+
+    corners = film_corners(aperture_width, aperture_height, focal_length)
+
+    if depth is None:
+        # Directions only, the camera positions don't matter for things that are far away
+        world = numpy.einsum('nkj,nji->nki', corners, rotations)
+        local = numpy.einsum('nki,nji->nkj', world, locked_rotations)
+    else:
+        # Put the corners at the given depth and look at them from the locked camera's position
+        corners = corners * (depth / focal_length)[:, None, None]
+        world = numpy.einsum('nkj,nji->nki', corners,
+                             rotations) + numpy.asarray(positions)[:, None, :]
+        offsets = world - \
+            numpy.broadcast_to(locked_positions, positions.shape)[:, None, :]
+        local = numpy.einsum('nki,nji->nkj', offsets, locked_rotations)
+
+    distance = -local[..., 2]
+    if numpy.any(distance <= 0.0):
+        raise ValueError(
+            'The camera turns too far away from the locked camera to fit on its film back')
+
+    # Project onto the locked camera's film back
+    film_x = locked_focal_length * local[..., 0] / distance
+    film_y = locked_focal_length * local[..., 1] / distance
+
+    frame_width = 2.0 * numpy.abs(film_x).max(axis=-1)
+    frame_height = 2.0 * numpy.abs(film_y).max(axis=-1)
+
+    return {
+        'aperture_width': float(frame_width.max()),
+        'aperture_height': float(frame_height.max()),
+        'frame_width': frame_width,
+        'frame_height': frame_height,
+    }
@@ -0,0 +1,168 @@
+"""
+Brown-Conrady lens distortion on the film back, to find how much more aperture a distorted plate needs
+
+The model maps undistorted film back points to distorted ones:
+    r^2 = x^2 + y^2
+    x_d = x (1 + k1 r^2 + k2 r^4 + k3 r^6) + 2 p1 x y + p2 (r^2 + 2 x^2)
+    y_d = y (1 + k1 r^2 + k2 r^4 + k3 r^6) + p1 (r^2 + 2 y^2) + 2 p2 x y
+x and y are measured from the center of the film back in units of half its diagonal, so the corners are at
+r = 1 whatever the film back's aspect ratio is. Every coefficient can be a scalar or an array with one value
+per frame (eg: for a zoom lens), everything broadcasts.
+"""
+import numpy
+
+COEFFICIENTS = ['k1', 'k2', 'k3', 'p1', 'p2']
+# The most fixed point iterations undistort uses, this is plenty for the distortion of real lenses
+DEFAULT_ITERATIONS = 20
+# undistort stops early once no point moves more than this (in half diagonals) in an iteration
+DEFAULT_TOLERANCE = 1e-9
+# How many rows of the ST-map are solved at a time, this caps the memory use on big maps
+DEFAULT_ROWS_PER_CHUNK = 256
+
+
+def distort(x, y, k1=0.0, k2=0.0, k3=0.0, p1=0.0, p2=0.0):
+    """
+    Distorts film back points
+    Args:
+        x (numpy.ndarray): The undistorted horizontal positions (in half diagonals)
+        y (numpy.ndarray): The undistorted vertical positions (in half diagonals)
+        k1, k2, k3 (numpy.ndarray): The radial coefficients
+        p1, p2 (numpy.ndarray): The tangential coefficients
+
+    Returns:
+        A tuple of the distorted x and y arrays
+    """
+    r2 = x * x + y * y
+    radial = 1.0 + r2 * (k1 + r2 * (k2 + r2 * k3))
+    return (x * radial + 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x),
+            y * radial + p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y)
+
+
+def undistort(x, y, k1=0.0, k2=0.0, k3=0.0, p1=0.0, p2=0.0, iterations=DEFAULT_ITERATIONS, tolerance=DEFAULT_TOLERANCE):
+    """
+    Undistorts film back points, the inverse of distort, solved with fixed point iterations
+    Args:
+        x (numpy.ndarray): The distorted horizontal positions (in half diagonals)
+        y (numpy.ndarray): The distorted vertical positions (in half diagonals)
+        k1, k2, k3 (numpy.ndarray): The radial coefficients
+        p1, p2 (numpy.ndarray): The tangential coefficients
+        iterations (int): The most times the estimate is refined
+        tolerance (float): Stop once no point moves more than this in an iteration
+
+    Returns:
+        A tuple of the undistorted x and y arrays
+    """
+    undistorted_x = x
+    undistorted_y = y
+    for _ in range(iterations):
+        r2 = undistorted_x * undistorted_x + undistorted_y * undistorted_y
+        radial = 1.0 + r2 * (k1 + r2 * (k2 + r2 * k3))
+        previous_x = undistorted_x
+        undistorted_x = (x - 2.0 * p1 * undistorted_x * undistorted_y -
+                         p2 * (r2 + 2.0 * undistorted_x * undistorted_x)) / radial
+        undistorted_y = (y - p1 * (r2 + 2.0 * undistorted_y * undistorted_y) -
+                         2.0 * p2 * previous_x * undistorted_y) / radial
+        if numpy.abs(undistorted_x - previous_x).max() < tolerance:
+            break
+    return undistorted_x, undistorted_y
+
+
+def film_scale(aperture_width, aperture_height):
+    # The size of the film back in half diagonals
+    half_diagonal = numpy.hypot(aperture_width, aperture_height) / 2.0
+    return aperture_width / half_diagonal, aperture_height / half_diagonal
+
+
+def border_points(width, height, columns, rows):
+    """
+    Gets the points along the edge of a grid of pixels that covers the film back
+    Args:
+        width (float): The width of the film back (in half diagonals)
+        height (float): The height of the film back (in half diagonals)
+        columns (int): The number of pixels across
+        rows (int): The number of pixels up
+
+    Returns:
+        A tuple of the x and y arrays, measured from the center of the film back
+    """
+    x = numpy.linspace(-0.5, 0.5, columns + 1) * width
+    y = numpy.linspace(-0.5, 0.5, rows + 1) * height
+    return (numpy.concatenate([x, x, numpy.full(rows + 1, x[0]), numpy.full(rows + 1, x[-1])]),
+            numpy.concatenate([numpy.full(columns + 1, y[0]), numpy.full(columns + 1, y[-1]), y, y]))
+
+
+def coverage(aperture_width, aperture_height, coefficients, columns=4096, rows=2160, chunk_size=64):
+    """
+    Solves how much bigger the undistorted film back has to be to cover everything the distorted film back
+    sees. The lens maps the border of the frame onto the border of what it covers, so only the points along
+    the border of the pixel grid are undistorted, for every frame at once
+    Args:
+        aperture_width (float): The horizontal film aperture
+        aperture_height (float): The vertical film aperture
+        coefficients (dict): The 'k1', 'k2', 'k3', 'p1' and 'p2' coefficients, scalars or per frame arrays
+        columns (int): The number of pixels across the plate
+        rows (int): The number of pixels up the plate
+        chunk_size (int): How many frames are solved at a time
+
+    Returns:
+        A dict with the 'width' and 'height' factors the aperture has to grow by, the most any frame needs
+    """
+    width, height = film_scale(aperture_width, aperture_height)
+    x, y = border_points(width, height, columns, rows)
+
+    # One row per frame, one column per border point
+    values = numpy.broadcast_arrays(*[numpy.atleast_1d(numpy.asarray(
+        coefficients.get(name, 0.0), dtype=numpy.float64)) for name in COEFFICIENTS])
+    reach_x = 0.0
+    reach_y = 0.0
+    for chunk_start in range(0, len(values[0]), chunk_size):
+        chunk = [value[chunk_start:chunk_start + chunk_size, None] for value in values]
+        undistorted_x, undistorted_y = undistort(x, y, *chunk)
+        reach_x = max(reach_x, float(numpy.abs(undistorted_x).max()))
+        reach_y = max(reach_y, float(numpy.abs(undistorted_y).max()))
+
+    return {
+        'width': float(2.0 * reach_x / width),
+        'height': float(2.0 * reach_y / height),
+    }
+
+
+def write_st_map(path, aperture_width, aperture_height, new_aperture_width, new_aperture_height, coefficients,
+                 columns, rows, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK):
+    """
+    Writes an ST-map that lays the (undistorted, overscanned) render onto the distorted plate: every pixel of
+    the plate holds where to sample the render, from 0 to 1 across it. The map is a float32 .npy array of
+    shape (rows, columns, 2) that is written through a memory map a few rows at a time, so 4K maps don't have
+    to fit in memory. Row 0 is the bottom row, like Nuke's pixel coordinates
+    Args:
+        path (str): The .npy file to write
+        aperture_width (float): The horizontal film aperture of the plate
+        aperture_height (float): The vertical film aperture of the plate
+        new_aperture_width (float): The horizontal film aperture of the render
+        new_aperture_height (float): The vertical film aperture of the render
+        coefficients (dict): The 'k1', 'k2', 'k3', 'p1' and 'p2' coefficients (scalars) of the plate's lens
+        columns (int): The number of pixels across the plate
+        rows (int): The number of pixels up the plate
+        rows_per_chunk (int): How many rows are solved at a time
+    """
+    half_diagonal = numpy.hypot(aperture_width, aperture_height) / 2.0
+    values = [float(coefficients.get(name, 0.0)) for name in COEFFICIENTS]
+
+    # The centers of the plate's pixels, in half diagonals
+    x = (numpy.arange(columns) + 0.5) / columns - 0.5
+    x *= aperture_width / half_diagonal
+    y = (numpy.arange(rows) + 0.5) / rows - 0.5
+    y *= aperture_height / half_diagonal
+
+    st_map = numpy.lib.format.open_memmap(path, mode='w+', dtype=numpy.float32, shape=(rows, columns, 2))
+    try:
+        for row_start in range(0, rows, rows_per_chunk):
+            grid_x, grid_y = numpy.meshgrid(x, y[row_start:row_start + rows_per_chunk])
+            undistorted_x, undistorted_y = undistort(grid_x, grid_y, *values)
+            st_map[row_start:row_start + rows_per_chunk, :, 0] = \
+                0.5 + undistorted_x * half_diagonal / new_aperture_width
+            st_map[row_start:row_start + rows_per_chunk, :, 1] = \
+                0.5 + undistorted_y * half_diagonal / new_aperture_height
+        st_map.flush()
+    finally:
+        del st_map
@@ -0,0 +1,283 @@
+"""
+Keeps a live "required overscan" readout in the viewport while a camera is being animated
+
+Usage:
+    import LiveOverscan
+    live = LiveOverscan.LiveOverscan()
+    live.start()
+    ...
+    live.stop()
+
+Every animation curve of the camera gets a CurveIndex: its keys with a CurveBounds.ExtremaTree over the
+extremes of its segments. Changing a key only re-reads the few keys around it and updates the tree in
+O(log n), so the readout stays current on long curves without rescanning them.
+"""
+import numpy
+import maya.OpenMaya as OpenMaya  # pylint: disable=import-error
+import maya.utils  # pylint: disable=import-error
+from maya import cmds  # pylint: disable=import-error
+import CameraSampling
+import CurveBounds
+from CompMoveCamera import CompMoveCamera
+
+KEY_COLUMNS = ['times', 'values', 'in_angles', 'out_angles', 'in_weights', 'out_weights', 'steps']
+
+
+def get_node(name):
+    # Gets the MObject of a node
+    selection = OpenMaya.MSelectionList()
+    selection.add(name)
+    node = OpenMaya.MObject()
+    selection.getDependNode(0, node)
+    return node
+
+
+def get_key_index(plug):
+    """
+    Gets the index of the key an animation curve plug belongs to, eg: keyTimeValue[3].keyValue is key 3
+    Args:
+        plug (MPlug): The plug that changed
+
+    Returns:
+        The key index, or None if the plug isn't part of a key
+    """
+    if plug.isChild():
+        plug = plug.parent()
+    if plug.isElement():
+        return plug.logicalIndex()
+    return None
+
+
+class CurveIndex(object):
+    """
+    The keys of an animation curve with a segment tree over the extremes of its segments
+    Args:
+        curve (str): The animation curve node
+        curve_type (str): The node type of the curve, eg: 'animCurveTA'
+    """
+
+    def __init__(self, curve, curve_type):
+        self.curve = curve
+        self.curve_type = curve_type
+        self.rebuild()
+
+    def rebuild(self):
+        # Reads all the keys and builds the tree from scratch
+        self.keys = CameraSampling.read_keys(self.curve, self.curve_type)
+        self.points = list(self.control_points(0, len(self)))
+        self.tree = CurveBounds.ExtremaTree(*CurveBounds.segment_extrema(self.data(0, len(self) - 1)))
+
+    def __len__(self):
+        return len(self.keys['times'])
+
+    def control_points(self, first, end):
+        # The control points of the keys first up to (not including) end
+        keys = self.keys
+        weighted = keys['in_weights'] is not None
+        return CurveBounds.control_points(
+            keys['times'][first:end], keys['values'][first:end],
+            keys['in_angles'][first:end], keys['out_angles'][first:end],
+            in_weights=keys['in_weights'][first:end] if weighted else None,
+            out_weights=keys['out_weights'][first:end] if weighted else None,
+            slope_scale=keys['slope_scale'],
+            weight_scale=keys['weight_scale']
+        )
+
+    def data(self, first, last):
+        # The keys first to last (included) as CurveData
+        end = last + 1
+        out_x, out_y, in_x, in_y = [points[first:end] for points in self.points]
+        return CurveBounds.CurveData(
+            self.keys['times'][first:end], self.keys['values'][first:end],
+            out_x, out_y, in_x, in_y, self.keys['steps'][first:end])
+
+    def update(self, index):
+        """
+        Updates the tree after a key changed
+        Args:
+            index (int): The index of the key that changed, None rebuilds everything
+        """
+        count = cmds.keyframe(self.curve, query=True, keyframeCount=True)
+        if index is None or count != len(self) or not 0 <= index < count:
+            # Keys were added or removed, the indices of every key after them shifted
+            self.rebuild()
+            return
+
+        # Auto tangents of the neighbouring keys follow a changed key, so re-read two keys on each side
+        first = max(index - 2, 0)
+        last = min(index + 2, count - 1)
+        window = CameraSampling.read_keys(self.curve, self.curve_type, (first, last))
+        for column in KEY_COLUMNS:
+            if self.keys[column] is not None and window[column] is not None:
+                self.keys[column][first:last + 1] = window[column]
+
+        # A key that moved past its neighbours changes the order of the keys
+        if numpy.any(numpy.diff(self.keys['times'][max(first - 1, 0):last + 2]) <= 0.0):
+            self.rebuild()
+            return
+
+        # Control points depend on the gaps to the neighbouring keys, so they are solved one key wider
+        start = max(first - 1, 0)
+        points = self.control_points(start, min(last + 2, count))
+        for column, values in zip(self.points, points):
+            column[first:last + 1] = values[first - start:last - start + 1]
+
+        # Every segment that starts or ends on a changed key
+        first_segment = max(first - 1, 0)
+        last_segment = min(last, count - 2)
+        if last_segment < first_segment:
+            return
+
+        segment_min, segment_max = CurveBounds.segment_extrema(self.data(first_segment, last_segment + 1))
+        for offset, segment in enumerate(range(first_segment, last_segment + 1)):
+            self.tree.update(segment, segment_min[offset], segment_max[offset])
+
+    def bounds(self):
+        # The min and max value of the curve between its first and last key
+        if len(self) == 1:
+            return float(self.keys['values'][0]), float(self.keys['values'][0])
+        return self.tree.bounds()
+
+    def keyframe_range(self):
+        return int(self.keys['times'][0]), int(self.keys['times'][-1])
+
+
+class LiveOverscan(object):
+    """
+    Watches a camera and keeps the overscan it needs up to date in a heads up display
+    Args:
+        camera (str): The camera to watch, the first selected item is used if this isn't given
+    """
+    HUD_NAME = 'CompMoveCameraOverscan'
+
+    def __init__(self, camera=None):
+        self.tool = CompMoveCamera(bounds='analytic', camera=camera)
+        # Attribute name to CurveIndex, for the attributes that are driven by a single curve
+        self.indices = {}
+        self.callback_ids = []
+        # Attribute name to the set of changed key indices, None in the set rebuilds the whole curve
+        self.dirty = {}
+        self.rewatch = False
+        self.flush_queued = False
+        self.readout = ''
+
+    def start(self):
+        self.tool.get_selected_camera()
+        self.tool.get_apertures()
+        self.tool.get_resolutions()
+        self.watch()
+        self.update()
+        self.show()
+
+    def stop(self):
+        self.remove_callbacks()
+        if cmds.headsUpDisplay(self.HUD_NAME, exists=True):
+            cmds.headsUpDisplay(self.HUD_NAME, remove=True)
+
+    def remove_callbacks(self):
+        for callback_id in self.callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self.callback_ids = []
+
+    def watch(self):
+        # Index the camera's curves and listen to changes of them, and of the camera itself
+        self.remove_callbacks()
+        self.indices = {}
+
+        for attr_name in self.tool.get_attr_names():
+            single_curve = CameraSampling.get_single_curve(attr_name)
+            if single_curve is None:
+                continue
+
+            self.indices[attr_name] = CurveIndex(*single_curve)
+            self.callback_ids.append(OpenMaya.MNodeMessage.addAttributeChangedCallback(
+                get_node(single_curve[0]), self.on_curve_changed, attr_name))
+
+        for node in [self.tool.selected['camera'], self.tool.selected['shape']]:
+            self.callback_ids.append(OpenMaya.MNodeMessage.addAttributeChangedCallback(
+                get_node(node), self.on_camera_changed, None))
+
+    def on_curve_changed(self, message, plug, other_plug, attr_name):
+        if message & (OpenMaya.MNodeMessage.kAttributeArrayAdded | OpenMaya.MNodeMessage.kAttributeArrayRemoved):
+            self.mark_dirty(attr_name, None)
+        elif message & OpenMaya.MNodeMessage.kAttributeSet:
+            self.mark_dirty(attr_name, get_key_index(plug))
+
+    def on_camera_changed(self, message, plug, other_plug, client_data):
+        # A curve was connected or disconnected, or an attribute without keys changed
+        if message & (OpenMaya.MNodeMessage.kConnectionMade | OpenMaya.MNodeMessage.kConnectionBroken):
+            self.rewatch = True
+            self.queue_flush()
+        elif message & OpenMaya.MNodeMessage.kAttributeSet:
+            self.queue_flush()
+
+    def mark_dirty(self, attr_name, index):
+        self.dirty.setdefault(attr_name, set()).add(index)
+        self.queue_flush()
+
+    def queue_flush(self):
+        # Changing a key sends several messages, they are handled together once Maya is idle
+        if not self.flush_queued:
+            self.flush_queued = True
+            maya.utils.executeDeferred(self.flush)
+
+    def flush(self):
+        self.flush_queued = False
+        if self.rewatch:
+            self.rewatch = False
+            self.watch()
+        else:
+            for attr_name, key_indices in self.dirty.items():
+                index = self.indices.get(attr_name)
+                if index is None:
+                    continue
+                if None in key_indices:
+                    index.update(None)
+                else:
+                    for key_index in sorted(key_indices):
+                        index.update(key_index)
+        self.dirty = {}
+        self.update()
+
+    def update(self):
+        # Solve the overscan from the indexed curves, without sampling anything
+        tool = self.tool
+        tool.keyframe_ranges = {}
+        tool.value_ranges = {}
+        for attr_name in tool.get_attr_names():
+            index = self.indices.get(attr_name)
+            if index is None:
+                # Attributes without a single curve are read by CompMoveCamera as usual
+                continue
+            tool.keyframe_ranges[attr_name] = index.keyframe_range()
+            tool.value_ranges[attr_name] = index.bounds()
+
+        tool.get_focal_lengths()
+        tool.get_rotations()
+        tool.do_the_math()
+
+        new = tool.resolution['new']
+        original = tool.resolution['original']
+        self.readout = '{:.0f} x {:.0f} ({:+.1f}% x {:+.1f}%)'.format(
+            new['width'], new['height'],
+            (new['width'] / original['width'] - 1.0) * 100.0,
+            (new['height'] / original['height'] - 1.0) * 100.0)
+
+        if cmds.headsUpDisplay(self.HUD_NAME, exists=True):
+            cmds.headsUpDisplay(self.HUD_NAME, refresh=True)
+
+    def get_readout(self, *args):
+        return self.readout
+
+    def show(self):
+        if cmds.headsUpDisplay(self.HUD_NAME, exists=True):
+            cmds.headsUpDisplay(self.HUD_NAME, remove=True)
+
+        cmds.headsUpDisplay(
+            self.HUD_NAME,
+            section=1,
+            block=cmds.headsUpDisplay(nextFreeBlock=1),
+            label='Overscan',
+            command=self.get_readout,
+            attachToRefresh=True
+        )
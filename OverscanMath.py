@@ -0,0 +1,117 @@
+import numpy
+
+# Maya stores focal lengths in millimeters and film apertures in inches
+MILLIMETERS_PER_INCH = 25.4
+
+
+def field_of_view(aperture, focal_length):
+    """
+    Gets the half field of view of a film aperture
+    Args:
+        aperture (numpy.ndarray): The film aperture (same unit as the focal length)
+        focal_length (numpy.ndarray): The focal length
+
+    Returns:
+        The half field of view in radians
+    """
+    return numpy.arctan(numpy.asarray(aperture) / (numpy.asarray(focal_length) * 2.0))
+
+
+def rotation_spread(rotation_min, rotation_max):
+    """
+    Gets the average rotation and how far the rotation moves away from it
+    Args:
+        rotation_min (numpy.ndarray): The min rotation in degrees
+        rotation_max (numpy.ndarray): The max rotation in degrees
+
+    Returns:
+        A tuple of the average rotation in degrees and the spread (max - average) in radians
+    """
+    rotation_min = numpy.asarray(rotation_min, dtype=numpy.float64)
+    rotation_max = numpy.asarray(rotation_max, dtype=numpy.float64)
+    average = (rotation_min + rotation_max) / 2.0
+    return average, numpy.radians(rotation_max - average)
+
+
+def solve_overscan(focal_min, focal_max, spread_x, spread_y, aperture_height, aperture_width, resolution_height, resolution_width):
+    """
+    Solves the film aperture and render resolution that cover the whole camera move.
+    Every argument is an array (or a scalar) and they all broadcast together, so any number of cameras
+    and/or frames can be solved at once, eg: (cameras, frames) arrays.
+    Args:
+        focal_min (numpy.ndarray): The min focal length in inches
+        focal_max (numpy.ndarray): The max focal length in inches
+        spread_x (numpy.ndarray): The rotateX spread in radians (see rotation_spread)
+        spread_y (numpy.ndarray): The rotateY spread in radians (see rotation_spread)
+        aperture_height (numpy.ndarray): The original vertical film aperture in inches
+        aperture_width (numpy.ndarray): The original horizontal film aperture in inches
+        resolution_height (numpy.ndarray): The original render height in pixels
+        resolution_width (numpy.ndarray): The original render width in pixels
+
+    Returns:
+        A dict with the new 'aperture_height', 'aperture_width', 'resolution_height' and
+        'resolution_width' arrays and the original 'field_of_view_x' and 'field_of_view_y'
+    """
+    focal_min = numpy.asarray(focal_min, dtype=numpy.float64)
+    focal_max = numpy.asarray(focal_max, dtype=numpy.float64)
+    aperture_height = numpy.asarray(aperture_height, dtype=numpy.float64)
+    aperture_width = numpy.asarray(aperture_width, dtype=numpy.float64)
+
+    # The original field of view, at the widest focal length
+    field_of_view_x = field_of_view(aperture_height, focal_min)
+    field_of_view_y = field_of_view(aperture_width, focal_min)
+
+    # Widen the field of view by how far the camera rotates away from the average
+    new_aperture_height = (2.0 * focal_max) * \
+        numpy.tan(field_of_view_x + spread_x)
+    new_aperture_width = (2.0 * focal_max) * \
+        numpy.tan(field_of_view_y + spread_y)
+
+    # The resolution grows by the same amount as the aperture
+    return {
+        'field_of_view_x': field_of_view_x,
+        'field_of_view_y': field_of_view_y,
+        'aperture_height': new_aperture_height,
+        'aperture_width': new_aperture_width,
+        'resolution_height': resolution_height * (new_aperture_height / aperture_height),
+        'resolution_width': resolution_width * (new_aperture_width / aperture_width),
+    }
+
+
+def crop_windows(focal_length, rotation_x, rotation_y, average_x, average_y, aperture_height, aperture_width, new_focal_length, new_aperture_height, new_aperture_width):
+    """
+    Solves which part of the new (overscanned) film aperture the original camera sees on every frame.
+    Every argument broadcasts, so this is usually called with one value per frame.
+    Args:
+        focal_length (numpy.ndarray): The original focal length in inches
+        rotation_x (numpy.ndarray): The original rotateX in degrees
+        rotation_y (numpy.ndarray): The original rotateY in degrees
+        average_x (numpy.ndarray): The rotateX the camera is locked to, in degrees
+        average_y (numpy.ndarray): The rotateY the camera is locked to, in degrees
+        aperture_height (numpy.ndarray): The original vertical film aperture in inches
+        aperture_width (numpy.ndarray): The original horizontal film aperture in inches
+        new_focal_length (numpy.ndarray): The focal length the new aperture was solved with, in inches
+        new_aperture_height (numpy.ndarray): The new vertical film aperture in inches
+        new_aperture_width (numpy.ndarray): The new horizontal film aperture in inches
+
+    Returns:
+        A dict of 'left', 'right', 'bottom' and 'top' arrays, from 0 to 1 across the new aperture
+    """
+    half_x = field_of_view(aperture_height, focal_length)
+    half_y = field_of_view(aperture_width, focal_length)
+    offset_x = numpy.radians(numpy.asarray(rotation_x) - average_x)
+    offset_y = numpy.radians(numpy.asarray(rotation_y) - average_y)
+
+    # Project the edges of the original view onto the locked camera's film back.
+    # Tilting up (positive rotateX) moves the view up, panning left (positive rotateY) moves it left
+    top = new_focal_length * numpy.tan(offset_x + half_x)
+    bottom = new_focal_length * numpy.tan(offset_x - half_x)
+    left = -new_focal_length * numpy.tan(offset_y + half_y)
+    right = -new_focal_length * numpy.tan(offset_y - half_y)
+
+    return {
+        'left': 0.5 + left / new_aperture_width,
+        'right': 0.5 + right / new_aperture_width,
+        'bottom': 0.5 + bottom / new_aperture_height,
+        'top': 0.5 + top / new_aperture_height,
+    }
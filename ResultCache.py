@@ -0,0 +1,86 @@
+import collections
+import hashlib
+import json
+import os
+
+
+def fingerprint(parts):
+    """
+    Gets a short, stable key for a set of values
+    Args:
+        parts (list): Anything that can be written as JSON, eg: curve key times and values
+
+    Returns:
+        A hex string
+    """
+    data = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class ResultCache(object):
+    """
+    A small persistent cache, stored as a JSON file, that forgets the least recently used entries
+    once it holds more than max_entries
+    Args:
+        path (str): The JSON file the cache is stored in
+        max_entries (int): How many entries to keep
+    """
+
+    def __init__(self, path, max_entries=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.changed = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path) as handle:
+                entries = json.load(handle)['entries']
+        except (ValueError, KeyError, IOError, OSError):
+            # A broken cache file is the same as an empty cache
+            return
+
+        self.entries = collections.OrderedDict(
+            (key, value) for key, value in entries)
+
+    def get(self, key):
+        # Gets an entry and marks it as the most recently used one, returns None if it isn't cached.
+        # The order only changes in memory, a hit doesn't make save rewrite the file (the next put does)
+        if key not in self.entries:
+            return None
+
+        value = self.entries.pop(key)
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+
+        # Forget the least recently used entries
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        self.changed = True
+
+    def save(self):
+        # Writes the cache to a temporary file first, so a crash can't leave a half written cache behind
+        if not self.changed:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as handle:
+            json.dump({'entries': list(self.entries.items())}, handle)
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temporary_path, self.path)
+        self.changed = False
@@ -0,0 +1,255 @@
+import collections
+import contextlib
+import json
+import os
+import sys
+import time
+
+# The most precise clock there is, Python 2 doesn't have perf_counter
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class CommandCounter(object):
+    """
+    Stands in for the maya.cmds module and counts every command that goes through it
+    Args:
+        commands (module): The real maya.cmds module
+    """
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.counts = collections.Counter()
+
+    def __getattr__(self, name):
+        command = getattr(self.commands, name)
+        if not callable(command):
+            return command
+
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return command(*args, **kwargs)
+
+        return counted
+
+
+def argument_shape(args, kwargs):
+    # A short description of how a command was called, without the values, eg: (str, time=float)
+    def shape(value):
+        if isinstance(value, (list, tuple)):
+            return '{}[{}]'.format(type(value).__name__, len(value))
+        return type(value).__name__
+
+    parts = [shape(value) for value in args]
+    parts.extend('{}={}'.format(name, shape(kwargs[name])) for name in sorted(kwargs))
+    return '(' + ', '.join(parts) + ')'
+
+
+class CommandStats(object):
+    # The calls of one command, made with the same argument shape from the same function
+    __slots__ = ['count', 'seconds', 'max_seconds']
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class CommandProfiler(CommandCounter):
+    """
+    Stands in for the maya.cmds module and records the count, latency, argument shape and calling function
+    of every command that goes through it
+    Args:
+        commands (module): The real maya.cmds module
+    """
+
+    def __init__(self, commands):
+        CommandCounter.__init__(self, commands)
+        # (command, argument shape, caller) to CommandStats
+        self.stats = collections.defaultdict(CommandStats)
+
+    def __getattr__(self, name):
+        command = getattr(self.commands, name)
+        if not callable(command):
+            return command
+
+        def profiled(*args, **kwargs):
+            # Skip the wrappers in this module, eg: a CommandCounter around this profiler
+            frame = sys._getframe(1)  # pylint: disable=protected-access
+            while frame.f_back is not None and frame.f_globals.get('__name__') == __name__:
+                frame = frame.f_back
+            caller = '{}.{}:{}'.format(
+                os.path.splitext(os.path.basename(frame.f_code.co_filename))[0],
+                frame.f_code.co_name, frame.f_lineno)
+
+            start = clock()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                seconds = clock() - start
+                self.counts[name] += 1
+                stats = self.stats[(name, argument_shape(args, kwargs), caller)]
+                stats.count += 1
+                stats.seconds += seconds
+                stats.max_seconds = max(stats.max_seconds, seconds)
+
+        return profiled
+
+    def hot_spots(self, group_by_caller=True):
+        """
+        Ranks the commands by the time spent in them
+        Args:
+            group_by_caller (bool): Keep the calls of the same command from different functions apart
+
+        Returns:
+            A list of dicts, the slowest first
+        """
+        rows = {}
+        for (name, shape, caller), stats in self.stats.items():
+            key = (name, shape, caller) if group_by_caller else (name,)
+            row = rows.setdefault(key, {
+                'command': name,
+                'arguments': shape if group_by_caller else '',
+                'caller': caller if group_by_caller else '',
+                'count': 0,
+                'seconds': 0.0,
+                'max_seconds': 0.0,
+            })
+            row['count'] += stats.count
+            row['seconds'] += stats.seconds
+            row['max_seconds'] = max(row['max_seconds'], stats.max_seconds)
+
+        for row in rows.values():
+            row['mean_seconds'] = row['seconds'] / row['count']
+        return sorted(rows.values(), key=lambda row: row['seconds'], reverse=True)
+
+    def table(self, limit=20, group_by_caller=True):
+        # The hot spots as a text table
+        rows = self.hot_spots(group_by_caller)
+        total = sum(row['seconds'] for row in rows) or 1.0
+        lines = ['{:>3} {:<20} {:>8} {:>10} {:>10} {:>10} {:>6}  {}'.format(
+            '#', 'command', 'calls', 'total ms', 'mean us', 'max us', '%', 'caller / arguments')]
+        for rank, row in enumerate(rows[:limit], 1):
+            lines.append('{:>3} {:<20} {:>8} {:>10.2f} {:>10.1f} {:>10.1f} {:>6.1f}  {} {}'.format(
+                rank, row['command'], row['count'], row['seconds'] * 1000.0, row['mean_seconds'] * 1e6,
+                row['max_seconds'] * 1e6, row['seconds'] / total * 100.0, row['caller'], row['arguments']))
+        lines.append('{} commands, {:.2f} ms in total'.format(sum(self.counts.values()), total * 1000.0))
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def profiling(modules=None):
+    """
+    Profiles every Maya command used inside the block, eg:
+
+        with RunReport.profiling() as profiler:
+            TweenerUI.tween(50)
+        print(profiler.table())
+
+    Args:
+        modules (list): The modules to profile, defaults to every loaded module with a module level cmds.
+            Modules that import maya.cmds inside the block (or inside their functions) are profiled too
+    """
+    import maya  # pylint: disable=import-error
+    commands = sys.modules['maya.cmds']
+    profiler = CommandProfiler(commands)
+
+    if modules is None:
+        modules = [module for module in list(sys.modules.values())
+                   if module is not None and getattr(module, 'cmds', None) is commands]
+
+    originals = [(module, module.cmds) for module in modules]
+    for module, _ in originals:
+        module.cmds = profiler
+    sys.modules['maya.cmds'] = profiler
+    maya.cmds = profiler
+    try:
+        yield profiler
+    finally:
+        for module, original in originals:
+            module.cmds = original
+        sys.modules['maya.cmds'] = commands
+        maya.cmds = commands
+
+
+@contextlib.contextmanager
+def null_phase():
+    # Used instead of RunReport.phase when nothing is being timed
+    yield
+
+
+class RunReport(object):
+    """
+    Collects how long every phase of a run takes, how many Maya commands it used and what it computed
+    Args:
+        name (str): The name of the tool that is running
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = collections.OrderedDict()
+        self.command_counts = collections.Counter()
+        self.values = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # Time a part of the run, running the same phase more than once adds up the time
+        start = clock()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(
+                name, 0.0) + clock() - start
+
+    @contextlib.contextmanager
+    def counting(self, modules):
+        # Count the Maya commands the given modules use, by swapping their cmds for a counter
+        originals = [(module, module.cmds) for module in modules]
+        counter = CommandCounter(originals[0][1])
+        for module, _ in originals:
+            module.cmds = counter
+        try:
+            yield counter
+        finally:
+            for module, commands in originals:
+                module.cmds = commands
+            self.command_counts.update(counter.counts)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'total_seconds': sum(self.timings.values()),
+            'timings': dict(self.timings),
+            'command_count': sum(self.command_counts.values()),
+            'command_counts': dict(self.command_counts),
+            'values': self.values,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True, default=str)
+
+    def summary(self):
+        # One short line per part of the report
+        timings = ', '.join('{} {:.3f}s'.format(name, seconds)
+                            for name, seconds in self.timings.items())
+        commands = ', '.join('{} {}'.format(name, count)
+                             for name, count in self.command_counts.most_common())
+        return '{}: {:.3f}s ({})\nMaya commands: {} ({})'.format(
+            self.name,
+            sum(self.timings.values()),
+            timings,
+            sum(self.command_counts.values()),
+            commands
+        )
+
+    def emit(self, verbosity=1):
+        """
+        Prints the report
+        Args:
+            verbosity (int): 0 prints nothing, 1 prints a compact summary, 2 prints everything as JSON
+        """
+        if verbosity <= 0:
+            return
+        if verbosity == 1:
+            print(self.summary())
+        else:
+            print(self.to_json())
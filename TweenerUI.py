@@ -1,6 +1,85 @@
+from bisect import bisect_left, bisect_right
 from maya import cmds  # pylint: disable=import-error
 
 
+# The curves that are keyed over time, driven keys are read one attribute at a time like everything else
+TIME_CURVE_TYPES = ['animCurveTA', 'animCurveTL', 'animCurveTT', 'animCurveTU']
+
+
+def getInputs(attrFulls):
+    # Find the node that drives every attribute with one query. Every plug name is normalized on its own
+    # (one ls per node), so nothing depends on the order or the number of names ls gives back.
+    # Attributes without an input are left out
+    longNodes = {}
+
+    def longName(plug):
+        node, attr = plug.split('.', 1)
+        if node not in longNodes:
+            longNodes[node] = (cmds.ls(node, long=True) or [node])[0]
+        return '{}.{}'.format(longNodes[node], attr)
+
+    wanted = dict((longName(attrFull), attrFull) for attrFull in attrFulls)
+    connections = cmds.listConnections(
+        attrFulls, source=True, destination=False, plugs=True, connections=True, skipConversionNodes=True) or []
+
+    inputs = {}
+    for plug, source in zip(connections[0::2], connections[1::2]):
+        attrFull = wanted.get(longName(plug))
+        if attrFull is not None:
+            inputs[attrFull] = source.split('.', 1)[0]
+    return inputs
+
+
+def readCurves(curves):
+    # Get the key times and values of many curves with two queries for all of them
+    # The key indices start over at 0 on every curve, so they tell where the keys of each curve are
+    indices = cmds.keyframe(curves, query=True, indexValue=True) or []
+    starts = [position for position, index in enumerate(indices) if index == 0]
+    if len(starts) != len(curves):
+        # A curve without keys, the keys can't be told apart
+        keys = []
+        for curve in curves:
+            timeValues = cmds.keyframe(curve, query=True, timeChange=True, valueChange=True) or []
+            keys.append((timeValues[0::2], timeValues[1::2]))
+        return keys
+
+    timeValues = cmds.keyframe(curves, query=True, timeChange=True, valueChange=True)
+    ends = starts[1:] + [len(indices)]
+    return [(timeValues[start * 2:end * 2:2], timeValues[start * 2 + 1:end * 2:2])
+            for start, end in zip(starts, ends)]
+
+
+def getKeys(attrFulls):
+    # Get the sorted key times and values of every attribute. The attributes that are driven straight by a
+    # curve are read with a handful of queries for all of them, instead of one query per attribute.
+    # Returns a dict of attribute to (times, values), attributes without keys are left out
+    inputs = getInputs(attrFulls)
+    if not inputs:
+        return {}
+
+    curves = sorted(set(cmds.ls(sorted(set(inputs.values())), type=TIME_CURVE_TYPES) or []))
+    curveKeys = dict(zip(curves, readCurves(curves))) if curves else {}
+
+    keys = {}
+    for attrFull in attrFulls:
+        if attrFull not in inputs:
+            continue
+
+        if inputs[attrFull] in curveKeys:
+            # The keys of a curve are always sorted by time
+            times, values = curveKeys[inputs[attrFull]]
+            if times:
+                keys[attrFull] = (times, values)
+            continue
+
+        # Keys that reach the attribute through something else (eg: a pairBlend, an animation layer or a
+        # character set) are read on their own, their values are evaluated when they are needed
+        times = cmds.keyframe(attrFull, query=True)
+        if times:
+            keys[attrFull] = (sorted(set(times)), None)
+    return keys
+
+
 def tween(pPercentage, pObj=None, pAttrs=None, selection=True):
     # If no obj is available to use, throw an error
     if not pObj and not selection:
@@ -15,35 +94,21 @@ def tween(pPercentage, pObj=None, pAttrs=None, selection=True):
 
     currentTime = cmds.currentTime(query=True)
 
-    for attr in pAttrs:
-        attrFull = '{}.{}'.format(pObj, attr)
-        keyframes = cmds.keyframe(attrFull, query=True)
-
-        if not keyframes:
-            continue
-
-        previousKeyframes = []
-        for frame in keyframes:
-            if frame < currentTime:
-                previousKeyframes.append(frame)
+    attrFulls = ['{}.{}'.format(pObj, attr) for attr in pAttrs]
+    for attrFull, (times, values) in getKeys(attrFulls).items():
+        # Find the last key before and the first key after the current time with a binary search
+        previousIndex = bisect_left(times, currentTime) - 1
+        nextIndex = bisect_right(times, currentTime)
 
-        laterKeyframes = [frame for frame in keyframes if frame > currentTime]
-
-        if not previousKeyframes and not laterKeyframes:
+        if previousIndex < 0 or nextIndex >= len(times):
             continue
 
-        if previousKeyframes:
-            previousFrame = max(previousKeyframes)
+        if values is None:
+            previousValue = cmds.getAttr(attrFull, time=times[previousIndex])
+            nextValue = cmds.getAttr(attrFull, time=times[nextIndex])
         else:
-            previousFrame = None
-
-        nextFrame = min(laterKeyframes) if laterKeyframes else None
-
-        if not previousFrame or not nextFrame:
-            continue
-
-        previousValue = cmds.getAttr(attrFull, time=previousFrame)
-        nextValue = cmds.getAttr(attrFull, time=nextFrame)
+            previousValue = values[previousIndex]
+            nextValue = values[nextIndex]
 
         difference = nextValue - previousValue
         weightedDifference = (difference * pPercentage) / 100.0